@@ -0,0 +1,32 @@
+"""
+Hourly CBU exchange-rate refresh into marketplace.fx_rates.
+
+The API converts UZS prices from that table only (backend/cars/fx.py) and
+never calls the CBU itself, so this DAG is the single writer. Runs inside
+the django container of the car-dev stack (Docker-out-of-Docker, same setup
+as tg_channel_dag.py); each run also backfills any day of the last week
+that an earlier run missed.
+"""
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from datetime import datetime, timedelta
+
+default_args = {
+    "owner":        "airflow",
+    "retries":      2,
+    "retry_delay":  timedelta(minutes=5),
+}
+
+with DAG(
+    dag_id="fx_rates",
+    default_args=default_args,
+    start_date=datetime(2026, 10, 1),
+    schedule_interval="15 * * * *",  # hourly
+    catchup=False,
+    tags=["backend"],
+) as dag:
+    BashOperator(
+        task_id="refresh_fx_rates",
+        bash_command="docker compose -f /app/docker-compose.devlocal.yml -p car-dev "
+                     "exec -T django python manage.py refresh_fx_rates --days 7",
+    )
@@ -0,0 +1,33 @@
+"""
+Market-stats rollup catch-up every five minutes.
+
+The single writer of marketplace.market_stats_daily apart from edits made
+through the car detail endpoint: the analytics endpoints only read it, and
+ingest stays a plain INSERT. A listing whose transaction is still in flight
+during one run is rolled up by the next (backend/cars/market_stats.py).
+Same Docker-out-of-Docker setup as fx_rates_dag.py.
+"""
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from datetime import datetime, timedelta
+
+default_args = {
+    "owner":        "airflow",
+    "retries":      2,
+    "retry_delay":  timedelta(minutes=1),
+}
+
+with DAG(
+    dag_id="market_stats",
+    default_args=default_args,
+    start_date=datetime(2026, 10, 1),
+    schedule_interval="*/5 * * * *",
+    catchup=False,
+    max_active_runs=1,
+    tags=["backend"],
+) as dag:
+    BashOperator(
+        task_id="refresh_market_stats",
+        bash_command="docker compose -f /app/docker-compose.devlocal.yml -p car-dev "
+                     "exec -T django python manage.py refresh_market_stats",
+    )
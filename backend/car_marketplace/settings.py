@@ -99,6 +99,25 @@ DATABASES = {
     }
 }
 
+# Cache
+# Backs the versioned response cache (cars/response_cache.py). Local memory
+# works out of the box but is per-process: with several gunicorn workers set
+# CACHE_BACKEND to a shared store, e.g.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache  (needs `redis`)
+#   CACHE_LOCATION=redis://redis:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'marketplace'),
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TTL', '3600')),  # seconds
+    }
+}
+
+# Exchange rates (cars/fx.py): CBU JSON archive, read only by
+# `manage.py refresh_fx_rates`, never during a request.
+FX_SOURCE_URL = os.getenv('FX_SOURCE_URL', 'https://cbu.uz/en/arkhiv-kursov-valyut/json')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
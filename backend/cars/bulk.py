@@ -0,0 +1,115 @@
+"""
+Batch ingest for the scraper write path.
+
+A scraper page of 40 ads used to cost 40 POSTs, each running an exists()
+check plus an INSERT in its own transaction. `bulk_ingest()` validates a
+whole batch with the regular model serializer and writes every valid record
+with ONE statement:
+
+    INSERT INTO <table> (...) VALUES (...), (...), ...
+    ON CONFLICT (<key>) DO NOTHING | DO UPDATE SET ...
+    RETURNING <key>, (xmax = 0) AS inserted
+
+`xmax = 0` is true only for freshly inserted tuples, which is how each item
+is reported back as created or existing without a second round-trip.
+"""
+import json
+
+from django.db import connection, transaction
+
+MAX_BATCH = 1000
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def parse_records(request):
+    """Records from a JSON array body or an NDJSON stream (one object per line).
+
+    Raises ValueError with a client-facing message on malformed input.
+    """
+    body = request.body.decode('utf-8')
+    if request.content_type in NDJSON_TYPES:
+        try:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f'invalid NDJSON: {e}')
+    else:
+        try:
+            records = json.loads(body or '[]')
+        except json.JSONDecodeError as e:
+            raise ValueError(f'invalid JSON: {e}')
+        if not isinstance(records, list):
+            raise ValueError('expected a JSON array of records')
+    if len(records) > MAX_BATCH:
+        raise ValueError(f'batch too large (max {MAX_BATCH} records)')
+    if not all(isinstance(r, dict) for r in records):
+        raise ValueError('every record must be a JSON object')
+    return records
+
+
+def bulk_ingest(serializer_class, records, key, update_on_conflict=None, prepare=None):
+    """Validate and upsert `records`; returns per-item results in input order.
+
+    serializer_class   — ModelSerializer whose `key` field has no uniqueness
+                         validator (the conflict clause handles that)
+    key                — natural key column with a unique index
+    update_on_conflict — {column: SQL expression} to SET on existing rows,
+                         or None for DO NOTHING
+    prepare            — optional callable run on each new model instance
+                         before it is written (derived columns)
+
+    Each result is {"index", key, "status": created|existing|error[, "errors"]}.
+    A key repeated inside the batch is written once; later copies report
+    "existing".
+    """
+    model = serializer_class.Meta.model
+    fields = [f for f in model._meta.concrete_fields
+              if not (f.primary_key and f.get_internal_type() in ('AutoField', 'BigAutoField'))]
+    key_field = model._meta.get_field(key)
+
+    results = []
+    rows = []
+    row_index = {}  # key value → index of the result that writes it
+    for i, record in enumerate(records):
+        serializer = serializer_class(data=record)
+        if not serializer.is_valid():
+            results.append({'index': i, key: record.get(key), 'status': 'error',
+                            'errors': serializer.errors})
+            continue
+        obj = model(**serializer.validated_data)
+        key_value = getattr(obj, key_field.attname)
+        if key_value in (None, ''):
+            results.append({'index': i, key: None, 'status': 'error',
+                            'errors': {key: ['This field is required for bulk ingest.']}})
+            continue
+        results.append({'index': i, key: key_value, 'status': 'existing'})
+        if key_value in row_index:
+            continue
+        row_index[key_value] = i
+        if prepare:
+            prepare(obj)
+        rows.append([f.get_db_prep_save(f.pre_save(obj, add=True), connection) for f in fields])
+
+    if not rows:
+        return results
+
+    qn = connection.ops.quote_name
+    table = f'marketplace.{qn(model._meta.db_table)}'
+    cols = ', '.join(qn(f.column) for f in fields)
+    row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    if update_on_conflict:
+        conflict = 'DO UPDATE SET ' + ', '.join(
+            f'{qn(col)} = {expr}' for col, expr in update_on_conflict.items())
+    else:
+        conflict = 'DO NOTHING'
+    sql = (
+        f'INSERT INTO {table} ({cols}) VALUES {", ".join([row_sql] * len(rows))} '
+        f'ON CONFLICT ({qn(key_field.column)}) {conflict} '
+        f'RETURNING {qn(key_field.column)}, (xmax = 0) AS inserted'
+    )
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(sql, [value for row in rows for value in row])
+        for key_value, inserted in cur.fetchall():
+            if inserted:
+                results[row_index[key_value]]['status'] = 'created'
+    return results
@@ -0,0 +1,278 @@
+"""
+Canonical display labels for electronics listings, computed once at ingest.
+
+ElectronicsReport and ElectronicsListings group listings by a display model
+("MacBook Pro M3 Max", "Intel Core i5-12400", "DDR4 16GB") that the scraper's
+raw `model` column does not carry directly: the chip or CPU model often has
+to be recovered from specs or the title, spellings differ ("RTX3060TI" vs
+"RTX 3060 Ti"), and broken / for-parts ads must be kept out of the price
+bands. Those rules used to run inside both endpoints' SQL on every request.
+
+`labels()` evaluates them for one row and returns the values stored in
+marketplace.electronics (db/updates/V14):
+
+    canonical_model      display label, NULL for generic buckets ("iPhone",
+                         "Intel Core") and rows without a model
+    is_damaged           title matches a broken / for-parts keyword
+    price_usd_at_ingest  price in USD at the CBU rate of the listing's date
+                         (created_at; the latest rate when it has none)
+
+Rows written before V14, or after these rules change, are relabelled with
+`manage.py backfill_electronics_labels`.
+"""
+import re
+from decimal import Decimal
+
+
+def _normalize_iphone_model(raw: str) -> str:
+    """iPhone 12Pro Max → iPhone 12 Pro Max."""
+    s = raw.strip()
+    s = re.sub(r'(\d)(Pro|Mini|Plus|Max)', r'\1 \2', s)
+    s = re.sub(r'(Pro)(Max)', r'\1 \2', s)
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+
+def _normalize_macbook_model(raw: str) -> str:
+    """
+    Canonical form: MacBook [Air|Pro] [chip]
+      MacBook M1 PRO        → MacBook Pro M1
+      MacBook M2 PRO        → MacBook Pro M2
+      MacBook M3 MAX        → MacBook Pro M3 Max
+      MacBook M4 MAX        → MacBook Pro M4 Max
+      MacBook Air M1        → MacBook Air M1
+      MacBook Air M4 MAX    → MacBook Air M4 Max   (chip from specs)
+      MacBook Pro M4 PRO    → MacBook Pro M4 Pro   (chip from specs)
+      MacBook Pro M3 MAX    → MacBook Pro M3 Max
+      MacBook Air (Intel)   → MacBook Air (Intel)
+      MacBook Air M5        → MacBook Air M5
+    """
+    s = raw.strip()
+    # Title-case chip qualifiers ("M4 MAX" → "M4 Max", "M4 PRO" → "M4 Pro")
+    s = re.sub(r'\bPRO\b', 'Pro', s)
+    s = re.sub(r'\bMAX\b', 'Max', s)
+    # Bare-chip titles without Air/Pro segment default to the Pro line:
+    # "MacBook M1 Pro" / "MacBook M2 Pro" → "MacBook Pro M1/M2"
+    s = re.sub(r'^MacBook\s+(M\d)\s+Pro$', r'MacBook Pro \1', s)
+    # "MacBook M3 Max" / "MacBook M4 Max" → "MacBook Pro M3/M4 Max"
+    s = re.sub(r'^MacBook\s+(M\d)\s+Max$', r'MacBook Pro \1 Max', s)
+    # Uppercase a lowercase chip prefix recovered from a title ("m5" -> "M5")
+    s = re.sub(r'\bm([1-9])\b', lambda m: 'M' + m.group(1), s)
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+
+def _normalize_gpu_model(raw: str) -> str:
+    """
+    Canonical form: [GTX|RTX|RX] [number] [Ti|Super|XT]
+      RX580         → RX 580
+      RTX3060TI     → RTX 3060 Ti
+      GTX 1050 TI   → GTX 1050 Ti
+      RTX2060SUPER  → RTX 2060 Super
+      RX 5700XT     → RX 5700 XT
+      RX9070XT      → RX 9070 XT
+    """
+    s = raw.strip()
+    # Uppercase the series prefix
+    s = re.sub(r'\b(gtx|rtx|rx)\b', lambda m: m.group().upper(), s, flags=re.IGNORECASE)
+    # Insert space between series and number: "RTX3080" → "RTX 3080"
+    s = re.sub(r'(GTX|RTX|RX)(\d)', r'\1 \2', s)
+    # Insert space between number and suffix: "3060TI" → "3060 TI"
+    s = re.sub(r'(\d)(TI|SUPER|XT)\b', r'\1 \2', s, flags=re.IGNORECASE)
+    # Normalise suffix case
+    s = re.sub(r'\bTI\b',    'Ti',    s, flags=re.IGNORECASE)
+    s = re.sub(r'\bSUPER\b', 'Super', s, flags=re.IGNORECASE)
+    s = re.sub(r'\bxt\b',    'XT',    s, flags=re.IGNORECASE)
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+
+def _normalize_ssd_model(raw: str) -> str:
+    """NVMe 512GB, SATA 1TB — keep interface + capacity."""
+    s = raw.strip().upper()
+    s = re.sub(r'ГБ', 'GB', s)
+    s = re.sub(r'ТБ', 'TB', s)
+    s = re.sub(r'\bM\.2\b|\bPCIE\b', 'NVMe', s)
+    s = re.sub(r'\s+', ' ', s)
+    return s.strip()
+
+
+def _normalize_ram_model(raw: str) -> str:
+    """Group by DDR generation + total capacity, stripping speeds (MHz).
+
+    DDR4 3200      → DDR4        (3200 is a speed, no GB suffix)
+    DDR4 3200 8GB  → DDR4 8GB    (strip speed, keep capacity)
+    DDR4 2         → DDR4        (truncated kit notation, no GB)
+    DDR4 2x8GB     → DDR4 16GB   (kit: 2 x 8 = 16)
+    DDR 3 8GB      → DDR3 8GB    (fix spurious space)
+    DDR5 5600      → DDR5        (5600 is a speed, no GB suffix)
+    """
+    s = raw.strip().upper()
+    s = s.replace('ГБ', 'GB').replace('МГЦ', 'MHZ')
+    # Fix "DDR 3" → "DDR3", "DDR 4" → "DDR4"
+    s = re.sub(r'\bDDR\s+([2345])\b', r'DDR\1', s)
+    # Extract DDR generation
+    gen_m = re.search(r'DDR([2345]?)', s)
+    gen = gen_m.group(1) if gen_m and gen_m.group(1) else ''
+    # Kit notation: 2x8GB → 16GB, 2x16GB → 32GB
+    kit = re.search(r'(\d+)\s*[Xx]\s*(\d+)\s*GB', s)
+    if kit:
+        total = int(kit.group(1)) * int(kit.group(2))
+        if total <= 512:
+            return f"DDR{gen} {total}GB"
+    # Plain capacity: 8GB, 16GB — must be ≤512 to exclude speeds (1600/3200/5600)
+    cap = re.search(r'(\d+)\s*GB', s)
+    if cap:
+        n = int(cap.group(1))
+        if n <= 512:
+            return f"DDR{gen} {n}GB"
+    # Fallback: just the generation type
+    return f"DDR{gen}" if gen else 'RAM'
+
+
+def _normalize_cpu_model(raw: str) -> str:
+    """Intel Core I5-12400 → Intel Core i5-12400 | AMD Ryzen 5 5600X → AMD Ryzen 5 5600X"""
+    s = raw.strip()
+    # Normalize iX casing: "I5-" or "I5 " → "i5-"
+    s = re.sub(r'\bI([3579])([\s\-])', lambda m: f'i{m.group(1)}-', s)
+    # Also catch trailing "I5" with no separator followed by digits: "I5 12400" → "i5-12400"
+    s = re.sub(r'\bi([3579])\s+(\d)', lambda m: f'i{m.group(1)}-{m.group(2)}', s)
+    # Uppercase the suffix letters after model number: "i7-14700kf"/"i7-14700Kf" → "i7-14700KF"
+    s = re.sub(r'(i[3579]-\d{4,5})([A-Za-z]+)', lambda m: m.group(1) + m.group(2).upper(), s)
+    # Normalize Ryzen casing
+    s = re.sub(r'\bRyzen\b', 'Ryzen', s, flags=re.IGNORECASE)
+    s = re.sub(r'\bCore\b', 'Core', s, flags=re.IGNORECASE)
+    s = re.sub(r'\bIntel\b', 'Intel', s, flags=re.IGNORECASE)
+    s = re.sub(r'\bAMD\b', 'AMD', s, flags=re.IGNORECASE)
+    s = re.sub(r'\s+', ' ', s)
+    return s.strip()
+
+
+def _normalize_console_model(raw: str) -> str:
+    """PlayStation 5 Slim → PlayStation 5 Slim, Xbox Series X → Xbox Series X"""
+    s = raw.strip()
+    # Expand PS4/PS5 shorthand
+    s = re.sub(r'\bPS([345])\b', r'PlayStation \1', s, flags=re.IGNORECASE)
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+
+_NORMALIZERS = {
+    'iphone':  _normalize_iphone_model,
+    'macbook': _normalize_macbook_model,
+    'gpu':     _normalize_gpu_model,
+    'ram':     _normalize_ram_model,
+    'cpu':     _normalize_cpu_model,
+    'console': _normalize_console_model,
+    'ssd':     _normalize_ssd_model,
+}
+
+# Generic words that are too broad to be useful model names (per category)
+_SKIP_MODELS = {
+    'iphone':  {'iPhone', 'Apple'},
+    'macbook': {'MacBook', 'Apple'},
+    'gpu':     {'GPU', 'Видеокарта', 'video karta'},
+    'ipad':    {'iPad', 'Apple'},
+    'ram':     {'RAM', 'None', 'ОЗУ', 'DDR'},
+    'cpu':     {'CPU', 'None', 'Процессор', 'Intel Core', 'AMD Ryzen', 'AMD'},
+    'console': {'Console', 'None', 'Приставка', 'Игровая приставка'},
+    'ssd':     {'SSD', 'None'},
+}
+
+
+# Title keywords (ru / en / uz) marking broken or for-parts listings.
+DAMAGE_KEYWORDS = (
+    'разбит', 'слом', 'запчаст', 'ремонт', 'не работ', 'не включ', 'дефект',
+    'трещин', 'поломк', 'без дисплея', 'без аккумулятора',
+    'broken', 'damaged', 'for parts', 'repair', 'defect',
+    'buzilgan', 'singan', 'nosoz', 'ehtiyot qism',
+)
+
+_MACBOOK_LINES = ('MacBook Air', 'MacBook Pro')
+_CPU_BARE      = ('Intel Core', 'AMD Ryzen', 'Intel Xeon', 'AMD')
+
+_CHIP          = re.compile(r'\bM[1-9]\b', re.IGNORECASE)
+_CHIP_TIER     = re.compile(r'M[1-9]\s*(pro|max)', re.IGNORECASE)
+_DDR_GEN       = re.compile(r'DDR\s*([2-5])')
+_CORE_ULTRA    = re.compile(r'\bultra\s+([3579])\s*([0-9]{3}[a-z]*)', re.IGNORECASE)
+_XEON          = re.compile(r'\bxeon\b', re.IGNORECASE)
+_CORE_IN       = re.compile(r'\bi([3579])[\s-]?([0-9]{4,5}[a-z]*)', re.IGNORECASE)
+
+
+def _resolve_model(category: str, model: str, title: str, specs: dict) -> str:
+    """Fill in what the raw scraper model leaves out, before normalization."""
+    if category == 'macbook' and model in _MACBOOK_LINES:
+        # 1) chip from structured specs (most reliable)
+        if specs.get('chip'):
+            return f"{model} {specs['chip']}"
+        # 2) chip recovered from the title (e.g. M5 listings the scraper
+        #    mislabelled as Intel) -> "MacBook Pro M5 [Pro|Max]"
+        chip = _CHIP.search(title)
+        if chip:
+            tier = _CHIP_TIER.search(title)
+            return f"{model} {chip.group().upper()}" + (f" {tier.group(1).capitalize()}" if tier else '')
+        # 3) genuinely Intel (no chip anywhere)
+        return f"{model} (Intel)"
+
+    if category == 'ram' and not model.endswith(('GB', 'ГБ')):
+        # model='DDR4 3200', specs capacity_gb=8 → 'DDR4 8GB', only when the
+        # DDR generation is known and the capacity is a single-stick size
+        gen = _DDR_GEN.search(model)
+        try:
+            capacity = int(specs.get('capacity_gb'))
+        except (TypeError, ValueError):
+            capacity = None
+        if gen and capacity and 1 <= capacity <= 64:
+            return f"DDR{gen.group(1)} {capacity}GB"
+
+    if category == 'cpu' and model in _CPU_BARE:
+        # Bare 'Intel Core'/'AMD Ryzen': prefer specs.model_id, then recover
+        # the model from the title (Core Ultra, iN-NNNN, Xeon). Anything still
+        # bare stays generic and is dropped via _SKIP_MODELS['cpu'].
+        if specs.get('model_id'):
+            return f"{model} {specs['model_id']}"
+        ultra = _CORE_ULTRA.search(title)
+        if ultra:
+            return f"Intel Core Ultra {ultra.group(1)} {ultra.group(2).upper()}"
+        if _XEON.search(title):
+            return 'Intel Xeon'
+        core = _CORE_IN.search(title)
+        if core:
+            return f"Intel Core i{core.group(1)}-{core.group(2).upper()}"
+    return model
+
+
+def canonical_model(category, model, title=None, specs=None):
+    """Display label for a listing, or None when it has no usable model."""
+    if not model:
+        return None
+    resolved = _resolve_model(category, model, title or '', specs if isinstance(specs, dict) else {})
+    if resolved in _SKIP_MODELS.get(category, ()):
+        return None
+    return _NORMALIZERS.get(category, str.strip)(resolved)
+
+
+def is_damaged(title) -> bool:
+    lowered = (title or '').lower()
+    return any(k in lowered for k in DAMAGE_KEYWORDS)
+
+
+def price_usd(price, currency, uzs_per, on=None):
+    """`price` in USD. `uzs_per(currency, on)` gives UZS per unit (cars/fx.py)
+    and is only called for UZS prices, with the listing's date `on`."""
+    if price is None:
+        return None
+    price = Decimal(str(price))
+    if currency != 'USD':
+        price /= Decimal(str(uzs_per('USD', on)))
+    return price.quantize(Decimal('0.01'))
+
+
+def labels(row, uzs_per) -> dict:
+    """The three ingest-time columns for `row` (a dict or an Electronics)."""
+    get = row.get if isinstance(row, dict) else lambda k: getattr(row, k)
+    return {
+        'canonical_model':     canonical_model(get('category'), get('model'), get('title'), get('specs')),
+        'is_damaged':          is_damaged(get('title')),
+        'price_usd_at_ingest': price_usd(get('price'), get('price_currency'), uzs_per, get('created_at')),
+    }
@@ -0,0 +1,175 @@
+"""
+Streamed table exports for scrapers, notebooks and the Parquet exporter.
+
+Rows are read through a named server-side cursor
+(`QuerySet.iterator(chunk_size=...)`), encoded one chunk at a time and
+handed to a StreamingHttpResponse, so memory stays at one chunk however
+large the table is:
+
+    ndjson   one JSON object per line
+    csv      header row + one row per record
+    arrow    Arrow IPC stream, one record batch per chunk
+    parquet  Parquet file, one row group per chunk (footer sent last)
+
+Timestamps are written as stored: the marketplace tables use plain
+TIMESTAMP columns holding UTC, which Arrow / Parquet mark as UTC.
+Arrow and Parquet need pyarrow; without it those outputs are unavailable.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the arrow / parquet outputs need it
+    pa = pq = None
+
+CHUNK_SIZE = 5000
+
+CONTENT_TYPES = {
+    'ndjson':  'application/x-ndjson',
+    'csv':     'text/csv; charset=utf-8',
+    'arrow':   'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'csv', 'arrow': 'arrows', 'parquet': 'parquet'}
+ARROW_OUTPUTS = ('arrow', 'parquet')
+
+
+def chunks(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Lists of row tuples from a server-side cursor over `queryset`."""
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def json_array(queryset, serializer_class, chunk_size=CHUNK_SIZE):
+    """`serializer_class(queryset, many=True)` rendered as one JSON array,
+    serialized and sent a chunk at a time."""
+    objects = queryset.iterator(chunk_size=chunk_size)
+    encoder = JSONEncoder(ensure_ascii=False)
+    yield '['
+    first = True
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            break
+        body = encoder.encode(serializer_class(chunk, many=True).data)[1:-1]
+        if body:
+            yield body if first else ',' + body
+            first = False
+    yield ']'
+
+
+def stream(output, queryset, fields, chunk_size=CHUNK_SIZE):
+    """Encoded chunks of `queryset` projected on model `fields`."""
+    columns = [f.attname for f in fields]
+    rows = chunks(queryset, columns, chunk_size)
+    if output == 'ndjson':
+        return _ndjson(columns, rows)
+    if output == 'csv':
+        return _csv(columns, rows)
+    return _arrow(output, fields, rows)
+
+
+def _ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in rows:
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+def _csv(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in rows:
+        writer.writerows([_csv_value(v) for v in row] for row in chunk)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class _Drain:
+    """Write-only file object whose contents are taken as they are produced."""
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def arrow_type(field):
+    kind = field.get_internal_type()
+    if kind in ('AutoField', 'IntegerField', 'BigAutoField', 'BigIntegerField',
+                'SmallIntegerField', 'PositiveIntegerField'):
+        return pa.int64()
+    if kind == 'DecimalField':
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if kind == 'DateTimeField':
+        return pa.timestamp('us', tz='UTC')
+    if kind == 'DateField':
+        return pa.date32()
+    if kind == 'BooleanField':
+        return pa.bool_()
+    if kind == 'FloatField':
+        return pa.float64()
+    if kind == 'ArrayField':
+        return pa.list_(pa.string())
+    return pa.string()  # char / text / url / choices, JSON as text
+
+
+def _arrow(output, fields, rows):
+    schema = pa.schema([pa.field(f.attname, arrow_type(f)) for f in fields])
+    json_columns = [i for i, f in enumerate(fields) if f.get_internal_type() == 'JSONField']
+    sink = _Drain()
+    if output == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        write = writer.write_table
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+    for chunk in rows:
+        columns = [list(c) for c in zip(*chunk)]
+        for i in json_columns:
+            columns[i] = [None if v is None else json.dumps(v, ensure_ascii=False) for v in columns[i]]
+        batch = pa.record_batch(columns, schema=schema)
+        write(pa.Table.from_batches([batch]) if output == 'parquet' else batch)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
@@ -0,0 +1,87 @@
+"""
+Single-pass faceted counts for the car filter UI.
+
+`facet_counts()` answers every facet a filter panel needs — per-value counts
+for categorical columns plus arbitrary band counts (price / mileage / date
+windows) — with ONE statement and ONE scan of the filtered rows:
+
+    SELECT GROUPING(f1, f2, ...) AS grp, f1, f2, ...,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE band_0), COUNT(*) FILTER (WHERE band_1), ...
+    FROM (<filtered queryset>) AS facet_src
+    GROUP BY GROUPING SETS ((f1), (f2), ..., ())
+
+The band predicates are ordinary Django Q objects, compiled by the ORM inside
+the sub-select, so lookups like created_at__date keep exactly the same
+timezone semantics as a plain queryset.filter(...).count().
+"""
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper
+
+
+def facet_counts(queryset, group_fields=(), bands=None):
+    """Count rows per value of each `group_fields` column and per band.
+
+    queryset     — already-filtered Car queryset (annotations allowed, so a
+                   TruncDate alias can be faceted like a column)
+    group_fields — column / annotation names to facet on
+    bands        — {name: Q} predicates counted over the whole queryset
+
+    Returns (groups, band_counts, total):
+        groups      — {field: {value: count}}, NULL values keyed as None
+        band_counts — {name: count}
+        total       — number of rows in the queryset
+    """
+    group_fields = list(group_fields)
+    bands = dict(bands or {})
+    groups = {field: {} for field in group_fields}
+
+    flags = {
+        f'band_{i}': ExpressionWrapper(q, output_field=BooleanField())
+        for i, q in enumerate(bands.values())
+    }
+    inner = queryset.order_by().annotate(**flags).values(*group_fields, *flags)
+    try:
+        inner_sql, params = inner.query.sql_with_params()
+    except EmptyResultSet:
+        return groups, {name: 0 for name in bands}, 0
+
+    qn = connection.ops.quote_name
+    cols = [qn(f) for f in group_fields]
+    select = []
+    if cols:
+        select.append(f"GROUPING({', '.join(cols)}) AS grp")
+        select.extend(cols)
+    select.append('COUNT(*) AS cnt')
+    select.extend(f'COUNT(*) FILTER (WHERE {qn(flag)})' for flag in flags)
+    sql = f"SELECT {', '.join(select)} FROM ({inner_sql}) AS facet_src"
+    if cols:
+        sets = ', '.join(f'({c})' for c in cols)
+        sql += f' GROUP BY GROUPING SETS ({sets}, ())'
+
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    # GROUPING() returns a bitmask with the FIRST argument as the most
+    # significant bit; a bit is 1 when that column is rolled up. The grand
+    # total row () has every bit set, set (f_i) has every bit but f_i's.
+    n = len(cols)
+    full_mask = (1 << n) - 1
+    mask_to_field = {full_mask ^ (1 << (n - 1 - i)): f for i, f in enumerate(group_fields)}
+
+    band_counts = {name: 0 for name in bands}
+    total = 0
+    for row in rows:
+        if cols:
+            grp, values, rest = row[0], row[1:n + 1], row[n + 1:]
+        else:
+            grp, values, rest = full_mask, (), row
+        if grp == full_mask:
+            total = rest[0]
+            band_counts = dict(zip(bands, rest[1:]))
+            continue
+        field = mask_to_field[grp]
+        groups[field][values[group_fields.index(field)]] = rest[0]
+    return groups, band_counts, total
@@ -0,0 +1,137 @@
+"""
+UZS exchange rates from the Central Bank of Uzbekistan, kept in
+marketplace.fx_rates (db/updates/V16).
+
+Request handling never talks to the CBU. The only HTTP client is
+`refresh()`, run on a schedule by `manage.py refresh_fx_rates` (Airflow
+DAG fx_rates); it upserts one row per (currency, rate_date) as published.
+
+Views and ingest read through `uzs_per()`:
+
+    uzs_per('USD')                     latest known rate
+    uzs_per('USD', on=date(2025, 3, 1))  rate in force that day, i.e. the
+                                       last one published on or before it
+
+Lookups are cached per process for CACHE_TTL seconds, so a hot path costs a
+dict lookup and the table is read at most once per TTL per (currency, day).
+Before the first refresh has run the table is empty and DEFAULT_UZS_PER_USD
+is used, with a warning.
+"""
+import json
+import logging
+import threading
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UZS_PER_USD = 12800.0
+CACHE_TTL = 600       # seconds
+CACHE_MAX = 4096      # (currency, day) entries per process
+FETCH_TIMEOUT = 10    # seconds
+
+_cache: dict = {}     # (currency, day | None) → (rate, expires_at)
+_lock = threading.Lock()
+
+
+def uzs_per(currency='USD', on=None) -> float:
+    """UZS for one unit of `currency` on day `on` (date/datetime, None = latest)."""
+    if isinstance(on, datetime):
+        on = on.date()
+    key = (currency, on)
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit and hit[1] > now:
+        return hit[0]
+    rate = _lookup(currency, on)
+    with _lock:
+        if len(_cache) >= CACHE_MAX:
+            _cache.clear()
+        _cache[key] = (rate, now + CACHE_TTL)
+    return rate
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _lookup(currency, on):
+    with connection.cursor() as cur:
+        if on is None:
+            cur.execute("""
+                SELECT rate FROM marketplace.fx_rates
+                WHERE currency = %s ORDER BY rate_date DESC LIMIT 1
+            """, [currency])
+        else:
+            # Last published rate on or before `on`; for days before the
+            # history starts, the earliest rate we have.
+            cur.execute("""
+                SELECT rate FROM (
+                    (SELECT rate, 0 AS pref FROM marketplace.fx_rates
+                     WHERE currency = %s AND rate_date <= %s
+                     ORDER BY rate_date DESC LIMIT 1)
+                    UNION ALL
+                    (SELECT rate, 1 FROM marketplace.fx_rates
+                     WHERE currency = %s
+                     ORDER BY rate_date LIMIT 1)
+                ) r ORDER BY pref LIMIT 1
+            """, [currency, on, currency])
+        row = cur.fetchone()
+    if row:
+        return float(row[0])
+    logger.warning(f'No {currency} rate in marketplace.fx_rates yet, using {DEFAULT_UZS_PER_USD}')
+    return DEFAULT_UZS_PER_USD
+
+
+# ---------------------------------------------------------------------------
+# Refresher (scheduled job only — never called from a request)
+# ---------------------------------------------------------------------------
+
+def fetch(currency='USD', on=None):
+    """(rate_date, rate) published by the CBU for `on` (default: today)."""
+    url = f"{settings.FX_SOURCE_URL.rstrip('/')}/{currency}/"
+    if on:
+        url += f'{on.isoformat()}/'
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as resp:
+        data = json.loads(resp.read())
+    entry = data[0]
+    return datetime.strptime(entry['Date'], '%d.%m.%Y').date(), float(entry['Rate'])
+
+
+def refresh(currency='USD', days=1):
+    """Fetch today's rate plus any of the last `days` days missing from the
+    table; returns the number of rows written. A failed day is logged and
+    skipped, so one bad response does not lose the rest of the backfill."""
+    today = date.today()
+    with connection.cursor() as cur:
+        cur.execute("""
+            SELECT rate_date FROM marketplace.fx_rates
+            WHERE currency = %s AND rate_date > %s
+        """, [currency, today - timedelta(days=days)])
+        known = {r[0] for r in cur.fetchall()}
+    wanted = [today] + [today - timedelta(days=n) for n in range(1, days)
+                        if today - timedelta(days=n) not in known]
+
+    written = 0
+    for day in wanted:
+        try:
+            rate_date, rate = fetch(currency, None if day == today else day)
+        except Exception as e:
+            logger.warning(f'{currency} rate fetch for {day} failed: {e}')
+            continue
+        with connection.cursor() as cur:
+            cur.execute("""
+                INSERT INTO marketplace.fx_rates (currency, rate_date, rate)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (currency, rate_date)
+                DO UPDATE SET rate = EXCLUDED.rate, fetched_at = NOW()
+            """, [currency, rate_date, rate])
+        written += 1
+    if written:
+        clear_cache()
+    return written
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from cars import electronics_labels, fx
+from cars.models import Electronics
+from cars.response_cache import ELECTRONICS, bump
+
+COLUMNS = ['canonical_model', 'is_damaged', 'price_usd_at_ingest']
+
+
+class Command(BaseCommand):
+    help = "Fill canonical_model / is_damaged / price_usd_at_ingest on marketplace.electronics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Relabel every row (after changing the rules in cars/electronics_labels.py); '
+                                 'an existing price_usd_at_ingest is kept')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        qs = Electronics.objects.order_by('ad_id')
+        if not options['all']:
+            qs = qs.filter(is_damaged__isnull=True)
+        last, updated = None, 0
+        while True:
+            batch = list((qs.filter(ad_id__gt=last) if last else qs)[:options['batch_size']])
+            if not batch:
+                break
+            for row in batch:
+                fresh = electronics_labels.labels(row, fx.uzs_per)
+                if row.price_usd_at_ingest is not None:
+                    del fresh['price_usd_at_ingest']  # already converted
+                for column, value in fresh.items():
+                    setattr(row, column, value)
+            Electronics.objects.bulk_update(batch, COLUMNS)
+            updated += len(batch)
+            last = batch[-1].ad_id
+        if updated:
+            bump(ELECTRONICS)
+        self.stdout.write(f"✅ Done. Labelled electronics rows: {updated}")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from cars import fx
+
+
+class Command(BaseCommand):
+    help = "Fetch CBU exchange rates into marketplace.fx_rates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--currency', default='USD')
+        parser.add_argument('--days', type=int, default=7,
+                            help='Also backfill any of the last N days missing from the table')
+
+    def handle(self, *args, **options):
+        written = fx.refresh(options['currency'], days=options['days'])
+        self.stdout.write(f"✅ Done. {options['currency']} rates written: {written}")
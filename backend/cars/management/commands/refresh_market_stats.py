@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from cars import market_stats
+from cars.response_cache import CARS, bump
+
+
+class Command(BaseCommand):
+    help = "Roll new car listings up into marketplace.market_stats_daily"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Truncate and re-aggregate every listing (after bulk edits/deletes)')
+
+    def handle(self, *args, **options):
+        covered = market_stats.refresh(rebuild=options['rebuild'])
+        if covered or options['rebuild']:
+            bump(CARS)  # cached analytics responses were built from the old rollup
+        self.stdout.write(f"✅ Done. Rolled up car_ids: {covered}")
@@ -0,0 +1,320 @@
+"""
+Materialized market-stats rollup for the channel analytics endpoints.
+
+marketplace.market_stats_daily (db/updates/V11) keeps one row per
+(day, brand, model, year, gear_type, color, km_band) with
+
+    cnt         — listings in the cell
+    price_sum   — exact sum, so averages stay exact
+    price_hist  — sparse price histogram {"bucket": count}, a mergeable
+                  percentile sketch
+
+Analytics read these few-thousand pre-aggregated rows instead of re-scanning
+marketplace.cars. Only listings with price > 0 and a created_at are rolled
+up, which is the base filter of every endpoint that reads from here.
+
+Resolution trade-offs versus the raw queries they replace:
+  * time windows are whole UTC days (`day >= since.date()`);
+  * percentiles are interpolated inside a price bucket — ≤$50 error under
+    $10k, ≤$250 under $50k, ≤$1,250 under $300k;
+  * price ranges are applied on bucket edges as `low < price <= high`,
+    so `price BETWEEN 1500 AND 200000` becomes `1500 < price <= 200000`.
+    Edges used by the endpoints (1.5k, 5k, 10k, 20k, 30k, 200k) are all
+    bucket edges, so band counts stay exact.
+
+`refresh()` is incremental: it rolls up only cars above the car_id watermark
+in market_stats_state. car_ids are handed out before the inserting
+transaction commits, so the watermark only moves past ids whose writers
+have all finished: when other writers are in flight, the current
+MAX(car_id) is recorded as pending along with their transaction ids, and
+rolled up by the first refresh that finds all of them gone. Refreshes run
+from the market_stats DAG (`manage.py refresh_market_stats`, every five
+minutes); the analytics reads never write.
+
+UPDATEs and DELETEs of rolled-up cars go through `editing()`, which takes
+the old row out of its cell and puts the new one back. Anything else that
+edits marketplace.cars directly needs `refresh_market_stats --rebuild`.
+"""
+import math
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+STATE_NAME = 'market_stats_daily'
+
+# Mileage bands: 1..8 = 50k km wide up to 400k (400k itself lands in 8),
+# 0 = negative, 9 = over 400k, -1 = unknown.
+KM_BAND_SQL = """
+    CASE WHEN mileage IS NULL THEN -1
+         WHEN mileage < 0 THEN 0
+         WHEN mileage > 400000 THEN 9
+         ELSE LEAST(mileage / 50000 + 1, 8) END
+"""
+KM_VALID = (1, 8)   # mileage BETWEEN 0 AND 400000
+
+# Price buckets, each covering (lo, hi]:
+#   1..100   $100 wide up to $10k
+#   101..180 $500 wide up to $50k
+#   181..280 $2,500 wide up to $300k
+#   281      everything above
+_SEGMENTS = [
+    # (first bucket, lower edge, width, last bucket)
+    (1, 0, 100, 100),
+    (101, 10000, 500, 180),
+    (181, 50000, 2500, 280),
+]
+OVERFLOW_BUCKET = 281
+
+PRICE_BUCKET_SQL = """
+    CASE WHEN price <= 10000  THEN CEIL(price / 100)
+         WHEN price <= 50000  THEN 100 + CEIL((price - 10000) / 500)
+         WHEN price <= 300000 THEN 180 + CEIL((price - 50000) / 2500)
+         ELSE 281 END::int
+"""
+
+
+def price_bucket(price):
+    """Bucket index for a positive price — mirrors PRICE_BUCKET_SQL."""
+    price = float(price)
+    for first, lower, width, last in _SEGMENTS:
+        if price <= lower + (last - first + 1) * width:
+            return first + max(math.ceil((price - lower) / width), 1) - 1
+    return OVERFLOW_BUCKET
+
+
+def bucket_bounds(bucket):
+    """(lo, hi] price range covered by a bucket."""
+    for first, lower, width, last in _SEGMENTS:
+        if bucket <= last:
+            lo = lower + (bucket - first) * width
+            return lo, lo + width
+    return 300000, math.inf
+
+
+def bucket_range(low=0, high=None):
+    """Inclusive bucket span for `low < price <= high`."""
+    lo_bucket = price_bucket(low) + 1 if low > 0 else 1
+    hi_bucket = price_bucket(high) if high is not None else OVERFLOW_BUCKET
+    return lo_bucket, hi_bucket
+
+
+def quantile(hist, q):
+    """PERCENTILE_CONT-style quantile of a {bucket: count} histogram.
+
+    The k listings in a bucket are placed evenly inside it and the result
+    interpolates between neighbouring placements, exactly like
+    PERCENTILE_CONT does between neighbouring prices. The overflow bucket
+    has no upper edge; its listings sit on the lower edge.
+    """
+    positions = []
+    for bucket in sorted(hist):
+        count = hist[bucket]
+        lo, hi = bucket_bounds(bucket)
+        if hi == math.inf:
+            positions.extend([lo] * count)
+        else:
+            positions.extend(lo + (hi - lo) * (j + 0.5) / count for j in range(count))
+    if not positions:
+        return None
+    rank = q * (len(positions) - 1)
+    below = int(rank)
+    above = min(below + 1, len(positions) - 1)
+    return positions[below] + (positions[above] - positions[below]) * (rank - below)
+
+
+_REFRESH_SQL = f"""
+    INSERT INTO marketplace.market_stats_daily AS s
+        (day, brand, model, year, gear_type, color, km_band, cnt, price_sum, price_hist)
+    SELECT day, brand, model, year, gear_type, color, km_band,
+           SUM(n), SUM(total), jsonb_object_agg(bucket, n)
+    FROM (
+        SELECT created_at::date            AS day,
+               brand, model,
+               COALESCE(year, 0)           AS year,
+               COALESCE(gear_type::text, '') AS gear_type,
+               COALESCE(color, '')         AS color,
+               {KM_BAND_SQL}               AS km_band,
+               {PRICE_BUCKET_SQL}          AS bucket,
+               COUNT(*)                    AS n,
+               SUM(price)                  AS total
+        FROM marketplace.cars
+        WHERE car_id > %s AND car_id <= %s
+          AND price > 0 AND created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+    ) per_bucket
+    GROUP BY day, brand, model, year, gear_type, color, km_band
+    ON CONFLICT (day, brand, model, year, gear_type, color, km_band) DO UPDATE SET
+        cnt       = s.cnt + EXCLUDED.cnt,
+        price_sum = s.price_sum + EXCLUDED.price_sum,
+        price_hist = (
+            SELECT jsonb_object_agg(k, n)
+            FROM (
+                SELECT k, SUM(v::int) AS n
+                FROM (SELECT * FROM jsonb_each_text(s.price_hist)
+                      UNION ALL
+                      SELECT * FROM jsonb_each_text(EXCLUDED.price_hist)) AS u(k, v)
+                GROUP BY k
+            ) merged
+        )
+"""
+
+
+_RETRACT_SQL = f"""
+    WITH car AS (
+        SELECT created_at::date              AS day,
+               brand, model,
+               COALESCE(year, 0)             AS year,
+               COALESCE(gear_type::text, '') AS gear_type,
+               COALESCE(color, '')           AS color,
+               {KM_BAND_SQL}                 AS km_band,
+               ({PRICE_BUCKET_SQL})::text    AS bucket,
+               price
+        FROM marketplace.cars
+        WHERE car_id = %s AND price > 0 AND created_at IS NOT NULL
+    )
+    UPDATE marketplace.market_stats_daily AS s SET
+        cnt        = s.cnt - 1,
+        price_sum  = s.price_sum - car.price,
+        price_hist = CASE WHEN (s.price_hist ->> car.bucket)::int > 1
+                          THEN jsonb_set(s.price_hist, ARRAY[car.bucket],
+                                         to_jsonb((s.price_hist ->> car.bucket)::int - 1))
+                          ELSE s.price_hist - car.bucket END
+    FROM car
+    WHERE (s.day, s.brand, s.model, s.year, s.gear_type, s.color, s.km_band)
+        = (car.day, car.brand, car.model, car.year, car.gear_type, car.color, car.km_band)
+    RETURNING s.day, s.brand, s.model, s.year, s.gear_type, s.color, s.km_band, s.cnt
+"""
+
+
+# Other transactions that have written to marketplace.cars and not yet
+# finished: a writer holds an exclusive lock on its own transaction id, and
+# a RowExclusiveLock on every table it wrote to, until it commits or aborts.
+# Open transactions on other tables or databases are not waited for.
+_IN_FLIGHT_SQL = """
+    SELECT DISTINCT xid.transactionid::text::bigint
+    FROM pg_locks AS xid
+    JOIN pg_locks AS tbl ON tbl.pid = xid.pid
+    WHERE xid.locktype = 'transactionid' AND xid.mode = 'ExclusiveLock'
+      AND tbl.locktype = 'relation' AND tbl.mode = 'RowExclusiveLock'
+      AND tbl.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND tbl.relation = 'marketplace.cars'::regclass
+      AND xid.pid <> pg_backend_pid()
+"""
+
+
+def refresh(rebuild=False):
+    """Roll up cars added since the last refresh; returns how many car_ids were covered.
+
+    The watermark row is locked for the duration, so concurrent refreshes
+    never double-count. A plain refresh skips (returns 0) when another one
+    holds the lock; `rebuild=True` waits, truncates and re-aggregates all.
+    The state row is only written when the watermark or the pending id moves.
+    """
+    lock = 'FOR UPDATE' if rebuild else 'FOR UPDATE SKIP LOCKED'
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(
+            "SELECT last_car_id, pending_car_id, pending_xids"
+            f" FROM marketplace.market_stats_state WHERE name = %s {lock}",
+            [STATE_NAME],
+        )
+        row = cur.fetchone()
+        if row is None:
+            return 0
+        done, pending, pending_xids = row
+        start = 0 if rebuild else done
+        if rebuild:
+            cur.execute("TRUNCATE marketplace.market_stats_daily")
+
+        # MAX first, writers second: a car_id at or below `high` that was not
+        # visible to the first statement belongs to a writer that is either
+        # listed by the second or committed in between (and is then visible
+        # to _REFRESH_SQL, which runs later still).
+        cur.execute("SELECT COALESCE(MAX(car_id), 0) FROM marketplace.cars")
+        high = cur.fetchone()[0]
+        cur.execute(_IN_FLIGHT_SQL)
+        in_flight = sorted(xid for (xid,) in cur.fetchall())
+
+        settled = done
+        if not in_flight:
+            settled = max(high, done)
+        elif pending > done and not set(in_flight) & set(pending_xids):
+            settled = pending
+        if settled > start:
+            cur.execute(_REFRESH_SQL, [start, settled])
+        if pending <= settled and high > settled:
+            pending, pending_xids = high, in_flight
+
+        if rebuild or (settled, pending, pending_xids) != row:
+            cur.execute(
+                """
+                UPDATE marketplace.market_stats_state
+                SET last_car_id = %s, pending_car_id = %s, pending_xids = %s::bigint[],
+                    refreshed_at = NOW()
+                WHERE name = %s
+                """,
+                [settled, pending, pending_xids, STATE_NAME],
+            )
+    return max(settled - start, 0)
+
+
+@contextmanager
+def editing(car_id):
+    """Keep the rollup exact across an UPDATE or DELETE of car `car_id`.
+
+        with market_stats.editing(car.car_id):
+            car.delete()
+
+    If the car is already rolled up, its current row is taken out of its
+    cell before the block and whatever row it has after the block (none
+    after a DELETE) is added back, all in one transaction that holds the
+    watermark row, so no refresh runs in between.
+    """
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(
+            "SELECT last_car_id FROM marketplace.market_stats_state WHERE name = %s FOR UPDATE",
+            [STATE_NAME],
+        )
+        row = cur.fetchone()
+        rolled_up = row is not None and car_id <= row[0]
+        if rolled_up:
+            cur.execute(_RETRACT_SQL, [car_id])
+            for *cell, cnt in cur.fetchall():
+                if cnt <= 0:
+                    cur.execute(
+                        """
+                        DELETE FROM marketplace.market_stats_daily
+                        WHERE (day, brand, model, year, gear_type, color, km_band)
+                            = (%s, %s, %s, %s, %s, %s, %s)
+                        """,
+                        cell,
+                    )
+        yield
+        if rolled_up:
+            cur.execute(_REFRESH_SQL, [car_id - 1, car_id])
+
+
+def sketches(group_cols, where, params, low=0, high=None):
+    """Merge price histograms per group, restricted to `low < price <= high`.
+
+    group_cols — rollup columns / expressions to group by (trusted SQL)
+    where      — extra WHERE SQL on the rollup (trusted), `params` for it
+
+    Returns {group tuple: {bucket: count}}.
+    """
+    lo_bucket, hi_bucket = bucket_range(low, high)
+    cols = ''.join(f'{col}, ' for col in group_cols)
+    sql = f"""
+        SELECT {cols}b.key::int AS bucket, SUM(b.value::int) AS n
+        FROM marketplace.market_stats_daily s,
+             jsonb_each_text(s.price_hist) AS b
+        WHERE {where}
+          AND b.key::int BETWEEN %s AND %s
+        GROUP BY {cols}bucket
+    """
+    width = len(group_cols)
+    result = {}
+    with connection.cursor() as cur:
+        cur.execute(sql, [*params, lo_bucket, hi_bucket])
+        for row in cur.fetchall():
+            result.setdefault(tuple(row[:width]), {})[row[width]] = row[width + 1]
+    return result
@@ -151,6 +151,10 @@ class Electronics(models.Model):
     specs = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(null=True, blank=True)
     scraped_at = models.DateTimeField(null=True, blank=True)
+    # Derived at ingest by cars/electronics_labels.py (db/updates/V14)
+    canonical_model = models.CharField(max_length=255, null=True, blank=True)
+    is_damaged = models.BooleanField(null=True, blank=True)
+    price_usd_at_ingest = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
 
     class Meta:
         db_table = 'electronics'
@@ -0,0 +1,105 @@
+"""
+Versioned response cache for read-heavy endpoints.
+
+Summary / analytics responses only change when the scrapers write new rows,
+so they are cached under
+
+    resp:<View>:<generation of each source table>:<hash of normalized params>
+
+Every successful write through the ingest endpoints calls `bump(table)`,
+which advances that table's generation counter. Entries built against the
+old generation are never looked up again and age out of the cache, so there
+is no key scanning and no explicit delete on ingest.
+
+Backend is whatever CACHES['default'] is (settings.py): local memory by
+default, which is per-process — with several gunicorn workers point
+CACHE_BACKEND at a shared store so a bump on one worker is seen by all.
+The cache TIMEOUT still bounds staleness of "last N days" windows that move
+with the clock even when nothing is ingested.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+CARS = 'cars'
+APARTMENTS = 'apartments'
+ELECTRONICS = 'electronics'
+
+
+def _gen_key(table):
+    return f'gen:{table}'
+
+
+def generations(*tables):
+    """Current generation of each table, seeding missing counters.
+
+    Counters are seeded from the clock rather than 1, so a counter lost to
+    eviction or a restart can never come back to a value whose responses
+    are still cached.
+    """
+    keys = [_gen_key(t) for t in tables]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(table):
+    """Invalidate every cached response that reads from `table`."""
+    try:
+        cache.incr(_gen_key(table))
+    except ValueError:
+        cache.set(_gen_key(table), time.time_ns(), timeout=None)
+
+
+def cached_value(name, tables, params, compute):
+    """`compute()` cached under the current generations of `tables`.
+
+    For expensive parts of a response that many distinct requests share
+    (e.g. a total that every page of a listing reports), so they are computed
+    once per data version rather than once per cached response.
+    """
+    gens = '.'.join(str(g) for g in generations(*tables))
+    digest = hashlib.sha1(json.dumps(params, default=str).encode()).hexdigest()
+    key = f'val:{name}:{gens}:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
+
+
+def _params_digest(request, kwargs):
+    params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+    raw = json.dumps([params, sorted(kwargs.items())], default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_response(*tables):
+    """Cache a view's GET responses until one of `tables` is written to.
+
+    Only 200 responses are stored. Sets X-Cache: HIT / MISS.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            gens = '.'.join(str(g) for g in generations(*tables))
+            key = f'resp:{type(self).__name__}:{gens}:{_params_digest(request, kwargs)}'
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -17,3 +17,22 @@ class ElectronicsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Electronics
         fields = '__all__'
+        read_only_fields = ['canonical_model', 'is_damaged', 'price_usd_at_ingest']
+
+
+# Bulk ingest variants: uniqueness of the natural key is resolved by the
+# INSERT ... ON CONFLICT in cars/bulk.py, not by a per-record SELECT.
+
+class CarBulkSerializer(CarSerializer):
+    class Meta(CarSerializer.Meta):
+        extra_kwargs = {'car_ad_id': {'validators': []}}
+
+
+class ApartmentBulkSerializer(ApartmentSerializer):
+    class Meta(ApartmentSerializer.Meta):
+        extra_kwargs = {'ad_id': {'validators': []}}
+
+
+class ElectronicsBulkSerializer(ElectronicsSerializer):
+    class Meta(ElectronicsSerializer.Meta):
+        extra_kwargs = {'ad_id': {'validators': []}}
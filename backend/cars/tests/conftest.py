@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import cache
+from cars import fx
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached responses (and per-process FX rates) must not leak between tests."""
+    cache.clear()
+    fx.clear_cache()
+    yield
+    cache.clear()
+    fx.clear_cache()
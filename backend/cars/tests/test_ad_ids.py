@@ -0,0 +1,45 @@
+import pytest
+from datetime import datetime, timezone
+from rest_framework.test import APIClient
+from cars.models import Car, Electronics
+
+
+def make_car(ad_id, created_at):
+    Car.objects.create(car_ad_id=ad_id, description="Test Car", brand="Chevrolet", model="Spark",
+                       year=2018, price=5000, created_at=created_at)
+
+
+def body_ids(response):
+    return b"".join(response.streaming_content if response.streaming else [response.content]).decode().split()
+
+
+@pytest.mark.django_db
+def test_car_ids_stream_and_since():
+    make_car("111", datetime(2025, 1, 10, tzinfo=timezone.utc))
+    make_car("222", datetime(2025, 3, 1, tzinfo=timezone.utc))
+    Car.objects.create(description="no ad id", brand="Kia", model="Rio", year=2015, price=3000,
+                       created_at=datetime(2025, 3, 2, tzinfo=timezone.utc))
+    client = APIClient()
+
+    response = client.get("/api/cars/ids/")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert sorted(body_ids(response)) == ["111", "222"]
+
+    assert body_ids(client.get("/api/cars/ids/?since=2025-02-01T00:00:00")) == ["222"]
+    assert client.get("/api/cars/ids/?since=yesterday").status_code == 400
+
+
+@pytest.mark.django_db
+def test_unknown_ids_membership_check(django_assert_num_queries):
+    make_car("111", datetime(2025, 1, 10, tzinfo=timezone.utc))
+    Electronics.objects.create(ad_id="e-1", title="iPhone")
+    client = APIClient()
+
+    with django_assert_num_queries(1):
+        response = client.post("/api/cars/ids/", "333\n111\n222\n333\n", content_type="text/plain")
+    assert body_ids(response) == ["333", "222"]
+
+    response = client.post("/api/electronics/ids/", ["e-1", "e-2"], format="json")
+    assert body_ids(response) == ["e-2"]
+    assert body_ids(client.post("/api/cars/ids/", "", content_type="text/plain")) == []
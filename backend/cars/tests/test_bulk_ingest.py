@@ -0,0 +1,53 @@
+import json
+import pytest
+from rest_framework.test import APIClient
+from cars.models import Car, Electronics
+
+
+def car(i, **extra):
+    return {"car_ad_id": f"bulk-{i}", "description": "Test Car", "brand": "Chevrolet",
+            "model": "Cobalt", "year": 2020, "price": 10000 + i,
+            "created_at": "2025-07-01T10:00:00Z", **extra}
+
+
+@pytest.mark.django_db
+def test_car_bulk_single_statement(django_assert_max_num_queries):
+    client = APIClient()
+    client.post("/api/cars/", car(0), format="json")
+
+    batch = [car(0), car(1), car(2), {"car_ad_id": "bulk-bad"}, car(1), car(3, gear_type="XX")]
+    with django_assert_max_num_queries(3):  # savepoint + INSERT + release
+        response = client.post("/api/cars/bulk/", batch, format="json")
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == \
+        ["existing", "created", "created", "error", "existing", "error"]
+    assert (body["created"], body["existing"], body["errors"]) == (2, 2, 2)
+    assert "created_at" in body["results"][3]["errors"]
+    assert Car.objects.filter(car_ad_id__startswith="bulk-").count() == 3
+    assert Car.objects.get(car_ad_id="bulk-2").price == 10002
+
+
+@pytest.mark.django_db
+def test_car_bulk_ndjson_and_bad_bodies():
+    client = APIClient()
+    ndjson = "\n".join(json.dumps(car(i)) for i in range(3)) + "\n"
+    response = client.post("/api/cars/bulk/", ndjson, content_type="application/x-ndjson")
+    assert response.json()["created"] == 3
+
+    assert client.post("/api/cars/bulk/", "{not json", content_type="application/x-ndjson").status_code == 400
+    assert client.post("/api/cars/bulk/", car(9), format="json").status_code == 400
+    assert client.post("/api/cars/bulk/", [1, 2], format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_electronics_bulk_refreshes_existing():
+    client = APIClient()
+    items = [{"ad_id": "e-1", "title": "iPhone 13", "price": 500},
+             {"ad_id": "e-2", "title": "RTX 4070", "price": 600}]
+    assert client.post("/api/electronics/bulk/", items, format="json").json()["created"] == 2
+    assert Electronics.objects.get(ad_id="e-1").scraped_at is None
+
+    again = client.post("/api/electronics/bulk/", items[:1], format="json").json()
+    assert again["results"][0]["status"] == "existing"
+    assert Electronics.objects.get(ad_id="e-1").scraped_at is not None
@@ -0,0 +1,85 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from cars import electronics_labels as labels
+from cars.models import Electronics
+
+
+@pytest.mark.parametrize("category,model,title,specs,expected", [
+    ("macbook", "MacBook Air", "MacBook Air 13", {"chip": "M2"}, "MacBook Air M2"),
+    ("macbook", "MacBook Pro", "Macbook pro m4 max 36/1tb", None, "MacBook Pro M4 Max"),
+    ("macbook", "MacBook Pro", "MacBook Pro 2019 i7", {}, "MacBook Pro (Intel)"),
+    ("macbook", "MacBook M1 PRO", "", None, "MacBook Pro M1"),
+    ("cpu", "Intel Core", "Процессор i5 12400f", None, "Intel Core i5-12400F"),
+    ("cpu", "Intel Core", "Core Ultra 7 265k", None, "Intel Core Ultra 7 265K"),
+    ("cpu", "AMD Ryzen", "Ryzen 5 5600", {"model_id": "5 5600"}, "AMD Ryzen 5 5600"),
+    ("cpu", "Intel Core", "процессор intel", None, None),
+    ("ram", "DDR4 3200", "Kingston", {"capacity_gb": "8"}, "DDR4 8GB"),
+    ("ram", "DDR4 2x8GB", "", None, "DDR4 16GB"),
+    ("gpu", "RTX3060TI", "", None, "RTX 3060 Ti"),
+    ("iphone", "iPhone", "", None, None),
+    ("ipad", " iPad Air 5 ", "", None, "iPad Air 5"),
+    ("gpu", "", "RTX 4070", None, None),
+])
+def test_canonical_model(category, model, title, specs, expected):
+    assert labels.canonical_model(category, model, title, specs) == expected
+
+
+def test_damage_and_price():
+    assert labels.is_damaged("iPhone 13 на ЗАПЧАСТИ")
+    assert labels.is_damaged("Screen broken")
+    assert not labels.is_damaged("iPhone 13 128gb")
+    assert labels.price_usd(6_400_000, "UZS", lambda currency, on: 12800) == 500
+    assert labels.price_usd(500, "USD", lambda currency, on: 1 / 0) == 500
+
+
+def ad(i, model, price, title="", **extra):
+    return {"ad_id": f"el-{i}", "category": "gpu", "model": model, "title": title or model,
+            "price": price, "price_currency": "USD", **extra}
+
+
+@pytest.mark.django_db
+def test_report_and_listings_group_on_ingest_labels(monkeypatch):
+    monkeypatch.setattr("cars.fx.uzs_per", lambda currency, on=None: 12800)
+    client = APIClient()
+    assert client.post("/api/electronics/", ad(0, "RTX3060TI", 300), format="json").status_code == 201
+    created = client.post("/api/electronics/bulk/", [
+        ad(1, "RTX 3060 Ti", 400, canonical_model="forged"),
+        {**ad(2, "rtx 3060ti", 5_120_000), "price_currency": "UZS"},
+        ad(3, "RTX 3060 Ti", 150, title="RTX 3060 Ti сломана"),
+        ad(4, "RTX 3060 Ti", 90, title="RTX 3060 Ti на запчасти"),
+        ad(5, "Видеокарта", 200),
+        ad(6, "RTX 4090", 9000),
+    ], format="json").json()
+    assert created["created"] == 6
+    row = Electronics.objects.get(ad_id="el-2")
+    assert (row.canonical_model, row.is_damaged, row.price_usd_at_ingest) == ("RTX 3060 Ti", False, 400)
+    assert Electronics.objects.get(ad_id="el-1").canonical_model == "RTX 3060 Ti"
+
+    body = client.get("/api/electronics/report/?category=gpu").json()
+    assert body["models"] == [{"model": "RTX 3060 Ti", "cnt": 3, "min_usd": 320, "max_usd": 400, "avg_usd": 367}]
+    assert body["damaged_models"] == [{"model": "RTX 3060 Ti", "cnt": 2, "min_usd": 90, "max_usd": 150}]
+    assert [b["price_usd"] for b in body["broken_listings"]] == [90, 150]
+
+    page = client.get("/api/electronics/listings/?category=gpu&model_label=RTX+3060+Ti").json()
+    assert (page["total"], [x["price_usd"] for x in page["listings"]]) == (3, [300, 400, 400])
+
+
+@pytest.mark.django_db
+def test_backfill_labels_rows_from_before_v14(monkeypatch):
+    monkeypatch.setattr("cars.fx.uzs_per", lambda currency, on=None: 10000)
+    Electronics.objects.create(ad_id="old-1", category="macbook", model="MacBook Air",
+                               title="MacBook Air M1 8/256", price=7_000_000, price_currency="UZS")
+    Electronics.objects.create(ad_id="old-2", category="macbook", model="MacBook Pro",
+                               title="MacBook Pro разбит экран", price=300, price_currency="USD",
+                               canonical_model="stale", is_damaged=False, price_usd_at_ingest=310)
+
+    call_command("backfill_electronics_labels", "--batch-size", "1")
+    first = Electronics.objects.get(ad_id="old-1")
+    assert (first.canonical_model, first.is_damaged, first.price_usd_at_ingest) == ("MacBook Air M1", False, 700)
+    assert Electronics.objects.get(ad_id="old-2").canonical_model == "stale"
+
+    call_command("backfill_electronics_labels", "--all")
+    second = Electronics.objects.get(ad_id="old-2")
+    assert (second.canonical_model, second.is_damaged, second.price_usd_at_ingest) == \
+        ("MacBook Pro (Intel)", True, 310)
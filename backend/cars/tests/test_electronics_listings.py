@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from cars.models import Electronics
+
+URL = "/api/electronics/listings/?category=gpu&model_label=RTX+4060"
+
+
+def add(i, price, label="RTX 4060", damaged=False):
+    Electronics.objects.create(ad_id=f"l-{i:05d}", category="gpu", model=label, title=label,
+                               price=price, price_currency="USD", canonical_model=label,
+                               is_damaged=damaged, price_usd_at_ingest=price)
+
+
+@pytest.mark.django_db
+def test_cursor_walks_every_listing_once(django_assert_num_queries):
+    for i in range(12):
+        add(i, 200 + i // 3 * 10)  # three listings per price: ad_id breaks the ties
+    add(90, 250, damaged=True)
+    add(91, 9999)
+    add(92, 250, label="RTX 4070")
+    client = APIClient()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        with django_assert_num_queries(1 if cursor else 2):  # the total is counted once
+            body = client.get(URL + (f"&cursor={cursor}" if cursor else "")).json()
+        pages += 1
+        assert (body["total"], body["pages"]) == (12, 3)
+        seen += [(x["price_usd"], x["title"]) for x in body["listings"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert pages == 3
+    assert [p for p, _ in seen] == sorted(200 + i // 3 * 10 for i in range(12))
+
+    assert client.get(URL + "&cursor=garbage").status_code == 400
+
+
+@pytest.mark.django_db
+def test_total_refreshes_after_ingest():
+    add(0, 300)
+    client = APIClient()
+    assert client.get(URL).json()["total"] == 1
+    client.post("/api/electronics/", {"ad_id": "l-new", "category": "gpu", "model": "RTX 4060",
+                                      "title": "RTX 4060", "price": 310, "price_currency": "USD"},
+                format="json")
+    assert client.get(URL).json()["total"] == 2
+
+
+@pytest.mark.django_db
+def test_deep_page_is_an_index_range_scan():
+    with connection.cursor() as cur:
+        cur.execute("""
+            INSERT INTO marketplace.electronics
+                (ad_id, category, model, title, price, price_currency,
+                 canonical_model, is_damaged, price_usd_at_ingest)
+            SELECT 'seed-' || i, 'gpu', 'GPU', 'seed', p, 'USD',
+                   'RTX ' || (3000 + mod(i, 40) * 10), mod(i, 17) = 0, p
+            FROM generate_series(1, 30000) AS i, LATERAL (SELECT 50 + mod(i * 7919, 3000) AS p) AS price
+        """)
+        cur.execute("ANALYZE marketplace.electronics")
+    client = APIClient()
+    first = client.get("/api/electronics/listings/?category=gpu&model_label=RTX+3200").json()
+    url = f"/api/electronics/listings/?category=gpu&model_label=RTX+3200&cursor={first['next_cursor']}"
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.get(url).status_code == 200
+    (query,) = ctx.captured_queries
+    with connection.cursor() as cur:
+        cur.execute("EXPLAIN (FORMAT JSON) " + query["sql"])
+        plan = cur.fetchone()[0]
+    plan = json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+    assert "idx_electronics_listings_keyset" in plan
+    assert "Seq Scan" not in plan and "Sort" not in plan
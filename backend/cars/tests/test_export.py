@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from cars import export
+from cars.models import Car, Electronics
+from cars.serializers import CarSerializer
+
+
+def make_cars(n=5):
+    for i in range(n):
+        Car.objects.create(car_ad_id=f"x-{i}", description=f"Car {i}", brand="Chevrolet",
+                           model="Cobalt", year=2020, price=10000 + i, mileage=1000 * i,
+                           created_at=datetime(2025, 7, 1 + i, 12, tzinfo=timezone.utc))
+
+
+def body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_ndjson_and_csv_with_window_and_projection():
+    make_cars()
+    client = APIClient()
+    url = "/api/cars/export/?since=2025-07-02&until=2025-07-04T12:00:00&fields=car_ad_id,price,created_at"
+    lines = body(client.get(url)).decode().splitlines()
+    assert [json.loads(l) for l in lines] == [
+        {"car_ad_id": "x-1", "price": "10001.00", "created_at": "2025-07-02T12:00:00"},
+        {"car_ad_id": "x-2", "price": "10002.00", "created_at": "2025-07-03T12:00:00"},
+    ]
+
+    response = client.get(url + "&output=csv")
+    assert response["Content-Disposition"] == 'attachment; filename="cars.csv"'
+    rows = list(csv.reader(io.StringIO(body(response).decode())))
+    assert rows == [["car_ad_id", "price", "created_at"],
+                    ["x-1", "10001.00", "2025-07-02T12:00:00"],
+                    ["x-2", "10002.00", "2025-07-03T12:00:00"]]
+
+    assert client.get("/api/cars/export/?output=xml").status_code == 400
+    assert client.get("/api/cars/export/?fields=price,secret").status_code == 400
+    assert client.get("/api/cars/export/?since=yesterday").status_code == 400
+
+
+@pytest.mark.django_db
+def test_arrow_and_parquet_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    make_cars(3)
+    Electronics.objects.create(ad_id="e-1", category="gpu", title="RTX", images=["a", "b"],
+                               specs={"memory_gb": 8}, price=300)
+    client = APIClient()
+
+    table = pq.read_table(io.BytesIO(body(client.get("/api/cars/export/?output=parquet"))))
+    assert table.num_rows == 3
+    assert table.schema.field("price").type == pa.decimal128(10, 2)
+    assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert table.column("car_ad_id").to_pylist() == ["x-0", "x-1", "x-2"]
+
+    reader = pa.ipc.open_stream(body(client.get("/api/electronics/export/?output=arrow&fields=ad_id,images,specs")))
+    assert reader.read_all().to_pylist() == [{"ad_id": "e-1", "images": ["a", "b"], "specs": '{"memory_gb": 8}'}]
+
+
+@pytest.mark.django_db
+def test_rows_stream_in_chunks_from_a_server_side_cursor():
+    pytest.importorskip("pyarrow")
+    make_cars(5)
+    fields = [Car._meta.get_field(n) for n in ("car_id", "price")]
+    for output in ("ndjson", "csv", "parquet"):
+        with CaptureQueriesContext(connection) as ctx:
+            parts = list(export.stream(output, Car.objects.order_by("pk"), fields, chunk_size=2))
+        assert ctx.captured_queries[0]["sql"].startswith("DECLARE")
+        assert len(parts) >= 3  # 2 + 2 + 1 rows, never the whole table at once
+
+
+@pytest.mark.django_db
+def test_car_list_streams_the_same_json():
+    make_cars(3)
+    response = APIClient().get("/api/cars/")
+    assert response.streaming
+    expected = CarSerializer(Car.objects.order_by("car_id"), many=True).data
+    assert json.loads(body(response)) == json.loads(json.dumps(expected, default=str))
@@ -0,0 +1,72 @@
+import pytest
+from datetime import timedelta
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.facets import facet_counts
+from cars.models import Car
+
+
+def make_cars():
+    now = timezone.now()
+    specs = [
+        # brand, model, year, price, mileage, fuel, gear, color, days_ago
+        ("Chevrolet", "Cobalt",  2021, 12000, 40000,  "Gasoline", "AT", "white", 0),
+        ("Chevrolet", "Cobalt",  2019, 9500,  90000,  "Gasoline", "MT", "white", 2),
+        ("Chevrolet", "Lacetti", 2012, 7000,  160000, "Gas",      "MT", "black", 5),
+        ("Chevrolet", "Spark",   2016, 4500,  210000, None,       None, "silver", 20),
+        ("BYD",       "Song",    2024, 30000, 5000,   "Electric", "AT", "white", 1),
+        ("BYD",       "Song",    2023, 60000, 12000,  "Hybrid",   "AT", None,    40),
+    ]
+    for i, (brand, model, year, price, km, fuel, gear, color, days) in enumerate(specs):
+        Car.objects.create(
+            car_ad_id=f"facet-{i}", description="Test Car", brand=brand, model=model,
+            year=year, price=price, mileage=km, fuel_type=fuel, gear_type=gear,
+            color=color, created_at=now - timedelta(days=days),
+        )
+
+
+@pytest.mark.django_db
+def test_facet_counts_single_query(django_assert_num_queries):
+    make_cars()
+    bands = {"cheap": Q(price__lte=5000), "recent": Q(created_at__gte=timezone.now() - timedelta(days=3))}
+    with django_assert_num_queries(1):
+        groups, band_counts, total = facet_counts(Car.objects.all(), ["brand", "fuel_type", "year"], bands)
+
+    assert total == 6
+    assert groups["brand"] == {"Chevrolet": 4, "BYD": 2}
+    assert groups["fuel_type"] == {"Gasoline": 2, "Gas": 1, None: 1, "Electric": 1, "Hybrid": 1}
+    assert groups["year"][2021] == 1
+    assert band_counts == {"cheap": 1, "recent": 3}
+
+
+@pytest.mark.django_db
+def test_facet_counts_match_per_field_queries():
+    make_cars()
+    qs = Car.objects.filter(brand="Chevrolet")
+    groups, _, total = facet_counts(qs, ["model", "gear_type", "color"])
+    assert total == qs.count()
+    for field in ["model", "gear_type", "color"]:
+        expected = {r[field]: r["n"] for r in qs.values(field).annotate(n=Count("pk"))}
+        assert groups[field] == expected
+
+
+@pytest.mark.django_db
+def test_filtered_list_filter_counts(django_assert_max_num_queries):
+    make_cars()
+    client = APIClient()
+    with django_assert_max_num_queries(4):
+        response = client.get("/api/cars/filtered-list/?brand=Chevrolet")
+    assert response.status_code == 200
+    filters = response.json()["filters"]
+
+    price = {o["value"]: o["count"] for o in filters["price"]["options"]}
+    assert price == {"0-5000": 1, "5000-10000": 2, "10000-20000": 1, "20000-50000": 0, "50000-": 0}
+    mileage = {o["value"]: o["count"] for o in filters["mileage"]["options"]}
+    assert mileage["200000-"] == 1
+    fuel = {o["value"]: o["count"] for o in filters["fuel_type"]["options"]}
+    assert fuel["Gasoline"] == 2 and fuel["None"] == 1
+    year = {o["value"]: o["count"] for o in filters["year"]["options"]}
+    assert year["2021"] == 1 and year["2015-2019"] == 2 and year["2010-2014"] == 1
+    created = [o["count"] for o in filters["created_at"]["options"]]
+    assert created == [1, 2, 3, 4]
@@ -0,0 +1,93 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.models import Car
+
+
+def make_cars(n=7):
+    created = timezone.now().replace(microsecond=0)
+    for i in range(n):
+        Car.objects.create(
+            car_ad_id=f"page-{i}", description=f"Car {i}", brand="Chevrolet", model="Cobalt",
+            year=2020, price=10000 + i, mileage=50000,
+            # two rows share each timestamp so the car_id tie-breaker is exercised
+            created_at=created - timedelta(hours=i // 2),
+        )
+
+
+@pytest.mark.django_db
+def test_cursor_walks_every_row_once():
+    make_cars()
+    client = APIClient()
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = "/api/cars/filtered-list/?page_size=3&fields=description,price"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = client.get(url).json()
+        pages += 1
+        assert all(set(row) == {"description", "price"} for row in data["results"])
+        assert (data["filters"] is None) == bool(cursor)
+        seen += [row["description"] for row in data["results"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert pages == 3
+    # newest first; rows sharing a timestamp come back in car_id DESC order
+    assert seen == ["Car 1", "Car 0", "Car 3", "Car 2", "Car 5", "Car 4", "Car 6"]
+    assert len(seen) == len(set(seen)) == 7
+
+
+@pytest.mark.django_db
+def test_cursor_continues_into_undated_rows():
+    make_cars(3)
+    for i in (3, 4):
+        Car.objects.create(car_ad_id=f"page-{i}", description=f"Car {i}", brand="Chevrolet",
+                           model="Cobalt", year=2020, price=10000, mileage=50000, created_at=None)
+    Car.objects.filter(created_at__isnull=True).update(created_at=None)  # bypass the column default
+    client = APIClient()
+    seen, cursor = [], None
+    while True:
+        url = "/api/cars/filtered-list/?page_size=2&fields=description"
+        data = client.get(url + (f"&cursor={cursor}" if cursor else "")).json()
+        seen += [row["description"] for row in data["results"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    # the second page ends the dated rows and starts the undated ones
+    assert seen == ["Car 1", "Car 0", "Car 2", "Car 4", "Car 3"]
+
+
+@pytest.mark.django_db
+def test_default_projection_and_page_size_cap():
+    make_cars(3)
+    client = APIClient()
+    data = client.get("/api/cars/filtered-list/?page_size=100000").json()
+    assert data["page_size"] == 200
+    assert set(data["results"][0]) == {
+        "description", "price", "location", "created_at", "year", "mileage", "reference_url"}
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_bad_fields_and_cursor_rejected():
+    client = APIClient()
+    assert client.get("/api/cars/filtered-list/?fields=owner_tel_number").status_code == 400
+    assert client.get("/api/cars/filtered-list/?cursor=garbage").status_code == 400
+
+
+@pytest.mark.django_db
+def test_summary_scanned_once_per_data_version(monkeypatch):
+    from cars import response_cache, views
+    make_cars(5)
+    calls = []
+    summary = views.filters_summary
+    monkeypatch.setattr(views, "filters_summary", lambda: calls.append(1) or summary())
+    client = APIClient()
+    cursor = client.get("/api/cars/filtered-list/?page_size=2").json()["next_cursor"]
+    client.get(f"/api/cars/filtered-list/?page_size=2&cursor={cursor}")
+    assert len(calls) == 1
+    response_cache.bump(response_cache.CARS)
+    client.get("/api/cars/filtered-list/?page_size=2")
+    assert len(calls) == 2
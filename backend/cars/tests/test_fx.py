@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.request
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+from cars import fx
+from cars.models import Electronics
+
+TODAY = date.today()
+
+
+class CBUStub(BaseHTTPRequestHandler):
+    """Serves /USD/ (today) and /USD/<YYYY-MM-DD>/ like the CBU archive:
+    the rate for day d is 12000 + d.day; one day in the past always fails."""
+    requests = []
+    broken = TODAY - timedelta(days=2)
+
+    def do_GET(self):
+        CBUStub.requests.append(self.path)
+        parts = [p for p in self.path.split('/') if p]
+        day = date.fromisoformat(parts[1]) if len(parts) > 1 else TODAY
+        if day == self.broken:
+            self.send_response(502)
+            self.end_headers()
+            return
+        body = json.dumps([{"Ccy": parts[0], "Rate": f"{12000 + day.day}.50",
+                            "Date": day.strftime("%d.%m.%Y")}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cbu(settings):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CBUStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.FX_SOURCE_URL = f"http://127.0.0.1:{server.server_port}/"
+    CBUStub.requests = []
+    yield CBUStub
+    server.shutdown()
+
+
+def rates():
+    with connection.cursor() as cur:
+        cur.execute("SELECT rate_date, rate FROM marketplace.fx_rates ORDER BY rate_date")
+        return {d: float(r) for d, r in cur.fetchall()}
+
+
+@pytest.mark.django_db
+def test_refresh_backfills_missing_days_and_skips_failures(cbu):
+    call_command("refresh_fx_rates", "--days", "4")
+    assert rates() == {TODAY - timedelta(days=n): 12000 + (TODAY - timedelta(days=n)).day + 0.5
+                       for n in (0, 1, 3)}
+
+    cbu.requests = []
+    call_command("refresh_fx_rates", "--days", "4")
+    assert cbu.requests == ["/USD/", f"/USD/{cbu.broken.isoformat()}/"]  # only what is missing
+
+
+@pytest.mark.django_db
+def test_rate_lookup_is_historical_cached_and_never_fetches(cbu, monkeypatch, django_assert_num_queries):
+    assert fx.uzs_per("USD") == fx.DEFAULT_UZS_PER_USD  # nothing refreshed yet
+    fx.refresh(days=4)
+
+    def offline(*args, **kwargs):
+        raise AssertionError("request path must not call the CBU")
+    monkeypatch.setattr(urllib.request, "urlopen", offline)
+
+    today, broken = TODAY, cbu.broken
+    assert fx.uzs_per("USD") == 12000 + today.day + 0.5
+    assert fx.uzs_per("USD", on=broken) == 12000 + (broken - timedelta(days=1)).day + 0.5
+    assert fx.uzs_per("USD", on=today - timedelta(days=400)) == rates()[min(rates())]
+    with django_assert_num_queries(0):
+        fx.uzs_per("USD")
+        fx.uzs_per("USD", on=broken)
+
+    # ingest converts at the listing's own date
+    listed = today - timedelta(days=1)
+    rate = 12000 + listed.day + 0.5
+    APIClient().post("/api/electronics/", {
+        "ad_id": "fx-1", "category": "iphone", "model": "iPhone 13", "title": "iPhone 13",
+        "price": rate * 400, "price_currency": "UZS", "created_at": f"{listed.isoformat()}T09:00:00Z",
+    }, format="json")
+    assert Electronics.objects.get(ad_id="fx-1").price_usd_at_ingest == 400
@@ -0,0 +1,209 @@
+import json
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars import market_stats, response_cache
+from cars.models import Car
+
+
+def make_car(i, price, brand="Chevrolet", model="Spark", gear="MT", color="white",
+             mileage=50000, year=2018, days_ago=1):
+    return Car.objects.create(
+        car_ad_id=f"stats-{i}", description="Test Car", brand=brand, model=model,
+        year=year, price=price, mileage=mileage, gear_type=gear, color=color,
+        created_at=timezone.now() - timedelta(days=days_ago),
+    )
+
+
+def rollup_totals():
+    with connection.cursor() as cur:
+        cur.execute("SELECT COALESCE(SUM(cnt), 0), COALESCE(SUM(price_sum), 0) "
+                    "FROM marketplace.market_stats_daily")
+        return cur.fetchone()
+
+
+def test_price_bucket_edges():
+    assert market_stats.price_bucket(100) == 1
+    assert market_stats.price_bucket(100.01) == 2
+    assert market_stats.price_bucket(10000) == 100
+    assert market_stats.price_bucket(10000.5) == 101
+    assert market_stats.price_bucket(300000) == 280
+    assert market_stats.price_bucket(300001) == market_stats.OVERFLOW_BUCKET
+    for bucket in (1, 57, 100, 101, 180, 181, 280):
+        lo, hi = market_stats.bucket_bounds(bucket)
+        assert market_stats.price_bucket(hi) == bucket
+        assert market_stats.price_bucket(lo + 0.01) == bucket
+
+
+@pytest.mark.django_db
+def test_refresh_is_incremental():
+    for i, price in enumerate([4000, 5000, 5200]):
+        make_car(i, price)
+    make_car(3, 0)  # price 0 never enters the rollup
+
+    market_stats.refresh()
+    assert rollup_totals() == (3, 14200)
+    assert market_stats.refresh() == 0
+    assert rollup_totals() == (3, 14200)
+
+    make_car(4, 5150)  # same cell as 5200 → histograms merge
+    market_stats.refresh()
+    assert rollup_totals() == (4, 19350)
+    with connection.cursor() as cur:
+        cur.execute("SELECT price_hist FROM marketplace.market_stats_daily")
+        hist = cur.fetchone()[0]
+    assert json.loads(hist) == {"40": 1, "50": 1, "52": 2}
+
+    market_stats.refresh(rebuild=True)
+    assert rollup_totals() == (4, 19350)
+
+
+@pytest.mark.django_db
+def test_brand_ranking_and_breadth_match_raw():
+    prices = [4800, 5000, 5000, 7300, 10000, 12500, 21000, 30000, 45000]
+    for i, price in enumerate(prices):
+        make_car(i, price, brand="BYD" if price > 20000 else "Chevrolet")
+    make_car(100, 9000, days_ago=10)  # previous week
+    market_stats.refresh()
+
+    client = APIClient()
+    brands = {b["brand"]: b for b in client.get("/api/cars/analytics/brand-ranking/").json()["brands"]}
+    assert brands["Chevrolet"]["count"] == 6
+    assert brands["Chevrolet"]["avg_price"] == round(sum(p for p in prices if p <= 20000) / 6)
+    assert brands["Chevrolet"]["prev_count"] == 1
+    assert brands["BYD"]["prev_count"] == 0 and brands["BYD"]["pct_change"] is None
+
+    bands = {b["label"]: b["count"] for b in client.get("/api/cars/analytics/market-breadth/").json()["bands"]}
+    assert bands == {"Under $5k": 3, "$5k-$10k": 2, "$10k-$20k": 1, "$20k-$30k": 2, "Over $30k": 1}
+
+
+@pytest.mark.django_db
+def test_gear_price_split_percentiles_within_bucket():
+    at_prices = [5200, 5450, 5600, 5900, 6100, 6800, 7400]
+    mt_prices = [3900, 4100, 4300, 4450]
+    for i, price in enumerate(at_prices):
+        make_car(i, price, gear="AT")
+    for i, price in enumerate(mt_prices):
+        make_car(50 + i, price, gear="MT")
+    make_car(90, 1200, gear="MT")                    # junk down-payment price
+    make_car(91, 4000, gear="MT", mileage=500000)    # mileage out of range
+    make_car(92, 4000, gear="CVT")                   # fewer than 3 listings
+    market_stats.refresh()
+
+    response = APIClient().get("/api/cars/analytics/gear-price-split/?brand=Chevrolet&model=Spark")
+    gears = response.json()["gears"]
+    assert [g["gear"] for g in gears] == ["MT", "AT"]
+
+    with connection.cursor() as cur:
+        for g in gears:
+            cur.execute("""
+                SELECT COUNT(*),
+                       PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price),
+                       PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY price),
+                       PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY price)
+                FROM marketplace.cars
+                WHERE gear_type = %s AND price BETWEEN 1500 AND 200000
+                  AND mileage BETWEEN 0 AND 400000
+            """, [g["gear"]])
+            count, median, low, high = cur.fetchone()
+            assert g["count"] == count
+            assert abs(g["median"] - median) <= 100
+            assert abs(g["low"] - low) <= 100
+            assert abs(g["high"] - high) <= 100
+
+
+def state():
+    with connection.cursor() as cur:
+        cur.execute("SELECT last_car_id, pending_car_id, refreshed_at FROM marketplace.market_stats_state")
+        return cur.fetchone()
+
+
+@pytest.fixture
+def other():
+    """A second connection, for transactions running beside the test's."""
+    import psycopg2
+    settings = connection.settings_dict
+    conn = psycopg2.connect(dbname=settings["NAME"], user=settings["USER"],
+                            password=settings["PASSWORD"], host=settings["HOST"],
+                            port=settings["PORT"] or None)
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM marketplace.cars WHERE car_ad_id = 'stats-slow'")
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.django_db
+def test_refresh_waits_for_lower_car_id_still_in_flight(other):
+    with other.cursor() as cur:
+        # takes the lower car_id, commits only after our refresh
+        cur.execute("""
+            INSERT INTO marketplace.cars (car_ad_id, description, brand, model, year, price,
+                                          mileage, gear_type, color, created_at)
+            VALUES ('stats-slow', 'Test Car', 'Chevrolet', 'Spark', 2018, 6000,
+                    50000, 'MT', 'white', NOW() - INTERVAL '1 day')
+        """)
+    fast = make_car(1, 4000)
+
+    assert market_stats.refresh() == 0
+    assert rollup_totals() == (0, 0)
+    assert state()[:2] == (0, fast.car_id)
+
+    other.commit()
+    assert market_stats.refresh() == fast.car_id
+    assert rollup_totals() == (2, 10000)
+
+
+@pytest.mark.django_db
+def test_refresh_ignores_transactions_on_other_tables(other):
+    with other.cursor() as cur:
+        # open, holding an xid, but never touching marketplace.cars
+        cur.execute("CREATE TEMP TABLE unrelated (x int)")
+        cur.execute("INSERT INTO unrelated VALUES (1)")
+    car = make_car(1, 4000)
+
+    assert market_stats.refresh() == car.car_id
+    assert rollup_totals() == (1, 4000)
+    assert state()[:2] == (car.car_id, 0)
+
+
+@pytest.mark.django_db
+def test_refresh_without_new_cars_does_not_write():
+    make_car(1, 4000)
+    market_stats.refresh()
+    before = state()
+    assert market_stats.refresh() == 0
+    assert state() == before
+
+
+@pytest.mark.django_db
+def test_detail_put_and_delete_keep_rollup_exact():
+    cars = [make_car(i, price) for i, price in enumerate([4000, 5200, 5150])]
+    market_stats.refresh()
+    client = APIClient()
+
+    data = client.get(f"/api/cars/{cars[1].car_id}/").json()
+    data.update(price=9000, color="black")
+    assert client.put(f"/api/cars/{cars[1].car_id}/", data, format="json").status_code == 200
+    assert client.delete(f"/api/cars/{cars[0].car_id}/").status_code == 204
+    assert rollup_totals() == (2, 14150)
+
+    market_stats.refresh(rebuild=True)
+    assert rollup_totals() == (2, 14150)
+    with connection.cursor() as cur:
+        cur.execute("SELECT color, cnt, price_hist FROM marketplace.market_stats_daily ORDER BY color")
+        assert [(c, n, json.loads(h)) for c, n, h in cur.fetchall()] == [
+            ("black", 1, {"90": 1}), ("white", 1, {"52": 1})]
+
+
+@pytest.mark.django_db
+def test_refresh_command_invalidates_cached_analytics():
+    make_car(1, 4000)
+    before = response_cache.generations(response_cache.CARS)
+    call_command("refresh_market_stats")
+    assert rollup_totals() == (1, 4000)
+    assert response_cache.generations(response_cache.CARS) != before
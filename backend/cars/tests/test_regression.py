@@ -0,0 +1,51 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.models import Car
+
+
+def add_line(brand, model, n, intercept, slope, days_ago=10):
+    """n listings exactly on price = intercept + slope * mileage."""
+    for i in range(n):
+        km = 20000 + i * 5000
+        Car.objects.create(description="Test Car", brand=brand, model=model, year=2019,
+                           price=intercept + slope * km, mileage=km,
+                           created_at=timezone.now() - timedelta(days=days_ago))
+
+
+@pytest.mark.django_db
+def test_mileage_depreciation_any_models_one_query(django_assert_num_queries):
+    add_line("Chevrolet", "Cobalt", 20, 15000, -0.04)
+    add_line("Kia", "K5", 16, 30000, -0.08)
+    add_line("Kia", "Rio", 5, 9000, -0.02)  # below MIN_LISTINGS
+    client = APIClient()
+
+    with django_assert_num_queries(1):
+        body = client.get("/api/cars/analytics/mileage-depreciation/"
+                          "?models=Chevrolet:Cobalt,Kia:K5,Kia:Rio").json()
+    assert [(m['model'], m['price_per_10k_km'], m['intercept'], m['r2'], m['count'])
+            for m in body['models']] == [("K5", -800, 30000, 1.0, 16), ("Cobalt", -400, 15000, 1.0, 20)]
+
+    assert client.get("/api/cars/analytics/mileage-depreciation/?models=Kia").status_code == 400
+
+
+@pytest.mark.django_db
+def test_price_history_hedonic_per_model(django_assert_num_queries):
+    add_line("Chevrolet", "Cobalt", 12, 15000, -0.04)
+    add_line("Kia", "K5", 4, 30000, -0.08)  # too few for a slope
+    client = APIClient()
+
+    single = client.get("/api/cars/price-history/?brand=Chevrolet&model=Cobalt&mileage=50000").json()
+    assert single["pooled_slope"] == -0.04
+    assert (single["pooled_intercept"], single["r2"]) == (15000, 1.0)
+    assert single["data"][0]["price_at_mileage"] == 13000
+
+    with django_assert_num_queries(2):
+        body = client.get("/api/cars/price-history/?models=Chevrolet:Cobalt,Kia:K5&mileage=50000").json()
+    cobalt, k5 = body["models"]
+    assert {k: v for k, v in cobalt.items() if k not in ("brand", "model")} == single
+    assert (k5["model"], k5["pooled_slope"], k5["r2"], k5["data"][0]["count"]) == ("K5", 0.0, None, 4)
+
+    plain = client.get("/api/cars/price-history/?models=Kia:K5").json()
+    assert plain["models"][0]["data"][0]["avg_price"] == round(30000 - 0.08 * 27500)
@@ -0,0 +1,58 @@
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.models import Car
+
+
+def car_payload(i, brand="Chevrolet"):
+    return {
+        "car_ad_id": f"cache-{i}", "description": "Test Car", "brand": brand,
+        "model": "Cobalt", "year": 2020, "price": 10000, "fuel_type": "Gasoline",
+        "created_at": "2025-07-01T10:00:00Z",
+    }
+
+
+@pytest.mark.django_db
+def test_repeat_requests_skip_database(django_assert_num_queries):
+    client = APIClient()
+    client.post("/api/cars/", car_payload(1), format="json")
+
+    first = client.get("/api/cars/brand-models/?b=1&a=2")
+    assert first["X-Cache"] == "MISS"
+    with django_assert_num_queries(0):
+        again = client.get("/api/cars/brand-models/?a=2&b=1")  # param order is normalized
+    assert again["X-Cache"] == "HIT"
+    assert again.json() == first.json() == {"Chevrolet": ["Cobalt"]}
+
+    assert client.get("/api/cars/brand-models/?a=3")["X-Cache"] == "MISS"
+
+
+@pytest.mark.django_db
+def test_ingest_bumps_generation():
+    client = APIClient()
+    client.post("/api/cars/", car_payload(1), format="json")
+    assert client.get("/api/cars/fuel-type-summary/").json() == {"Gasoline": 1}
+
+    # a direct ORM write is invisible to the cache ...
+    Car.objects.create(car_ad_id="cache-orm", description="x", brand="BYD", model="Song",
+                       year=2024, price=30000, created_at=timezone.now())
+    assert client.get("/api/cars/fuel-type-summary/")["X-Cache"] == "HIT"
+
+    # ... an ingest POST invalidates every car response
+    assert client.post("/api/cars/", car_payload(2, "Kia"), format="json").status_code == 201
+    response = client.get("/api/cars/fuel-type-summary/")
+    assert response["X-Cache"] == "MISS"
+    assert response.json() == {"Gasoline": 2, "None": 1}
+
+    # a rejected or duplicate post leaves the cache alone
+    client.post("/api/cars/", car_payload(2, "Kia"), format="json")
+    client.post("/api/cars/", {"car_ad_id": "bad"}, format="json")
+    assert client.get("/api/cars/fuel-type-summary/")["X-Cache"] == "HIT"
+
+
+@pytest.mark.django_db
+def test_other_tables_do_not_invalidate_cars():
+    client = APIClient()
+    client.get("/api/cars/brand-models/")
+    client.post("/api/electronics/", {"ad_id": "e-1", "title": "iPhone"}, format="json")
+    assert client.get("/api/cars/brand-models/")["X-Cache"] == "HIT"
@@ -0,0 +1,44 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.models import Car
+
+URL = "/api/cars/smart-price/?brand=Chevrolet&model=Cobalt&year=2020&gear_type=AT&color=white&mileage={}"
+
+
+def add(n, price, mileage, days_ago=5, gear="AT", color="white", year=2020):
+    for i in range(n):
+        Car.objects.create(description="Test Car", brand="Chevrolet", model="Cobalt", year=year,
+                           price=price + i * 100, mileage=mileage, gear_type=gear, color=color,
+                           created_at=timezone.now() - timedelta(days=days_ago))
+
+
+@pytest.mark.django_db
+def test_first_qualifying_tier_in_one_query(django_assert_num_queries):
+    add(3, 10000, 80000)                          # exact, 30d: too few
+    add(2, 11000, 80000, days_ago=60)             # exact, 90d: 5 → wins
+    add(4, 9000, 80000, color="black")            # only counts from "any color"
+    add(3, 500, 80000)                            # junk prices, never counted
+    with django_assert_num_queries(1):
+        body = APIClient().get(URL.format(80000)).json()
+    assert body == {
+        "price": 10200, "avg": 10480, "min": 10000, "max": 11100,
+        "source": "market_90d", "count": 5, "period": "last 90 days", "match": "exact",
+        "mileage_band": "52,000–108,000 km", "mileage_low": 52000, "mileage_high": 108000,
+    }
+
+
+@pytest.mark.django_db
+def test_relaxes_to_any_gear_then_envelope():
+    add(3, 12000, 100000, gear="MT", color="black")
+    body = APIClient().get(URL.format(100000)).json()
+    assert (body["match"], body["count"], body["price"]) == ("any color/gear", 3, 12100)
+
+    add(2, 20000, 100000, year=2020, days_ago=400)
+    body = APIClient().get(URL.format(10000)).json()  # nothing within ±100% of 10k km
+    assert body == {
+        "price": None, "source": "insufficient_data", "count": 5,
+        "mileage_low": 7500, "mileage_high": 12500,
+        "envelope_min": 12000, "envelope_max": 20100, "envelope_median": 12200,
+    }
@@ -0,0 +1,59 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cars.models import Car
+
+
+def make_cars():
+    now = timezone.now()
+    n = 0
+
+    def add(brand, model, price, days_ago):
+        nonlocal n
+        n += 1
+        Car.objects.create(
+            car_ad_id=f"digest-{n}", description="Test Car", brand=brand, model=model,
+            year=2020, price=price, created_at=now - timedelta(days=days_ago),
+        )
+
+    # Chevrolet: 6 models this week, Cobalt the most listed
+    for price in [9000, 10000, 11000, 12000, 13000]:
+        add("Chevrolet", "Cobalt", price, 1)
+    for i, model in enumerate(["Spark", "Nexia", "Lacetti", "Malibu", "Onix"]):
+        for _ in range(4 - i // 2):
+            add("Chevrolet", model, 8000 + i * 1000, 2)
+    # a dozen small brands, only the top 10 make the digest
+    for i in range(12):
+        for _ in range(1 + (i < 9)):
+            add(f"Brand{i:02d}", "X", 20000, 3)
+    # year-ago window for Cobalt
+    add("Chevrolet", "Cobalt", 10000, 350)
+    add("Chevrolet", "Cobalt", 8000, 360)
+    # outside any window / junk price
+    add("Chevrolet", "Cobalt", 50000, 100)
+    add("Chevrolet", "Cobalt", 0, 1)
+
+
+@pytest.mark.django_db
+def test_weekly_digest_is_set_based(django_assert_num_queries):
+    make_cars()
+    client = APIClient()
+    with django_assert_num_queries(3):
+        response = client.get("/api/cars/analytics/weekly-digest/")
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["total_listings"] == 5 + 16 + 21 + 1
+    assert len(data["top_brands"]) == 10
+    chevy = data["top_brands"][0]
+    assert chevy["brand"] == "Chevrolet" and chevy["count"] == 21
+    assert len(chevy["models"]) == 5
+
+    cobalt = chevy["models"][0]
+    assert cobalt["model"] == "Cobalt" and cobalt["count"] == 5
+    assert cobalt["avg_price"] == 11000
+    assert (cobalt["min_price"], cobalt["max_price"]) == (9400, 12600)
+    assert cobalt["year_ago_price"] == 9000
+    assert cobalt["yoy_pct"] == round((11000 - 9000) / 9000 * 100, 1)
+    assert chevy["models"][1]["yoy_pct"] is None
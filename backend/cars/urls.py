@@ -6,6 +6,9 @@ from .views import (CarList, CarDetail, FuelTypeSummary, CarFiltersSummary, CarF
                     BestValue, SeasonalTrends, MarketBreadth, MileageDepreciation,
                     GearPriceSplit,
                     ApartmentList, ElectronicsList,
+                    CarBulk, ApartmentBulk, ElectronicsBulk,
+                    CarIds, ApartmentIds, ElectronicsIds,
+                    CarExport, ApartmentExport, ElectronicsExport,
                     ScraperRunsView, ScraperRunDetailView,
                     ElectronicsReport, ElectronicsListings)
 
@@ -13,6 +16,15 @@ urlpatterns = [
     path('cars/', CarList.as_view(), name='car-list'),
     path('apartments/', ApartmentList.as_view(), name='apartment-list'),
     path('electronics/', ElectronicsList.as_view(), name='electronics-list'),
+    path('cars/bulk/',        CarBulk.as_view(),         name='car-bulk'),
+    path('apartments/bulk/',  ApartmentBulk.as_view(),   name='apartment-bulk'),
+    path('electronics/bulk/', ElectronicsBulk.as_view(), name='electronics-bulk'),
+    path('cars/ids/',         CarIds.as_view(),          name='car-ids'),
+    path('apartments/ids/',   ApartmentIds.as_view(),    name='apartment-ids'),
+    path('electronics/ids/',  ElectronicsIds.as_view(),  name='electronics-ids'),
+    path('cars/export/',        CarExport.as_view(),         name='car-export'),
+    path('apartments/export/',  ApartmentExport.as_view(),   name='apartment-export'),
+    path('electronics/export/', ElectronicsExport.as_view(), name='electronics-export'),
     path('cars/<int:pk>/', CarDetail.as_view(), name='car-detail'),
     path('cars/fuel-type-summary/', FuelTypeSummary.as_view()),
     path('cars/filters-summary/', CarFiltersSummary.as_view(), name='filters-summary'),
@@ -1,50 +1,50 @@
-from django.db.models import Avg, Count, Min, Max, Q
+from django.db.models import Avg, Count, DateTimeField, F, Field, Func, IntegerField, Q, Value
+from django.db.models.lookups import LessThan
 from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import serializers
 from django.db.models.functions import TruncDate, TruncMonth
+from django.contrib.postgres.aggregates import RegrIntercept, RegrR2, RegrSlope
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Car, Apartment, Electronics
-from .serializers import CarSerializer, ApartmentSerializer, ElectronicsSerializer
+from .serializers import (CarSerializer, ApartmentSerializer, ElectronicsSerializer,
+                          CarBulkSerializer, ApartmentBulkSerializer, ElectronicsBulkSerializer)
+from .bulk import bulk_ingest, parse_records
+from .facets import facet_counts
+from . import electronics_labels, export, fx, market_stats
+from .response_cache import CARS, APARTMENTS, ELECTRONICS, bump, cached_response, cached_value
+import base64
 import logging
-import urllib.request
 import json as _json
 from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, ROUND_HALF_UP
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
-# ---------------------------------------------------------------------------
-# Live USD/UZS rate from Central Bank of Uzbekistan, cached 24 h
-# ---------------------------------------------------------------------------
-_uzs_rate_cache: dict = {'rate': 12800, 'fetched_at': None}
-
-def _get_uzs_rate() -> float:
-    cache = _uzs_rate_cache
-    now = datetime.now(dt_timezone.utc)
-    if cache['fetched_at'] and (now - cache['fetched_at']).total_seconds() < 86400:
-        return cache['rate']
-    try:
-        with urllib.request.urlopen(
-            'https://cbu.uz/en/arkhiv-kursov-valyut/json/USD/', timeout=4
-        ) as resp:
-            data = _json.loads(resp.read())
-            rate = float(data[0]['Rate'])
-            cache['rate'] = rate
-            cache['fetched_at'] = now
-            logger.info(f'UZS rate refreshed: 1 USD = {rate} UZS')
-            return rate
-    except Exception as e:
-        logger.warning(f'UZS rate fetch failed ({e}), using cached {cache["rate"]}')
-        return cache['rate']
-
 class CarShortSerializer(serializers.ModelSerializer):
+    """Compact row for list views.
+
+    Serializes DEFAULT_FIELDS unless `fields=` narrows (or widens, within
+    Meta.fields) the projection, e.g. CarShortSerializer(qs, fields=['price']).
+    """
+    DEFAULT_FIELDS = ['description', 'price', 'location', 'created_at', 'year', 'mileage', 'reference_url']
+
     created_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Car
-        fields = ['description', 'price', 'location', 'created_at', 'year', 'mileage', 'reference_url']
+        fields = ['car_id', 'description', 'price', 'location', 'created_at', 'year', 'mileage',
+                  'reference_url', 'brand', 'model', 'color', 'gear_type', 'fuel_type', 'body_type']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(fields or self.DEFAULT_FIELDS)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
 
     def get_created_at(self, obj):
         if obj.created_at:
@@ -55,11 +55,12 @@ class CarList(APIView):
     def get(self, request):
         car_ad_id = request.query_params.get("car_ad_id")
         if car_ad_id:
-            cars = Car.objects.filter(car_ad_id=car_ad_id)
-        else:
-            cars = Car.objects.all()
-        serializer = CarSerializer(cars, many=True)
-        return Response(serializer.data)
+            serializer = CarSerializer(Car.objects.filter(car_ad_id=car_ad_id), many=True)
+            return Response(serializer.data)
+        # Whole table: same JSON array, serialized a chunk at a time from a
+        # server-side cursor. New consumers should use /api/cars/export/.
+        return StreamingHttpResponse(export.json_array(Car.objects.order_by('car_id'), CarSerializer),
+                                     content_type='application/json')
 
     def post(self, request):
         # Upsert: if a car with this car_ad_id already exists, return 200
@@ -71,6 +72,7 @@ class CarList(APIView):
         serializer = CarSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump(CARS)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -99,6 +101,7 @@ class ApartmentList(APIView):
         serializer = ApartmentSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump(APARTMENTS)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -120,15 +123,210 @@ class ElectronicsList(APIView):
         ad_id = request.data.get('ad_id')
         if ad_id and Electronics.objects.filter(ad_id=ad_id).exists():
             Electronics.objects.filter(ad_id=ad_id).update(scraped_at=timezone.now())
+            bump(ELECTRONICS)  # scraped_at drives the "last N days" windows
             return Response({'status': 'exists', 'ad_id': ad_id}, status=status.HTTP_200_OK)
         serializer = ElectronicsSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(**electronics_labels.labels(serializer.validated_data, fx.uzs_per))
+            bump(ELECTRONICS)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BulkIngest(APIView):
+    """Batch upsert for the scrapers: JSON array or NDJSON body, one INSERT.
+
+    Responds 200 with per-item status in input order:
+        {"created": n, "existing": n, "errors": n,
+         "results": [{"index": 0, "<key>": "...", "status": "created"}, ...]}
+    """
+    serializer_class = None
+    key = None
+    table = None
+    update_on_conflict = None
+
+    def prepare(self, obj):
+        """Hook: fill derived columns on a validated instance before the INSERT."""
+
+    def post(self, request):
+        try:
+            records = parse_records(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        results = bulk_ingest(self.serializer_class, records, self.key, self.update_on_conflict,
+                              prepare=self.prepare)
+        counts = {s: sum(r['status'] == s for r in results) for s in ('created', 'existing', 'error')}
+        if counts['created'] or (self.update_on_conflict and counts['existing']):
+            bump(self.table)
+        return Response({
+            'created':  counts['created'],
+            'existing': counts['existing'],
+            'errors':   counts['error'],
+            'results':  results,
+        })
+
+
+class CarBulk(BulkIngest):
+    serializer_class = CarBulkSerializer
+    key = 'car_ad_id'
+    table = CARS
+
+
+class ApartmentBulk(BulkIngest):
+    serializer_class = ApartmentBulkSerializer
+    key = 'ad_id'
+    table = APARTMENTS
+
+
+class ElectronicsBulk(BulkIngest):
+    """Same as ElectronicsList.post: an existing ad gets scraped_at refreshed."""
+    serializer_class = ElectronicsBulkSerializer
+    key = 'ad_id'
+    table = ELECTRONICS
+    update_on_conflict = {'scraped_at': 'NOW()'}
+
+    def prepare(self, obj):
+        for column, value in electronics_labels.labels(obj, fx.uzs_per).items():
+            setattr(obj, column, value)
+
+
+class AdIds(APIView):
+    """Compact dedup feed for the scrapers — natural keys only, no rows.
+
+    GET  ?since=<ISO datetime>  → text/plain, one id per line, streamed from
+                                  a server-side cursor; `since` filters on
+                                  `since_field`
+    POST ids (newline-delimited text or a JSON array)
+                                → text/plain, the ids NOT in the table, in
+                                  input order (membership check)
+    """
+    model = None
+    key = None
+    since_field = None
+    MAX_CANDIDATES = 10000
+
+    def get(self, request):
+        qs = self.model.objects.filter(**{f'{self.key}__isnull': False})
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = datetime.fromisoformat(since)
+            except ValueError:
+                return Response({'error': 'invalid since'}, status=status.HTTP_400_BAD_REQUEST)
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=dt_timezone.utc)
+            qs = qs.filter(**{f'{self.since_field}__gte': since})
+        ids = qs.order_by().values_list(self.key, flat=True).iterator(chunk_size=5000)
+        return StreamingHttpResponse((f'{i}\n' for i in ids), content_type='text/plain')
+
+    def post(self, request):
+        body = request.body.decode('utf-8').strip()
+        if body.startswith('['):
+            try:
+                candidates = [str(i) for i in _json.loads(body)]
+            except ValueError:
+                return Response({'error': 'invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            candidates = [line.strip() for line in body.splitlines() if line.strip()]
+        candidates = list(dict.fromkeys(candidates))
+        if len(candidates) > self.MAX_CANDIDATES:
+            return Response({'error': f'too many ids (max {self.MAX_CANDIDATES})'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        known = set(
+            self.model.objects.filter(**{f'{self.key}__in': candidates})
+            .values_list(self.key, flat=True)
+        ) if candidates else set()
+        unknown = ''.join(f'{i}\n' for i in candidates if i not in known)
+        return HttpResponse(unknown, content_type='text/plain')
+
+
+class CarIds(AdIds):
+    model = Car
+    key = 'car_ad_id'
+    since_field = 'created_at'
+
+
+class ApartmentIds(AdIds):
+    model = Apartment
+    key = 'ad_id'
+    since_field = 'scraped_at'
+
+
+class ElectronicsIds(AdIds):
+    model = Electronics
+    key = 'ad_id'
+    since_field = 'scraped_at'
+
+
+class Export(APIView):
+    """Streamed dump of a whole table (see cars/export.py).
+
+    GET ?output=ndjson|csv|parquet|arrow   default ndjson
+        &since=<ISO datetime>              `since_field` >= since
+        &until=<ISO datetime>              `since_field` < until
+        &fields=a,b,c                      column projection (default: all)
+
+    Rows come in primary-key order from a server-side cursor; memory use is
+    one chunk regardless of table size.
+    """
+    model = None
+    since_field = None
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in export.CONTENT_TYPES:
+            return Response({'error': f"output must be one of: {', '.join(export.CONTENT_TYPES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if output in export.ARROW_OUTPUTS and export.pa is None:
+            return Response({'error': f'{output} output needs pyarrow'}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = {f.attname: f for f in self.model._meta.concrete_fields}
+        fields = list(columns.values())
+        if request.query_params.get('fields'):
+            names = [n.strip() for n in request.query_params['fields'].split(',') if n.strip()]
+            unknown = [n for n in names if n not in columns]
+            if unknown:
+                return Response({'error': f"unknown fields: {', '.join(unknown)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            fields = [columns[n] for n in names]
+
+        qs = self.model.objects.order_by('pk')
+        for param, lookup in (('since', 'gte'), ('until', 'lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return Response({'error': f'invalid {param}'}, status=status.HTTP_400_BAD_REQUEST)
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=dt_timezone.utc)
+            qs = qs.filter(**{f'{self.since_field}__{lookup}': value})
+
+        response = StreamingHttpResponse(export.stream(output, qs, fields),
+                                         content_type=export.CONTENT_TYPES[output])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.model._meta.db_table}.{export.EXTENSIONS[output]}"')
+        return response
+
+
+class CarExport(Export):
+    model = Car
+    since_field = 'created_at'
+
+
+class ApartmentExport(Export):
+    model = Apartment
+    since_field = 'scraped_at'
+
+
+class ElectronicsExport(Export):
+    model = Electronics
+    since_field = 'scraped_at'
+
+
 class FuelTypeSummary(APIView):
+    @cached_response(CARS)
     def get(self, request):
         summary = (
             Car.objects.values('fuel_type')
@@ -154,7 +352,9 @@ class CarDetail(APIView):
             car = Car.objects.get(pk=pk)
             serializer = CarSerializer(car, data=request.data)
             if serializer.is_valid():
-                serializer.save()
+                with market_stats.editing(car.car_id):
+                    serializer.save()
+                bump(CARS)
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Car.DoesNotExist:
@@ -163,205 +363,216 @@ class CarDetail(APIView):
     def delete(self, request, pk):
         try:
             car = Car.objects.get(pk=pk)
-            car.delete()
+            with market_stats.editing(car.car_id):
+                car.delete()
+            bump(CARS)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Car.DoesNotExist:
             return Response({"error": "Car not found"}, status=status.HTTP_404_NOT_FOUND)
 
+SUMMARY_FIELDS = ['fuel_type', 'gear_type', 'color', 'vehicle_type', 'condition', 'brand', 'model', 'year', 'created_at']
+
+
+def filters_summary():
+    """Per-value counts for every SUMMARY_FIELDS column in one scan.
+
+    created_at is bucketed by calendar day (newest first); every other field
+    is ordered by count, descending. NULL values are keyed as 'None'.
+    """
+    fields = [f if f != 'created_at' else 'date' for f in SUMMARY_FIELDS]
+    groups, _, _ = facet_counts(
+        Car.objects.annotate(date=TruncDate('created_at')), fields,
+    )
+    result = {}
+    for field in SUMMARY_FIELDS:
+        if field == 'created_at':
+            entries = sorted(groups['date'].items(),
+                             key=lambda kv: (kv[0] is None, kv[0]), reverse=True)
+        else:
+            entries = sorted(groups[field].items(), key=lambda kv: kv[1], reverse=True)
+        result[field] = {
+            str(value) if value is not None else 'None': count
+            for value, count in entries
+        }
+        logger.debug(f"Summary for {field}: {result[field]}")
+    return result
+
+
 class CarFiltersSummary(APIView):
+    @cached_response(CARS)
     def get(self, request):
-        fields = ['fuel_type', 'gear_type', 'color', 'vehicle_type', 'condition', 'brand', 'model', 'year', 'created_at']
-        result = {}
-        for field in fields:
-            if field == 'created_at':
-                summary = (
-                    Car.objects.annotate(date=TruncDate('created_at'))
-                    .values('date')
-                    .annotate(count=Count('*'))
-                    .order_by('-date')
-                )
-                result[field] = {
-                    str(entry['date']) if entry['date'] is not None else 'None': entry['count']
-                    for entry in summary
-                }
-            else:
-                summary = (
-                    Car.objects.values(field)
-                    .annotate(count=Count('*'))
-                    .order_by('-count')
-                )
-                result[field] = {
-                    str(entry[field]) if entry[field] is not None else 'None': entry['count']
-                    for entry in summary
-                }
-            logger.debug(f"Summary for {field}: {result[field]}")
-        return Response(result)
+        return Response(filters_summary())
+
+
+PRICE_BANDS = [
+    ("0-5000",      "Under $5,000",      Q(price__lte=5000)),
+    ("5000-10000",  "$5,000 - $10,000",  Q(price__range=(5000, 10000))),
+    ("10000-20000", "$10,000 - $20,000", Q(price__range=(10000, 20000))),
+    ("20000-50000", "$20,000 - $50,000", Q(price__range=(20000, 50000))),
+    ("50000-",      "Over $50,000",      Q(price__gt=50000)),
+]
+
+MILEAGE_BANDS = [
+    ("0-50000",       "Under 50,000 km",      Q(mileage__lte=50000)),
+    ("50000-100000",  "50,000 - 100,000 km",  Q(mileage__range=(50000, 100000))),
+    ("100000-150000", "100,000 - 150,000 km", Q(mileage__range=(100000, 150000))),
+    ("150000-200000", "150,000 - 200,000 km", Q(mileage__range=(150000, 200000))),
+    ("200000-",       "Over 200,000 km",      Q(mileage__gt=200000)),
+]
+
+# Categorical facets rendered with a fixed option list (value, label)
+FIXED_OPTIONS = {
+    "fuel_type": [
+        ("Gasoline", "Gasoline"), ("Electric", "Electric"), ("Diesel", "Diesel"),
+        ("Hybrid", "Hybrid"), ("Gas", "Gas"), ("None", "None"),
+    ],
+    "gear_type": [
+        ("AT", "Automatic"), ("MT", "Manual"), ("DSG", "Dual-clutch"), ("None", "None"),
+    ],
+}
+
+YEAR_GROUPS = [
+    ("2015-2019",   "2015–2019",   range(2015, 2020)),
+    ("2010-2014",   "2010–2014",   range(2010, 2015)),
+    ("2000-2009",   "2000–2009",   range(2000, 2010)),
+    ("1990-1999",   "1990–1999",   range(1990, 2000)),
+    ("1980-1989",   "1980–1989",   range(1980, 1990)),
+    ("before-1980", "Before 1980", range(1900, 1980)),
+]
+
 
 def build_filter_config(queryset, allowed):
     """
     Build filter configuration with counts based on the provided queryset.
+
+    Every facet — categorical counts plus the price / mileage / created_at
+    bands — comes from a single facet_counts() statement.
     """
     filter_config = {}
     today = timezone.now().date()
     last_3_days = today - timedelta(days=3)
     last_week = today - timedelta(days=7)
     last_month = today - timedelta(days=30)
+    date_bands = [
+        (str(today),                "Today",       Q(created_at__date=today)),
+        (f"{last_3_days}-{today}",  "Last 3 Days", Q(created_at__date__range=[last_3_days, today])),
+        (f"{last_week}-{today}",    "Last Week",   Q(created_at__date__range=[last_week, today])),
+        (f"{last_month}-{today}",   "Last Month",  Q(created_at__date__range=[last_month, today])),
+    ]
+    band_sets = {"price": PRICE_BANDS, "mileage": MILEAGE_BANDS, "created_at": date_bands}
+
+    group_fields = [key for key in allowed if key not in band_sets]
+    bands = {
+        (key, value): q
+        for key in allowed if key in band_sets
+        for value, _, q in band_sets[key]
+    }
+    groups, band_counts, _ = facet_counts(queryset, group_fields, bands)
 
     for key in allowed:
-        if key == "fuel_type":
-            values = queryset.values('fuel_type').annotate(count=Count('pk'))
-            values_dict = {entry['fuel_type'] if entry['fuel_type'] is not None else 'None': entry['count'] for entry in values}
+        if key in band_sets:
             opts = [
-                {"value": "Gasoline", "label": "Gasoline", "count": values_dict.get("Gasoline", 0)},
-                {"value": "Electric", "label": "Electric", "count": values_dict.get("Electric", 0)},
-                {"value": "Diesel", "label": "Diesel", "count": values_dict.get("Diesel", 0)},
-                {"value": "Hybrid", "label": "Hybrid", "count": values_dict.get("Hybrid", 0)},
-                {"value": "Gas", "label": "Gas", "count": values_dict.get("Gas", 0)},
-                {"value": "None", "label": "None", "count": values_dict.get("None", 0)}
+                {"value": value, "label": label, "count": band_counts[(key, value)]}
+                for value, label, _ in band_sets[key]
             ]
-            filter_config[key] = {"type": "checkbox", "options": opts}
-        elif key == "gear_type":
-            values = queryset.values('gear_type').annotate(count=Count('pk'))
-            values_dict = {entry['gear_type'] if entry['gear_type'] is not None else 'None': entry['count'] for entry in values}
+            filter_config[key] = {"type": "button" if key == "created_at" else "checkbox",
+                                  "options": opts}
+        elif key in FIXED_OPTIONS:
+            values_dict = {v if v is not None else 'None': c for v, c in groups[key].items()}
             opts = [
-                {"value": "AT", "label": "Automatic", "count": values_dict.get("AT", 0)},
-                {"value": "MT", "label": "Manual", "count": values_dict.get("MT", 0)},
-                {"value": "DSG", "label": "Dual-clutch", "count": values_dict.get("DSG", 0)},
-                {"value": "None", "label": "None", "count": values_dict.get("None", 0)}
+                {"value": value, "label": label, "count": values_dict.get(value, 0)}
+                for value, label in FIXED_OPTIONS[key]
             ]
             filter_config[key] = {"type": "checkbox", "options": opts}
         elif key == "year":
-            values = queryset.values('year').annotate(count=Count('pk'))
-            values_dict = {str(entry['year']) if entry['year'] is not None else 'None': entry['count'] for entry in values}
-            years = []
+            values_dict = {str(v) if v is not None else 'None': c for v, c in groups[key].items()}
             invalid_years = []
             for v in values_dict.keys():
                 try:
-                    y = int(v)
-                    if 1900 <= y <= 2025:
-                        years.append(y)
-                    else:
+                    if not 1900 <= int(v) <= 2025:
                         invalid_years.append(v)
                 except (ValueError, TypeError):
                     invalid_years.append(v)
-                    continue
             if invalid_years:
                 logger.warning(f"Invalid year values found: {invalid_years}")
-            years = sorted(years, reverse=True)
-            logger.debug(f"Processed years: {years}")
-            opts = []
-            for y in range(2020, 2026):
+            opts = [
+                {"value": str(y), "label": str(y), "count": values_dict.get(str(y), 0)}
+                for y in range(2020, 2026)
+            ]
+            for value, label, years in YEAR_GROUPS:
                 opts.append({
-                    "value": str(y),
-                    "label": str(y),
-                    "count": values_dict.get(str(y), 0)
+                    "value": value,
+                    "label": label,
+                    "count": sum(values_dict.get(str(y), 0) for y in years),
                 })
-            group_2015_2019 = sum([values_dict.get(str(y), 0) for y in range(2015, 2020)])
-            opts.append({
-                "value": "2015-2019",
-                "label": "2015–2019",
-                "count": group_2015_2019
-            })
-            group_2010_2014 = sum([values_dict.get(str(y), 0) for y in range(2010, 2015)])
-            opts.append({
-                "value": "2010-2014",
-                "label": "2010–2014",
-                "count": group_2010_2014
-            })
-            group_2000_2009 = sum([values_dict.get(str(y), 0) for y in range(2000, 2010)])
-            opts.append({
-                "value": "2000-2009",
-                "label": "2000–2009",
-                "count": group_2000_2009
-            })
-            group_1990_1999 = sum([values_dict.get(str(y), 0) for y in range(1990, 2000)])
-            opts.append({
-                "value": "1990-1999",
-                "label": "1990–1999",
-                "count": group_1990_1999
-            })
-            group_1980_1989 = sum([values_dict.get(str(y), 0) for y in range(1980, 1990)])
-            opts.append({
-                "value": "1980-1989",
-                "label": "1980–1989",
-                "count": group_1980_1989
-            })
-            group_before_1980 = sum([values_dict.get(str(y), 0) for y in range(1900, 1980)])
-            opts.append({
-                "value": "before-1980",
-                "label": "Before 1980",
-                "count": group_before_1980
-            })
             filter_config[key] = {"type": "dropdown", "options": opts}
-        elif key == "price":
-            opts = [
-                {"value": "0-5000", "label": "Under $5,000", "count": queryset.filter(price__lte=5000).count()},
-                {"value": "5000-10000", "label": "$5,000 - $10,000", "count": queryset.filter(price__range=(5000, 10000)).count()},
-                {"value": "10000-20000", "label": "$10,000 - $20,000", "count": queryset.filter(price__range=(10000, 20000)).count()},
-                {"value": "20000-50000", "label": "$20,000 - $50,000", "count": queryset.filter(price__range=(20000, 50000)).count()},
-                {"value": "50000-", "label": "Over $50,000", "count": queryset.filter(price__gt=50000).count()}
-            ]
-            filter_config[key] = {"type": "checkbox", "options": opts}
-        elif key == "mileage":
-            opts = [
-                {"value": "0-50000", "label": "Under 50,000 km", "count": queryset.filter(mileage__lte=50000).count()},
-                {"value": "50000-100000", "label": "50,000 - 100,000 km", "count": queryset.filter(mileage__range=(50000, 100000)).count()},
-                {"value": "100000-150000", "label": "100,000 - 150,000 km", "count": queryset.filter(mileage__range=(100000, 150000)).count()},
-                {"value": "150000-200000", "label": "150,000 - 200,000 km", "count": queryset.filter(mileage__range=(150000, 200000)).count()},
-                {"value": "200000-", "label": "Over 200,000 km", "count": queryset.filter(mileage__gt=200000).count()}
-            ]
-            filter_config[key] = {"type": "checkbox", "options": opts}
-        elif key == "created_at":
-            opts = [
-                {
-                    "value": str(today),
-                    "label": "Today",
-                    "count": queryset.filter(created_at__date=today).count()
-                },
-                {
-                    "value": f"{last_3_days}-{today}",
-                    "label": "Last 3 Days",
-                    "count": queryset.filter(created_at__date__range=[last_3_days, today]).count()
-                },
-                {
-                    "value": f"{last_week}-{today}",
-                    "label": "Last Week",
-                    "count": queryset.filter(created_at__date__range=[last_week, today]).count()
-                },
-                {
-                    "value": f"{last_month}-{today}",
-                    "label": "Last Month",
-                    "count": queryset.filter(created_at__date__range=[last_month, today]).count()
-                }
-            ]
-            filter_config[key] = {"type": "button", "options": opts}
         else:
-            values = queryset.values(key).annotate(count=Count('pk'))
             opts = [
-                {"value": v, "label": v, "count": cnt}
-                for v, cnt in [(entry[key] if entry[key] is not None else 'None', entry['count']) for entry in values]
+                {"value": v if v is not None else 'None',
+                 "label": v if v is not None else 'None',
+                 "count": cnt}
+                for v, cnt in groups[key].items()
             ]
             filter_config[key] = {"type": "dropdown", "options": opts}
     return filter_config
 
+def _encode_cursor(car):
+    """Opaque keyset cursor pointing just past `car` in (created_at, car_id) order."""
+    payload = {"c": car.created_at.isoformat() if car.created_at else None, "i": car.car_id}
+    return base64.urlsafe_b64encode(_json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _cursor_ranges(cursor):
+    """Qs selecting the rows after `cursor` for ORDER BY created_at DESC NULLS
+    LAST, car_id DESC, as consecutive ranges of that order: the rest of the
+    dated rows, then the undated ones. Each is a range of the V18 keyset
+    index on its own; OR-ed together they would be a filter over all of it."""
+    payload = _json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    car_id = int(payload["i"])
+    if payload["c"] is None:
+        return [Q(created_at__isnull=True, car_id__lt=car_id)]
+    created_at = datetime.fromisoformat(payload["c"])
+    if created_at.tzinfo is None:
+        # marketplace.cars.created_at is a plain TIMESTAMP read back in the
+        # connection's UTC session zone.
+        created_at = created_at.replace(tzinfo=dt_timezone.utc)
+    # (created_at, car_id) < (cursor): a row comparison, so Postgres can
+    # start the index scan at the cursor.
+    before = LessThan(Func(F('created_at'), F('car_id'), function='ROW', output_field=Field()),
+                      Func(Value(created_at, output_field=DateTimeField()),
+                           Value(car_id, output_field=IntegerField()), function='ROW', output_field=Field()))
+    return [Q(before), Q(created_at__isnull=True)]
+
+
+def _allowed_filters():
+    """Filter keys with more than one value in filters_summary(), plus the ranges."""
+    summary_data = filters_summary()
+    logger.debug(f"Summary data: {summary_data}")
+    allowed = []
+    for key, value_counts in summary_data.items():
+        if len(value_counts) > 1 or key in ['year', 'created_at']:
+            allowed.append(key)
+    allowed.extend(['price', 'mileage'])
+    return allowed
+
+
 class CarFilteredList(APIView):
     """
     Returns a filtered list of cars, with dynamic allowed filters based on /api/cars/filters-summary/.
     Also provides filter configuration for client UI with dynamic counts.
+
+    Results are keyset-paginated, newest first: pass the returned
+    `next_cursor` back as ?cursor= to get the next page. ?page_size= (default
+    DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE) and ?fields=a,b,c (subset of
+    CarShortSerializer.Meta.fields) are optional.
     """
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
     def get(self, request):
-        # Get filter summary for allowed filters
-        summary_view = CarFiltersSummary()
-        summary_response = summary_view.get(request)
-        summary_data = summary_response.data if hasattr(summary_response, 'data') else summary_response
-        logger.debug(f"Summary data: {summary_data}")
-
-        # Define allowed filters, including price, mileage, and created_at
-        allowed = []
-        for key, value_counts in summary_data.items():
-            if len(value_counts) > 1 or key in ['year', 'created_at']:
-                allowed.append(key)
-        allowed.extend(['price', 'mileage'])
+        # Filters allowed by the summary (one full scan, see filters_summary),
+        # computed once per version of marketplace.cars rather than per page
+        allowed = cached_value('car-filtered-list-allowed', [CARS], {}, _allowed_filters)
 
         # Log raw query parameters for debugging
         logger.info(f"Raw query params: {request.query_params}")
@@ -434,29 +645,66 @@ class CarFilteredList(APIView):
                 else:
                     filters[key] = value
 
-        # Apply filters to get the filtered queryset for results
-        results_queryset = Car.objects.filter(**filters).order_by('-created_at')
-        serializer = CarShortSerializer(results_queryset, many=True)
+        # Projection: ?fields=price,mileage,reference_url
+        fields = None
+        if request.query_params.get('fields'):
+            fields = [f.strip() for f in request.query_params['fields'].split(',') if f.strip()]
+            unknown = set(fields) - set(CarShortSerializer.Meta.fields)
+            if unknown:
+                return Response({"error": f"unknown fields: {', '.join(sorted(unknown))}"}, status=400)
 
-        # For filter config, remove created_at__range filter (if present) to get all available options
-        filter_filters = dict(filters)  # shallow copy
-        filter_filters.pop('created_at__range', None)
-        filter_queryset = Car.objects.filter(**filter_filters)
-
-        # Log filtered queryset count for debugging
-        logger.info(f"Filtered queryset count: {results_queryset.count()}")
-
-        # Build filter config with dynamic counts based on filter_queryset (not results_queryset)
-        filter_config = build_filter_config(filter_queryset, allowed)
+        try:
+            page_size = int(request.query_params.get('page_size', self.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            page_size = self.DEFAULT_PAGE_SIZE
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+        # Keyset pagination on (created_at DESC, car_id DESC): each page is a
+        # range scan of the V18 keyset index from the cursor, independent of
+        # how deep it is. A page reaching the undated rows takes a second
+        # range for them.
+        db_fields = set(fields or CarShortSerializer.DEFAULT_FIELDS)
+        results_queryset = Car.objects.filter(**filters).order_by(
+            F('created_at').desc(nulls_last=True), '-car_id'
+        ).only(*(db_fields | {'car_id', 'created_at'}))
+        cursor = request.query_params.get('cursor')
+        ranges = [Q()]
+        if cursor:
+            try:
+                ranges = _cursor_ranges(cursor)
+            except (ValueError, KeyError, TypeError):
+                return Response({"error": "invalid cursor"}, status=400)
+        page = []
+        for rows in ranges:
+            page += results_queryset.filter(rows)[:page_size + 1 - len(page)]
+            if len(page) > page_size:
+                break
+        next_cursor = _encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+        serializer = CarShortSerializer(page[:page_size], many=True, fields=fields)
+
+        # Facets describe the whole result set, so they are only computed for
+        # the first page; follow-up cursor pages return "filters": null.
+        filter_config = None
+        if not cursor:
+            # For filter config, remove created_at__range filter (if present) to get all available options
+            filter_filters = dict(filters)  # shallow copy
+            filter_filters.pop('created_at__range', None)
+            filter_queryset = Car.objects.filter(**filter_filters)
+
+            # Build filter config with dynamic counts based on filter_queryset (not results_queryset)
+            filter_config = build_filter_config(filter_queryset, allowed)
 
         return Response({
             "results": serializer.data,
             "filters": filter_config,
+            "next_cursor": next_cursor,
+            "page_size": page_size,
         })
     
 
 # DropdownOptions API view for categorical field unique values
 class DropdownOptions(APIView):
+    @cached_response(CARS)
     def get(self, request):
         fields = ['brand', 'model', 'color', 'gear_type', 'fuel_type', 'body_type']
         result = {}
@@ -468,6 +716,7 @@ class DropdownOptions(APIView):
 
 class BrandModels(APIView):
     """Return {brand: [model, ...]} mapping so the UI can filter models by brand."""
+    @cached_response(CARS)
     def get(self, request):
         pairs = (
             Car.objects.filter(brand__isnull=False, model__isnull=False)
@@ -484,29 +733,69 @@ class BrandModels(APIView):
         return Response(result)
 
 
+MAX_MODEL_PAIRS = 50
+
+
+def _model_pairs(raw):
+    """Parse `models=Brand:Model,Brand:Model` into [(brand, model), ...].
+
+    Raises ValueError on a malformed entry or too many pairs.
+    """
+    if not raw:
+        return []
+    pairs = []
+    for item in raw.split(','):
+        brand, sep, model = item.partition(':')
+        if not sep or not brand.strip() or not model.strip():
+            raise ValueError(f"invalid model pair {item!r} (expected Brand:Model)")
+        pairs.append((brand.strip(), model.strip()))
+    if len(pairs) > MAX_MODEL_PAIRS:
+        raise ValueError(f"too many models (max {MAX_MODEL_PAIRS})")
+    return list(dict.fromkeys(pairs))
+
+
+def _pairs_q(pairs):
+    q = Q()
+    for brand, model in pairs:
+        q |= Q(brand=brand, model=model)
+    return q
+
+
 class PriceHistory(APIView):
     """Monthly price trend for a specific car spec.
 
     When `mileage` is supplied, uses hedonic regression:
       - Takes ALL listings (no mileage filter)
       - Computes one pooled price-per-km slope across all months
+        (Postgres regr_slope, grouped per model)
       - Per month: price_at_mileage = avg_price + slope × (avg_km − user_km)
       - This answers: "what would MY exact car have cost each month?"
 
     Without `mileage`, returns plain monthly averages.
 
-    Required: brand, model
+    Required: brand, model — or `models=Brand:Model,Brand:Model,...`, which
+    returns {"models": [{brand, model, <same fields>}, ...]} in two queries.
     Optional: year, gear_type, color, mileage
     """
+    MIN_REGRESSION_N = 10
+
+    @cached_response(CARS)
     def get(self, request):
-        brand      = request.query_params.get('brand')
-        model_name = request.query_params.get('model')
-        if not brand or not model_name:
-            return Response({"error": "brand and model are required"}, status=400)
+        try:
+            pairs = _model_pairs(request.query_params.get('models'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        single = not pairs
+        if single:
+            brand      = request.query_params.get('brand')
+            model_name = request.query_params.get('model')
+            if not brand or not model_name:
+                return Response({"error": "brand and model are required"}, status=400)
+            pairs = [(brand, model_name)]
 
         since = timezone.now() - timedelta(days=400)
         qs = Car.objects.filter(
-            brand=brand, model=model_name,
+            _pairs_q(pairs),
             price__gt=0, price__lt=500000,
             mileage__gt=500, mileage__lt=500000,
             created_at__gte=since,
@@ -519,62 +808,71 @@ class PriceHistory(APIView):
             qs = qs.filter(color=request.query_params['color'])
 
         user_mileage_raw = request.query_params.get('mileage')
+        user_km = int(user_mileage_raw) if user_mileage_raw else None
 
-        if user_mileage_raw:
+        fits = {}
+        if user_km is not None:
             # ── Hedonic mode ──────────────────────────────────────────────
-            user_km = int(user_mileage_raw)
-
             # Pooled slope across all months (stable, not per-month noise)
-            rows_all = list(qs.values_list('price', 'mileage'))
-            if len(rows_all) >= 10:
-                prices   = [float(r[0]) for r in rows_all]
-                kms      = [float(r[1]) for r in rows_all]
-                n        = len(rows_all)
-                mean_p   = sum(prices) / n
-                mean_km  = sum(kms) / n
-                cov      = sum((p - mean_p) * (k - mean_km) for p, k in zip(prices, kms)) / n
-                var_km   = sum((k - mean_km) ** 2 for k in kms) / n
-                slope    = cov / var_km if var_km > 0 else 0.0
-            else:
-                slope = 0.0
-
-            monthly = (
-                qs.annotate(month=TruncMonth('created_at'))
-                .values('month')
-                .annotate(avg_price=Avg('price'), avg_km=Avg('mileage'), count=Count('car_id'))
-                .order_by('month')
-            )
-            data = []
-            for r in monthly:
-                adj = round(float(r['avg_price']) + slope * (user_km - float(r['avg_km'])))
-                data.append({
-                    "month":            r['month'].strftime('%Y-%m'),
-                    "avg_price":        round(r['avg_price']),
-                    "price_at_mileage": adj,
-                    "avg_km":           round(r['avg_km']),
-                    "count":            r['count'],
-                })
-            return Response({
-                "data":         data,
-                "hedonic":      True,
-                "pooled_slope": round(slope, 6),
-                "user_km":      user_km,
-            })
-
-        # ── Plain mode (no mileage param) ─────────────────────────────────
-        rows = (
+            for r in (qs.values('brand', 'model')
+                      .annotate(n=Count('car_id'),
+                                slope=RegrSlope('price', 'mileage'),
+                                intercept=RegrIntercept('price', 'mileage'),
+                                r2=RegrR2('price', 'mileage'))):
+                fits[(r['brand'], r['model'])] = r
+
+        fields = dict(avg_price=Avg('price'), count=Count('car_id'))
+        if user_km is not None:
+            fields['avg_km'] = Avg('mileage')
+        monthly = (
             qs.annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(avg_price=Avg('price'), count=Count('car_id'))
-            .order_by('month')
+            .values('brand', 'model', 'month')
+            .annotate(**fields)
+            .order_by('brand', 'model', 'month')
         )
-        data = [
-            {"month": r['month'].strftime('%Y-%m'),
-             "avg_price": round(r['avg_price']),
-             "count":     r['count']}
-            for r in rows
-        ]
-        return Response({"data": data})
+        rows_by_pair = {pair: [] for pair in pairs}
+        for r in monthly:
+            rows_by_pair[(r['brand'], r['model'])].append(r)
+
+        series = []
+        for pair in pairs:
+            series.append(self._series(rows_by_pair[pair], fits.get(pair), user_km))
+        if single:
+            return Response(series[0])
+        return Response({"models": [
+            {"brand": b, "model": m, **s} for (b, m), s in zip(pairs, series)
+        ]})
+
+    def _series(self, rows, fit, user_km):
+        if user_km is None:
+            # ── Plain mode (no mileage param) ─────────────────────────────
+            return {"data": [
+                {"month": r['month'].strftime('%Y-%m'),
+                 "avg_price": round(r['avg_price']),
+                 "count":     r['count']}
+                for r in rows
+            ]}
+
+        usable = fit and fit['n'] >= self.MIN_REGRESSION_N and fit['slope'] is not None
+        slope = fit['slope'] if usable else 0.0
+        data = []
+        for r in rows:
+            adj = round(float(r['avg_price']) + slope * (user_km - float(r['avg_km'])))
+            data.append({
+                "month":            r['month'].strftime('%Y-%m'),
+                "avg_price":        round(r['avg_price']),
+                "price_at_mileage": adj,
+                "avg_km":           round(r['avg_km']),
+                "count":            r['count'],
+            })
+        return {
+            "data":             data,
+            "hedonic":          True,
+            "pooled_slope":     round(slope, 6),
+            "pooled_intercept": round(fit['intercept']) if usable else None,
+            "r2":               round(fit['r2'], 4) if usable and fit['r2'] is not None else None,
+            "user_km":          user_km,
+        }
 
 
 class SmartPrice(APIView):
@@ -584,7 +882,8 @@ class SmartPrice(APIView):
     so the price message and trend chart always show identical data.
 
     Tries progressively wider bands/windows until ≥ MIN_LISTINGS found.
-    Returns mileage_low + mileage_high so the bot can pass them to
+    All tiers and the fallback envelope come from one aggregate query;
+    the first tier with enough listings wins. Returns mileage_low + mileage_high so the bot can pass them to
     PriceHistory for a consistent chart.
 
     Required: brand, model, year, gear_type, color, mileage
@@ -595,6 +894,7 @@ class SmartPrice(APIView):
     PRICE_FLOOR = 1500
     PRICE_CEIL  = 300000
 
+    @cached_response(CARS)
     def get(self, request):
         try:
             brand      = request.query_params['brand']
@@ -609,46 +909,73 @@ class SmartPrice(APIView):
                 status=400,
             )
 
-        clean = Car.objects.filter(
-            brand=brand, model=model_name, year=year,
-            price__gte=self.PRICE_FLOOR, price__lte=self.PRICE_CEIL,
-        )
-
         # Tiers relax the spec from exact → looser so we stay on REAL market
         # data as long as possible. The ML fallback badly under-prices rare /
         # expensive models (it was trained on cheap high-volume cars), so we
         # only surrender to it after exhausting genuine comparables.
-        #   spec_filter: extra Django filters on top of brand+model+year
-        #   days: recency window · band: ± mileage fraction
-        #   min_n: how many real listings this tier needs to be trusted
+        #   spec: gear/color must match · days: recency window
+        #   band: ± mileage fraction · min_n: listings this tier needs
         #   match: human label of how relaxed the match is
         tiers = [
-            (dict(gear_type=gear_type, color=color), 30, 0.25, 5, "exact"),
-            (dict(gear_type=gear_type, color=color), 90, 0.35, 5, "exact"),
-            (dict(gear_type=gear_type),              90, 0.35, 4, "any color"),
-            (dict(),                                 90, 0.40, 4, "any color/gear"),
-            (dict(),                                180, 0.50, 3, "any color/gear"),
-            (dict(),                                180, 1.00, 3, "any mileage"),
+            ((True, True),   30, 0.25, 5, "exact"),
+            ((True, True),   90, 0.35, 5, "exact"),
+            ((True, False),  90, 0.35, 4, "any color"),
+            ((False, False), 90, 0.40, 4, "any color/gear"),
+            ((False, False), 180, 0.50, 3, "any color/gear"),
+            ((False, False), 180, 1.00, 3, "any mileage"),
         ]
 
-        for spec_filter, days, band, min_n, match in tiers:
+        # One pass over the brand+model+year listings: each tier is a boolean
+        # column, aggregated with FILTER; the unfiltered aggregates are the
+        # envelope.
+        now = timezone.now()
+        flags, params, bands = [], [], []
+        for i, ((same_gear, same_color), days, band, _, _) in enumerate(tiers):
             low  = max(0, int(mileage * (1 - band)))
             high = int(mileage * (1 + band))
-            qs = clean.filter(
-                **spec_filter,
-                mileage__gte=low, mileage__lte=high,
-                created_at__gte=timezone.now() - timedelta(days=days),
-            )
-            prices = sorted(qs.values_list('price', flat=True))
-            if len(prices) >= min_n:
-                median = prices[len(prices) // 2]
+            bands.append((low, high))
+            cond = "mileage BETWEEN %s AND %s AND created_at >= %s"
+            params += [low, high, now - timedelta(days=days)]
+            if same_gear:
+                cond += " AND gear_type::text = %s"
+                params.append(gear_type)
+            if same_color:
+                cond += " AND color = %s"
+                params.append(color)
+            flags.append(f"({cond}) AS t{i}")
+        aggregates = ",\n".join(
+            f"COUNT(*) FILTER (WHERE t{i}), "
+            f"PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price) FILTER (WHERE t{i}), "
+            f"AVG(price) FILTER (WHERE t{i}), MIN(price) FILTER (WHERE t{i}), "
+            f"MAX(price) FILTER (WHERE t{i})"
+            for i in range(len(tiers))
+        )
+        with connection.cursor() as cur:
+            cur.execute(f"""
+                WITH clean AS (
+                    SELECT price, {', '.join(flags)}
+                    FROM marketplace.cars
+                    WHERE brand = %s AND model = %s AND year = %s
+                      AND price BETWEEN %s AND %s
+                )
+                SELECT {aggregates},
+                       COUNT(*), PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price),
+                       MIN(price), MAX(price)
+                FROM clean
+            """, params + [brand, model_name, year, self.PRICE_FLOOR, self.PRICE_CEIL])
+            row = cur.fetchone()
+
+        for i, (_, days, _, min_n, match) in enumerate(tiers):
+            count, median, avg, lowest, highest = row[i * 5:i * 5 + 5]
+            if count >= min_n:
+                low, high = bands[i]
                 return Response({
                     "price":        round(median),
-                    "avg":          round(sum(prices) / len(prices)),
-                    "min":          round(prices[0]),
-                    "max":          round(prices[-1]),
+                    "avg":          round(avg),
+                    "min":          round(lowest),
+                    "max":          round(highest),
                     "source":       f"market_{days}d",
-                    "count":        len(prices),
+                    "count":        count,
                     "period":       f"last {days} days",
                     "match":        match,
                     "mileage_band": f"{low:,}–{high:,} km",
@@ -659,23 +986,18 @@ class SmartPrice(APIView):
         # Truly no comparable real listings anywhere — let the caller try ML,
         # but hand back the brand+model+year price envelope so the caller can
         # sanity-clamp the ML number instead of trusting it blindly.
-        envelope = list(
-            clean.values_list('price', flat=True)
-        )
-        low  = int(mileage * 0.75)
-        high = int(mileage * 1.25)
+        env_count, env_median, env_min, env_max = row[len(tiers) * 5:]
         payload = {
             "price":        None,
             "source":       "insufficient_data",
-            "count":        len(envelope),
-            "mileage_low":  low,
-            "mileage_high": high,
+            "count":        env_count,
+            "mileage_low":  int(mileage * 0.75),
+            "mileage_high": int(mileage * 1.25),
         }
-        if envelope:
-            envelope.sort()
-            payload["envelope_min"]    = round(envelope[0])
-            payload["envelope_max"]    = round(envelope[-1])
-            payload["envelope_median"] = round(envelope[len(envelope) // 2])
+        if env_count:
+            payload["envelope_min"]    = round(env_min)
+            payload["envelope_max"]    = round(env_max)
+            payload["envelope_median"] = round(env_median)
         return Response(payload)
 
 
@@ -683,39 +1005,46 @@ class SmartPrice(APIView):
 # Channel analytics endpoints
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _rollup_windows(days):
+    """(since, prev_since) day boundaries of the market-stats rollup for a
+    window of `days` days."""
+    since = (timezone.now() - timedelta(days=days)).date()
+    return since, since - timedelta(days=days)
+
+
 class BrandRanking(APIView):
     """Top brands by listing count for the last N days, with week-over-week change.
 
     Query params: days (default 7), top (default 10)
     """
+    @cached_response(CARS)
     def get(self, request):
         days = int(request.query_params.get('days', 7))
         top  = int(request.query_params.get('top', 10))
-        now  = timezone.now()
-        since      = now - timedelta(days=days)
-        prev_since = since - timedelta(days=days)
-
-        current_qs = (
-            Car.objects.filter(created_at__gte=since, price__gt=0)
-            .values('brand')
-            .annotate(count=Count('car_id'), avg_price=Avg('price'))
-            .order_by('-count')[:top]
-        )
-        prev_counts = {
-            r['brand']: r['count']
-            for r in Car.objects.filter(
-                created_at__gte=prev_since, created_at__lt=since, price__gt=0
-            ).values('brand').annotate(count=Count('car_id'))
-        }
+        since, prev_since = _rollup_windows(days)
+
+        with connection.cursor() as cur:
+            cur.execute("""
+                SELECT brand,
+                       SUM(cnt) FILTER (WHERE day >= %s) AS count,
+                       SUM(price_sum) FILTER (WHERE day >= %s) AS total,
+                       COALESCE(SUM(cnt) FILTER (WHERE day < %s), 0) AS prev_count
+                FROM marketplace.market_stats_daily
+                WHERE day >= %s
+                GROUP BY brand
+                HAVING SUM(cnt) FILTER (WHERE day >= %s) > 0
+                ORDER BY count DESC
+                LIMIT %s
+            """, [since, since, since, prev_since, since, top])
+            rows = cur.fetchall()
 
         result = []
-        for r in current_qs:
-            prev = prev_counts.get(r['brand'], 0)
-            pct  = round((r['count'] - prev) / prev * 100, 1) if prev > 0 else None
+        for brand, count, total, prev in rows:
+            pct = round((count - prev) / prev * 100, 1) if prev > 0 else None
             result.append({
-                'brand':      r['brand'],
-                'count':      r['count'],
-                'avg_price':  round(float(r['avg_price'])),
+                'brand':      brand,
+                'count':      count,
+                'avg_price':  round(float(total) / count),
                 'prev_count': prev,
                 'pct_change': pct,
             })
@@ -727,39 +1056,40 @@ class PriceMovers(APIView):
 
     Query params: days (default 7), min_count (default 5), top (default 5)
     """
+    @cached_response(CARS)
     def get(self, request):
         days      = int(request.query_params.get('days', 7))
         min_count = int(request.query_params.get('min_count', 5))
         top       = int(request.query_params.get('top', 5))
-        now       = timezone.now()
-        since      = now - timedelta(days=days)
-        prev_since = since - timedelta(days=days)
-
-        current = {
-            (r['brand'], r['model']): {'avg': float(r['avg_price']), 'count': r['count']}
-            for r in Car.objects.filter(created_at__gte=since, price__gt=0)
-                .values('brand', 'model')
-                .annotate(avg_price=Avg('price'), count=Count('car_id'))
-                .filter(count__gte=min_count)
-        }
-        prev = {
-            (r['brand'], r['model']): float(r['avg_price'])
-            for r in Car.objects.filter(
-                created_at__gte=prev_since, created_at__lt=since, price__gt=0
-            ).values('brand', 'model').annotate(avg_price=Avg('price'))
-        }
+        since, prev_since = _rollup_windows(days)
+
+        with connection.cursor() as cur:
+            cur.execute("""
+                SELECT brand, model,
+                       SUM(cnt) FILTER (WHERE day >= %s),
+                       SUM(price_sum) FILTER (WHERE day >= %s),
+                       SUM(cnt) FILTER (WHERE day < %s),
+                       SUM(price_sum) FILTER (WHERE day < %s)
+                FROM marketplace.market_stats_daily
+                WHERE day >= %s
+                GROUP BY brand, model
+                HAVING SUM(cnt) FILTER (WHERE day >= %s) >= %s
+                   AND SUM(cnt) FILTER (WHERE day < %s) > 0
+            """, [since, since, since, since, prev_since, since, min_count, since])
+            rows = cur.fetchall()
 
         movers = []
-        for (brand, model), curr in current.items():
-            if (brand, model) in prev and prev[(brand, model)] > 0:
-                pct = (curr['avg'] - prev[(brand, model)]) / prev[(brand, model)] * 100
+        for brand, model, count, total, prev_count, prev_total in rows:
+            avg, prev_avg = float(total) / count, float(prev_total) / prev_count
+            if prev_avg > 0:
+                pct = (avg - prev_avg) / prev_avg * 100
                 movers.append({
                     'brand':          brand,
                     'model':          model,
-                    'avg_price':      round(curr['avg']),
-                    'prev_avg_price': round(prev[(brand, model)]),
+                    'avg_price':      round(avg),
+                    'prev_avg_price': round(prev_avg),
                     'change_pct':     round(pct, 1),
-                    'count':          curr['count'],
+                    'count':          count,
                 })
 
         movers.sort(key=lambda x: x['change_pct'])
@@ -771,7 +1101,13 @@ class PriceMovers(APIView):
 
 
 class WeeklyDigest(APIView):
-    """Full weekly market summary for the channel digest post."""
+    """Full weekly market summary for the channel digest post.
+
+    Set-based: one grouped query returns the top 10 brands with their top 5
+    models (count, avg, 10th–90th percentile), one more fetches the year-ago
+    averages for exactly those models, and they are joined in memory.
+    """
+    @cached_response(CARS)
     def get(self, request):
         now        = timezone.now()
         since      = now - timedelta(days=7)
@@ -780,83 +1116,78 @@ class WeeklyDigest(APIView):
 
         total = Car.objects.filter(created_at__gte=since).count()
 
-        brand_rows = (
-            Car.objects.filter(created_at__gte=since, price__gt=0)
-            .values('brand')
-            .annotate(count=Count('car_id'), avg_price=Avg('price'))
-            .order_by('-count')[:10]
-        )
-
-        top_brands = []
-        for row in brand_rows:
-            brand_name = row['brand']
-
-            # Top 5 models for this brand: count + min/max/avg price
-            model_rows = (
-                Car.objects.filter(brand=brand_name, created_at__gte=since, price__gt=0)
-                .values('model')
-                .annotate(
-                    count=Count('car_id'),
-                    avg_price=Avg('price'),
-                    min_price=Min('price'),
-                    max_price=Max('price'),
+        # 10th–90th percentile range: excludes crashed/damaged (low) and overpriced/modified (high)
+        with connection.cursor() as cur:
+            cur.execute("""
+                WITH week AS (
+                    SELECT brand, model, price
+                    FROM marketplace.cars
+                    WHERE created_at >= %s AND price > 0
+                ), brands AS (
+                    SELECT brand, COUNT(*) AS cnt, AVG(price) AS avg_price
+                    FROM week
+                    GROUP BY brand
+                    ORDER BY cnt DESC
+                    LIMIT 10
+                ), models AS (
+                    SELECT w.brand, w.model,
+                           COUNT(*) AS cnt,
+                           AVG(w.price) AS avg_price,
+                           PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY w.price) AS p10,
+                           PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY w.price) AS p90,
+                           ROW_NUMBER() OVER (PARTITION BY w.brand ORDER BY COUNT(*) DESC) AS rn
+                    FROM week w
+                    JOIN brands b ON b.brand = w.brand
+                    GROUP BY w.brand, w.model
                 )
-                .order_by('-count')[:5]
-            )
+                SELECT b.brand, b.cnt, b.avg_price,
+                       m.model, m.cnt, m.avg_price, m.p10, m.p90
+                FROM brands b
+                JOIN models m ON m.brand = b.brand AND m.rn <= 5
+                ORDER BY b.cnt DESC, b.brand, m.cnt DESC
+            """, [since])
+            rows = cur.fetchall()
 
-            models = []
-            for m in model_rows:
-                model_name = m['model']
-                avg_p = float(m['avg_price'])
-
-                # 10th–90th percentile range: excludes crashed/damaged (low) and overpriced/modified (high)
-                with connection.cursor() as cur:
-                    cur.execute("""
-                        SELECT
-                            PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY price),
-                            PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY price)
-                        FROM marketplace.cars
-                        WHERE brand = %s AND model = %s
-                          AND created_at >= %s AND price > 0
-                    """, [brand_name, model_name, since])
-                    pct = cur.fetchone()
-                min_price = round(float(pct[0])) if pct and pct[0] else round(avg_p)
-                max_price = round(float(pct[1])) if pct and pct[1] else round(avg_p)
-
-                # YoY: same brand+model, now vs ~1 year ago
-                qs_year = Car.objects.filter(
-                    brand=brand_name, model=model_name,
-                    created_at__gte=since_year,
-                    created_at__lt=since_year + year_window,
-                    price__gt=0,
-                )
-                qs_now = Car.objects.filter(
-                    brand=brand_name, model=model_name,
-                    created_at__gte=since, price__gt=0,
-                )
-                avg_now  = qs_now.aggregate(a=Avg('price'))['a']
-                avg_year = qs_year.aggregate(a=Avg('price'))['a']
-                yoy_pct = None
-                year_ago_price = None
-                if avg_now and avg_year:
-                    yoy_pct = round((float(avg_now) - float(avg_year)) / float(avg_year) * 100, 1)
-                    year_ago_price = round(float(avg_year))
-
-                models.append({
-                    'model':          model_name,
-                    'count':          m['count'],
-                    'avg_price':      round(avg_p),
-                    'min_price':      min_price,
-                    'max_price':      max_price,
-                    'yoy_pct':        yoy_pct,
-                    'year_ago_price': year_ago_price,
-                })
+            # YoY: same brand+model, now vs ~1 year ago
+            pairs = list({(r[0], r[3]) for r in rows})
+            year_ago = {}
+            if pairs:
+                cur.execute("""
+                    SELECT c.brand, c.model, AVG(c.price)
+                    FROM marketplace.cars c
+                    JOIN unnest(%s::text[], %s::text[]) AS t(brand, model)
+                      ON c.brand = t.brand AND c.model = t.model
+                    WHERE c.created_at >= %s AND c.created_at < %s AND c.price > 0
+                    GROUP BY c.brand, c.model
+                """, [[p[0] for p in pairs], [p[1] for p in pairs],
+                      since_year, since_year + year_window])
+                year_ago = {(b, m): avg for b, m, avg in cur.fetchall()}
 
-            top_brands.append({
-                'brand':     brand_name,
-                'count':     row['count'],
-                'avg_price': round(float(row['avg_price'])),
-                'models':    models,
+        top_brands = []
+        for brand_name, brand_count, brand_avg, model_name, count, avg_p, p10, p90 in rows:
+            if not top_brands or top_brands[-1]['brand'] != brand_name:
+                top_brands.append({
+                    'brand':     brand_name,
+                    'count':     brand_count,
+                    'avg_price': round(float(brand_avg)),
+                    'models':    [],
+                })
+            avg_p = float(avg_p)
+            avg_year = year_ago.get((brand_name, model_name))
+            yoy_pct = None
+            year_ago_price = None
+            if avg_p and avg_year:
+                yoy_pct = round((avg_p - float(avg_year)) / float(avg_year) * 100, 1)
+                year_ago_price = round(float(avg_year))
+
+            top_brands[-1]['models'].append({
+                'model':          model_name,
+                'count':          count,
+                'avg_price':      round(avg_p),
+                'min_price':      round(float(p10)) if p10 else round(avg_p),
+                'max_price':      round(float(p90)) if p90 else round(avg_p),
+                'yoy_pct':        yoy_pct,
+                'year_ago_price': year_ago_price,
             })
 
         return Response({
@@ -900,41 +1231,60 @@ class PostConfig(APIView):
 
 
 class ColorPremium(APIView):
+    @cached_response(CARS)
     def get(self, request):
-        since = timezone.now() - timedelta(days=30)
-        qs = Car.objects.filter(created_at__gte=since, price__gt=0).exclude(color__in=['', None])
-        overall = qs.aggregate(a=Avg('price'))['a']
-        rows = (qs.values('color')
-                  .annotate(count=Count('car_id'), avg_price=Avg('price'))
-                  .filter(count__gte=15)
-                  .order_by('-avg_price')[:8])
+        since, _ = _rollup_windows(30)
+        with connection.cursor() as cur:
+            cur.execute("""
+                SELECT color, SUM(cnt), SUM(price_sum)
+                FROM marketplace.market_stats_daily
+                WHERE day >= %s AND color <> ''
+                GROUP BY color
+            """, [since])
+            rows = cur.fetchall()
+        n_all = sum(r[1] for r in rows)
+        overall = float(sum(r[2] for r in rows)) / n_all if n_all else None
+        rows = sorted(
+            ((color, count, float(total) / count) for color, count, total in rows if count >= 15),
+            key=lambda r: r[2], reverse=True,
+        )[:8]
         colors = []
-        for r in rows:
-            avg = float(r['avg_price'])
-            pct = round((avg - float(overall)) / float(overall) * 100, 1) if overall else 0
-            colors.append({'color': r['color'], 'count': r['count'],
+        for color, count, avg in rows:
+            pct = round((avg - overall) / overall * 100, 1) if overall else 0
+            colors.append({'color': color, 'count': count,
                            'avg_price': round(avg), 'vs_market_pct': pct})
-        return Response({'colors': colors, 'market_avg': round(float(overall)) if overall else 0})
+        return Response({'colors': colors, 'market_avg': round(overall) if overall else 0})
 
 
 class GearPremium(APIView):
+    @cached_response(CARS)
     def get(self, request):
-        since = timezone.now() - timedelta(days=30)
-        top_brands = [r['brand'] for r in (
-            Car.objects.filter(created_at__gte=since, price__gt=0)
-            .values('brand').annotate(c=Count('car_id')).order_by('-c')[:6]
-        )]
+        since, _ = _rollup_windows(30)
+        with connection.cursor() as cur:
+            cur.execute("""
+                WITH top_brands AS (
+                    SELECT brand FROM marketplace.market_stats_daily
+                    WHERE day >= %s
+                    GROUP BY brand ORDER BY SUM(cnt) DESC LIMIT 6
+                )
+                SELECT brand, gear_type, SUM(cnt), SUM(price_sum)
+                FROM marketplace.market_stats_daily
+                WHERE day >= %s AND gear_type IN ('AT', 'MT')
+                  AND brand IN (SELECT brand FROM top_brands)
+                GROUP BY brand, gear_type
+            """, [since, since])
+            split = {}
+            for brand, gear, count, total in cur.fetchall():
+                split.setdefault(brand, {})[gear] = (float(total) / count, count)
         brands_data = []
-        for brand in top_brands:
-            qs = Car.objects.filter(brand=brand, created_at__gte=since, price__gt=0)
-            at = qs.filter(gear_type='Automatic').aggregate(a=Avg('price'), c=Count('car_id'))
-            mt = qs.filter(gear_type='Manual').aggregate(a=Avg('price'), c=Count('car_id'))
-            if at['a'] and mt['a'] and at['c'] >= 3 and mt['c'] >= 3:
+        for brand, gears in split.items():
+            at, mt = gears.get('AT'), gears.get('MT')
+            if at and mt and at[1] >= 3 and mt[1] >= 3:
                 brands_data.append({
                     'brand': brand,
-                    'at_price': round(float(at['a'])), 'at_count': at['c'],
-                    'mt_price': round(float(mt['a'])), 'mt_count': mt['c'],
-                    'premium_pct': round((float(at['a']) - float(mt['a'])) / float(mt['a']) * 100, 1),
+                    'at_price': round(at[0]), 'at_count': at[1],
+                    'mt_price': round(mt[0]), 'mt_count': mt[1],
+                    'premium_pct': round((at[0] - mt[0]) / mt[0] * 100, 1),
                 })
         return Response({'brands': sorted(brands_data, key=lambda x: abs(x['premium_pct']), reverse=True)})
 
@@ -956,26 +1306,22 @@ class AgeDepreciation(APIView):
     ]
 
     def _curve(self, brand, model):
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT year,
-                       COUNT(*) AS cnt,
-                       ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price))::int AS median_price
-                FROM marketplace.cars
-                WHERE brand = %s AND model = %s
-                  AND price BETWEEN 1500 AND 200000
-                  AND mileage BETWEEN 0 AND 400000
-                  AND year BETWEEN 2010 AND 2025
-                GROUP BY year
-                HAVING COUNT(*) >= 10
-                ORDER BY year
-            """, [brand, model])
-            years = [
-                {'year': r[0], 'count': r[1], 'median_price': r[2]}
-                for r in cur.fetchall()
-            ]
+        hists = market_stats.sketches(
+            ['year'],
+            """brand = %s AND model = %s AND year BETWEEN 2010 AND 2025
+               AND km_band BETWEEN %s AND %s""",
+            [brand, model, *market_stats.KM_VALID],
+            low=1500, high=200000,
+        )
+        years = []
+        for (year,), hist in sorted(hists.items()):
+            count = sum(hist.values())
+            if count >= 10:
+                years.append({'year': year, 'count': count,
+                              'median_price': round(market_stats.quantile(hist, 0.5))})
         return years
 
+    @cached_response(CARS)
     def get(self, request):
         brand = request.query_params.get('brand')
         model = request.query_params.get('model')
@@ -1018,6 +1364,7 @@ class BestValue(APIView):
     DISCOUNT_FLOOR = 12   # must be at least this % under peer median to qualify
     DISCOUNT_CAP   = 38   # more than this % under median → almost certainly a scam
 
+    @cached_response(CARS)
     def get(self, request):
         since = timezone.now() - timedelta(days=7)
         with connection.cursor() as cur:
@@ -1065,6 +1412,7 @@ class GearPriceSplit(APIView):
     """
     GEAR_LABEL = {'AT': 'Automatic', 'MT': 'Manual', 'DSG': 'Dual-clutch', 'CVT': 'CVT'}
 
+    @cached_response(CARS)
     def get(self, request):
         brand = request.query_params.get('brand', 'Chevrolet')
         model = request.query_params.get('model', 'Spark')
@@ -1072,28 +1420,27 @@ class GearPriceSplit(APIView):
             days = int(request.query_params.get('days', 7))
         except (TypeError, ValueError):
             days = 7
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT gear_type,
-                       COUNT(*) AS cnt,
-                       ROUND(PERCENTILE_CONT(0.5)  WITHIN GROUP (ORDER BY price))::int AS median,
-                       ROUND(PERCENTILE_CONT(0.1)  WITHIN GROUP (ORDER BY price))::int AS low,
-                       ROUND(PERCENTILE_CONT(0.9)  WITHIN GROUP (ORDER BY price))::int AS high
-                FROM marketplace.cars
-                WHERE brand = %s AND model = %s
-                  AND gear_type IN ('AT', 'MT', 'DSG', 'CVT')
-                  AND price BETWEEN 1500 AND 200000
-                  AND mileage BETWEEN 0 AND 400000
-                  AND created_at >= NOW() - INTERVAL '1 day' * %s
-                GROUP BY gear_type
-                HAVING COUNT(*) >= 3
-                ORDER BY median
-            """, [brand, model, days])
-            gears = [
-                {'gear': r[0], 'label': self.GEAR_LABEL.get(r[0], r[0]),
-                 'count': r[1], 'median': r[2], 'low': r[3], 'high': r[4]}
-                for r in cur.fetchall()
-            ]
+        since, _ = _rollup_windows(days)
+        hists = market_stats.sketches(
+            ['gear_type'],
+            """brand = %s AND model = %s AND day >= %s
+               AND gear_type IN ('AT', 'MT', 'DSG', 'CVT')
+               AND km_band BETWEEN %s AND %s""",
+            [brand, model, since, *market_stats.KM_VALID],
+            low=1500, high=200000,
+        )
+        gears = []
+        for (gear,), hist in hists.items():
+            count = sum(hist.values())
+            if count < 3:
+                continue
+            gears.append({
+                'gear': gear, 'label': self.GEAR_LABEL.get(gear, gear), 'count': count,
+                'median': round(market_stats.quantile(hist, 0.5)),
+                'low':    round(market_stats.quantile(hist, 0.1)),
+                'high':   round(market_stats.quantile(hist, 0.9)),
+            })
+        gears.sort(key=lambda g: g['median'])
         return Response({'brand': brand, 'model': model, 'days': days, 'gears': gears})
 
 
@@ -1106,26 +1453,22 @@ class SeasonalTrends(APIView):
 
     Query params: brand, model (default: a high-volume popular model).
     """
+    @cached_response(CARS)
     def get(self, request):
         brand = request.query_params.get('brand', 'Chevrolet')
         model = request.query_params.get('model', 'Cobalt')
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT to_char(date_trunc('month', created_at), 'YYYY-MM') AS month,
-                       COUNT(*) AS cnt,
-                       ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price))::int AS median_price
-                FROM marketplace.cars
-                WHERE brand = %s AND model = %s
-                  AND price BETWEEN 1500 AND 200000
-                  AND mileage BETWEEN 0 AND 400000
-                GROUP BY 1
-                HAVING COUNT(*) >= 15
-                ORDER BY 1
-            """, [brand, model])
-            months = [
-                {'month': r[0], 'count': r[1], 'median_price': r[2]}
-                for r in cur.fetchall()
-            ]
+        hists = market_stats.sketches(
+            ["to_char(date_trunc('month', day), 'YYYY-MM')"],
+            "brand = %s AND model = %s AND km_band BETWEEN %s AND %s",
+            [brand, model, *market_stats.KM_VALID],
+            low=1500, high=200000,
+        )
+        months = []
+        for (month,), hist in sorted(hists.items()):
+            count = sum(hist.values())
+            if count >= 15:
+                months.append({'month': month, 'count': count,
+                               'median_price': round(market_stats.quantile(hist, 0.5))})
         cheapest = min(months, key=lambda m: m['median_price']) if months else None
         priciest = max(months, key=lambda m: m['median_price']) if months else None
         return Response({
@@ -1135,8 +1478,9 @@ class SeasonalTrends(APIView):
 
 
 class MarketBreadth(APIView):
+    @cached_response(CARS)
     def get(self, request):
-        since = timezone.now() - timedelta(days=7)
+        since, _ = _rollup_windows(7)
         bands = [
             ('Under $5k',   0,     5000),
             ('$5k-$10k',   5000,  10000),
@@ -1144,10 +1488,11 @@ class MarketBreadth(APIView):
             ('$20k-$30k', 20000,  30000),
             ('Over $30k',  30000, 9999999),
         ]
+        hist = market_stats.sketches([], 'day >= %s', [since]).get((), {})
         result = []
         for label, low, high in bands:
-            count = Car.objects.filter(
-                created_at__gte=since, price__gt=low, price__lte=high).count()
+            lo_bucket, hi_bucket = market_stats.bucket_range(low, high)
+            count = sum(n for b, n in hist.items() if lo_bucket <= b <= hi_bucket)
             result.append({'label': label, 'count': count, 'low': low, 'high': high})
         total = sum(b['count'] for b in result)
         for b in result:
@@ -1156,29 +1501,43 @@ class MarketBreadth(APIView):
 
 
 class MileageDepreciation(APIView):
+    """Price lost per 10k km for a set of models — one grouped query.
+
+    Slope, intercept and R² of price ~ mileage come from Postgres
+    regr_slope / regr_intercept / regr_r2 grouped per model, so cost does
+    not grow with the number of listings.
+
+    Query params: models=Brand:Model,Brand:Model,... (default: TOP_MODELS).
+    """
+    TOP_MODELS = [
+        ('Chevrolet', 'Lacetti'), ('Chevrolet', 'Cobalt'), ('Chevrolet', 'Spark'),
+        ('BYD', 'Song'), ('Hyundai', 'Elantra'), ('Kia', 'Sportage'),
+    ]
+    MIN_LISTINGS = 15
+
+    @cached_response(CARS)
     def get(self, request):
-        top_models = [
-            ('Chevrolet', 'Lacetti'), ('Chevrolet', 'Cobalt'), ('Chevrolet', 'Spark'),
-            ('BYD', 'Song'), ('Hyundai', 'Elantra'), ('Kia', 'Sportage'),
-        ]
+        try:
+            pairs = _model_pairs(request.query_params.get('models')) or self.TOP_MODELS
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        rows = (
+            Car.objects.filter(_pairs_q(pairs), price__gt=0, mileage__gt=0)
+            .values('brand', 'model')
+            .annotate(n=Count('car_id'), avg_price=Avg('price'),
+                      slope=RegrSlope('price', 'mileage'),
+                      intercept=RegrIntercept('price', 'mileage'),
+                      r2=RegrR2('price', 'mileage'))
+            .filter(n__gte=self.MIN_LISTINGS)
+        )
         result = []
-        for brand, model in top_models:
-            rows = list(
-                Car.objects.filter(brand=brand, model=model, price__gt=0, mileage__gt=0)
-                .values_list('price', 'mileage')
-            )
-            if len(rows) < 15:
-                continue
-            prices = [float(r[0]) for r in rows]
-            kms    = [float(r[1]) for r in rows]
-            n = len(rows)
-            mp, mk = sum(prices)/n, sum(kms)/n
-            cov = sum((p-mp)*(k-mk) for p,k in zip(prices,kms)) / n
-            var = sum((k-mk)**2 for k in kms) / n
-            slope = cov/var if var > 0 else 0
-            result.append({'brand': brand, 'model': model,
+        for r in rows:
+            slope = r['slope'] or 0
+            result.append({'brand': r['brand'], 'model': r['model'],
                            'price_per_10k_km': round(slope * 10000),
-                           'count': n, 'avg_price': round(mp)})
+                           'intercept': round(r['intercept']) if r['intercept'] is not None else None,
+                           'r2': round(r['r2'], 4) if r['r2'] is not None else None,
+                           'count': r['n'], 'avg_price': round(r['avg_price'])})
         return Response({'models': sorted(result, key=lambda x: x['price_per_10k_km'])})
 
 
@@ -1233,164 +1592,6 @@ class ScraperRunDetailView(APIView):
         return Response({'ok': True})
 
 
-import re as _re
-
-def _normalize_iphone_model(raw: str) -> str:
-    """iPhone 12Pro Max → iPhone 12 Pro Max."""
-    s = raw.strip()
-    s = _re.sub(r'(\d)(Pro|Mini|Plus|Max)', r'\1 \2', s)
-    s = _re.sub(r'(Pro)(Max)', r'\1 \2', s)
-    s = _re.sub(r'\s+', ' ', s)
-    return s
-
-
-def _normalize_macbook_model(raw: str) -> str:
-    """
-    Canonical form: MacBook [Air|Pro] [chip]
-      MacBook M1 PRO        → MacBook Pro M1
-      MacBook M2 PRO        → MacBook Pro M2
-      MacBook M3 MAX        → MacBook Pro M3 Max
-      MacBook M4 MAX        → MacBook Pro M4 Max
-      MacBook Air M1        → MacBook Air M1
-      MacBook Air M4 MAX    → MacBook Air M4 Max   (chip from specs)
-      MacBook Pro M4 PRO    → MacBook Pro M4 Pro   (chip from specs)
-      MacBook Pro M3 MAX    → MacBook Pro M3 Max
-      MacBook Air (Intel)   → MacBook Air (Intel)
-      MacBook Air M5        → MacBook Air M5
-    """
-    s = raw.strip()
-    # Title-case chip qualifiers ("M4 MAX" → "M4 Max", "M4 PRO" → "M4 Pro")
-    s = _re.sub(r'\bPRO\b', 'Pro', s)
-    s = _re.sub(r'\bMAX\b', 'Max', s)
-    # Bare-chip titles without Air/Pro segment default to the Pro line:
-    # "MacBook M1 Pro" / "MacBook M2 Pro" → "MacBook Pro M1/M2"
-    s = _re.sub(r'^MacBook\s+(M\d)\s+Pro$', r'MacBook Pro \1', s)
-    # "MacBook M3 Max" / "MacBook M4 Max" → "MacBook Pro M3/M4 Max"
-    s = _re.sub(r'^MacBook\s+(M\d)\s+Max$', r'MacBook Pro \1 Max', s)
-    # Uppercase a lowercase chip prefix recovered from a title ("m5" -> "M5")
-    s = _re.sub(r'\bm([1-9])\b', lambda m: 'M' + m.group(1), s)
-    s = _re.sub(r'\s+', ' ', s)
-    return s
-
-
-def _normalize_gpu_model(raw: str) -> str:
-    """
-    Canonical form: [GTX|RTX|RX] [number] [Ti|Super|XT]
-      RX580         → RX 580
-      RTX3060TI     → RTX 3060 Ti
-      GTX 1050 TI   → GTX 1050 Ti
-      RTX2060SUPER  → RTX 2060 Super
-      RX 5700XT     → RX 5700 XT
-      RX9070XT      → RX 9070 XT
-    """
-    s = raw.strip()
-    # Uppercase the series prefix
-    s = _re.sub(r'\b(gtx|rtx|rx)\b', lambda m: m.group().upper(), s, flags=_re.IGNORECASE)
-    # Insert space between series and number: "RTX3080" → "RTX 3080"
-    s = _re.sub(r'(GTX|RTX|RX)(\d)', r'\1 \2', s)
-    # Insert space between number and suffix: "3060TI" → "3060 TI"
-    s = _re.sub(r'(\d)(TI|SUPER|XT)\b', r'\1 \2', s, flags=_re.IGNORECASE)
-    # Normalise suffix case
-    s = _re.sub(r'\bTI\b',    'Ti',    s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\bSUPER\b', 'Super', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\bxt\b',    'XT',    s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\s+', ' ', s)
-    return s
-
-
-def _normalize_ssd_model(raw: str) -> str:
-    """NVMe 512GB, SATA 1TB — keep interface + capacity."""
-    s = raw.strip().upper()
-    s = _re.sub(r'ГБ', 'GB', s)
-    s = _re.sub(r'ТБ', 'TB', s)
-    s = _re.sub(r'\bM\.2\b|\bPCIE\b', 'NVMe', s)
-    s = _re.sub(r'\s+', ' ', s)
-    return s.strip()
-
-
-def _normalize_ram_model(raw: str) -> str:
-    """Group by DDR generation + total capacity, stripping speeds (MHz).
-
-    DDR4 3200      → DDR4        (3200 is a speed, no GB suffix)
-    DDR4 3200 8GB  → DDR4 8GB    (strip speed, keep capacity)
-    DDR4 2         → DDR4        (truncated kit notation, no GB)
-    DDR4 2x8GB     → DDR4 16GB   (kit: 2 x 8 = 16)
-    DDR 3 8GB      → DDR3 8GB    (fix spurious space)
-    DDR5 5600      → DDR5        (5600 is a speed, no GB suffix)
-    """
-    s = raw.strip().upper()
-    s = s.replace('ГБ', 'GB').replace('МГЦ', 'MHZ')
-    # Fix "DDR 3" → "DDR3", "DDR 4" → "DDR4"
-    s = _re.sub(r'\bDDR\s+([2345])\b', r'DDR\1', s)
-    # Extract DDR generation
-    gen_m = _re.search(r'DDR([2345]?)', s)
-    gen = gen_m.group(1) if gen_m and gen_m.group(1) else ''
-    # Kit notation: 2x8GB → 16GB, 2x16GB → 32GB
-    kit = _re.search(r'(\d+)\s*[Xx]\s*(\d+)\s*GB', s)
-    if kit:
-        total = int(kit.group(1)) * int(kit.group(2))
-        if total <= 512:
-            return f"DDR{gen} {total}GB"
-    # Plain capacity: 8GB, 16GB — must be ≤512 to exclude speeds (1600/3200/5600)
-    cap = _re.search(r'(\d+)\s*GB', s)
-    if cap:
-        n = int(cap.group(1))
-        if n <= 512:
-            return f"DDR{gen} {n}GB"
-    # Fallback: just the generation type
-    return f"DDR{gen}" if gen else 'RAM'
-
-
-def _normalize_cpu_model(raw: str) -> str:
-    """Intel Core I5-12400 → Intel Core i5-12400 | AMD Ryzen 5 5600X → AMD Ryzen 5 5600X"""
-    s = raw.strip()
-    # Normalize iX casing: "I5-" or "I5 " → "i5-"
-    s = _re.sub(r'\bI([3579])([\s\-])', lambda m: f'i{m.group(1)}-', s)
-    # Also catch trailing "I5" with no separator followed by digits: "I5 12400" → "i5-12400"
-    s = _re.sub(r'\bi([3579])\s+(\d)', lambda m: f'i{m.group(1)}-{m.group(2)}', s)
-    # Uppercase the suffix letters after model number: "i7-14700kf"/"i7-14700Kf" → "i7-14700KF"
-    s = _re.sub(r'(i[3579]-\d{4,5})([A-Za-z]+)', lambda m: m.group(1) + m.group(2).upper(), s)
-    # Normalize Ryzen casing
-    s = _re.sub(r'\bRyzen\b', 'Ryzen', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\bCore\b', 'Core', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\bIntel\b', 'Intel', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\bAMD\b', 'AMD', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\s+', ' ', s)
-    return s.strip()
-
-
-def _normalize_console_model(raw: str) -> str:
-    """PlayStation 5 Slim → PlayStation 5 Slim, Xbox Series X → Xbox Series X"""
-    s = raw.strip()
-    # Expand PS4/PS5 shorthand
-    s = _re.sub(r'\bPS([345])\b', r'PlayStation \1', s, flags=_re.IGNORECASE)
-    s = _re.sub(r'\s+', ' ', s)
-    return s
-
-
-_NORMALIZERS = {
-    'iphone':  _normalize_iphone_model,
-    'macbook': _normalize_macbook_model,
-    'gpu':     _normalize_gpu_model,
-    'ram':     _normalize_ram_model,
-    'cpu':     _normalize_cpu_model,
-    'console': _normalize_console_model,
-    'ssd':     _normalize_ssd_model,
-}
-
-# Generic words that are too broad to be useful model names (per category)
-_SKIP_MODELS = {
-    'iphone':  {'iPhone', 'Apple'},
-    'macbook': {'MacBook', 'Apple'},
-    'gpu':     {'GPU', 'Видеокарта', 'video karta'},
-    'ipad':    {'iPad', 'Apple'},
-    'ram':     {'RAM', 'None', 'ОЗУ', 'DDR'},
-    'cpu':     {'CPU', 'None', 'Процессор', 'Intel Core', 'AMD Ryzen', 'AMD'},
-    'console': {'Console', 'None', 'Приставка', 'Игровая приставка'},
-    'ssd':     {'SSD', 'None'},
-}
-
-
 class ElectronicsReport(APIView):
     """
     GET /api/electronics/report/?category=iphone|macbook|gpu|ipad|ram|cpu
@@ -1427,14 +1628,12 @@ class ElectronicsReport(APIView):
         'ssd':     2,
     }
 
+    @cached_response(ELECTRONICS)
     def get(self, request):
-        uzs_rate  = _get_uzs_rate()
         category  = request.query_params.get('category', 'iphone')
         max_usd   = self.MAX_USD.get(category, 4000)
         min_usd   = self.MIN_USD.get(category, 50)
         min_count = self.MIN_COUNT.get(category, 2)
-        skip      = _SKIP_MODELS.get(category, set())
-        normalize = _NORMALIZERS.get(category, lambda x: x.strip())
         try:
             days = int(request.query_params.get('days', 0))
         except (TypeError, ValueError):
@@ -1442,204 +1641,54 @@ class ElectronicsReport(APIView):
         if days < 0:
             days = 0
 
+        # canonical_model / is_damaged / price_usd_at_ingest are set at ingest
+        # (cars/electronics_labels.py), so this is one grouped index scan.
         with connection.cursor() as cur:
             cur.execute("""
-                WITH base AS (
-                    SELECT
-                        CASE
-                          -- 1) chip from structured specs (most reliable)
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND specs IS NOT NULL
-                               AND specs->>'chip' IS NOT NULL
-                               AND specs->>'chip' != ''
-                          THEN model || ' ' || (specs->>'chip')
-                          -- 2) chip recovered from the title (e.g. M5 listings the
-                          --    scraper mislabelled as Intel) -> "MacBook Pro M5 [Pro|Max]"
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND title ~* '\\mM[1-9]\\M'
-                          THEN model || ' '
-                               || upper(substring(title from '(?i)\\mM[1-9]\\M'))
-                               || COALESCE(
-                                    ' ' || initcap((regexp_match(
-                                        title, '(?i)M[1-9]\\s*(pro|max)'))[1]),
-                                    '')
-                          -- 3) genuinely Intel (no chip anywhere)
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                          THEN model || ' (Intel)'
-                          -- 4) RAM: model has no GB suffix but specs has capacity
-                          --    e.g. model='DDR4 3200', specs capacity_gb=8 → 'DDR4 8GB'
-                          --    Only when DDR generation is known AND capacity <= 64GB
-                          WHEN %s = 'ram'
-                               AND model NOT LIKE '%%GB'
-                               AND model NOT LIKE '%%ГБ'
-                               AND specs IS NOT NULL
-                               AND (specs->>'capacity_gb') IS NOT NULL
-                               AND (specs->>'capacity_gb')::int BETWEEN 1 AND 64
-                               AND (regexp_match(model, 'DDR\\s*([2-5])'))[1] IS NOT NULL
-                          THEN 'DDR' || (regexp_match(model, 'DDR\\s*([2-5])'))[1]
-                               || ' ' || (specs->>'capacity_gb')::int || 'GB'
-                          -- 5) CPU: resolve bare 'Intel Core'/'AMD Ryzen' labels.
-                          --    Prefer structured specs.model_id, then recover the
-                          --    model from the title (Core Ultra, iN-NNNN, Xeon).
-                          --    Anything still bare falls through to 'Intel Core'/
-                          --    'AMD Ryzen'/'AMD' and is dropped via _SKIP_MODELS['cpu'].
-                          WHEN %s = 'cpu'
-                               AND model IN ('Intel Core', 'AMD Ryzen', 'Intel Xeon', 'AMD')
-                          THEN CASE
-                                 WHEN specs IS NOT NULL
-                                      AND COALESCE(specs->>'model_id', '') != ''
-                                   THEN model || ' ' || (specs->>'model_id')
-                                 WHEN title ~* '\\multra\\s+[3579]\\s*[0-9]{3}'
-                                   THEN 'Intel Core Ultra '
-                                        || (regexp_match(title, '(?i)ultra\\s+([3579])\\s*([0-9]{3}[a-z]*)'))[1]
-                                        || ' '
-                                        || upper((regexp_match(title, '(?i)ultra\\s+([3579])\\s*([0-9]{3}[a-z]*)'))[2])
-                                 WHEN title ~* '\\mxeon\\M'
-                                   THEN 'Intel Xeon'
-                                 WHEN title ~* '\\mi[3579][\\s-]?[0-9]{4}'
-                                   THEN 'Intel Core i'
-                                        || (regexp_match(title, '(?i)\\mi([3579])[\\s-]?([0-9]{4,5}[a-z]*)'))[1]
-                                        || '-'
-                                        || upper((regexp_match(title, '(?i)\\mi([3579])[\\s-]?([0-9]{4,5}[a-z]*)'))[2])
-                                 ELSE model
-                               END
-                          ELSE model
-                        END AS model,
-                        CASE WHEN price_currency = 'USD' THEN price::numeric
-                             ELSE price::numeric / %s END AS price_usd,
-                        (
-                          lower(title) LIKE '%%разбит%%' OR lower(title) LIKE '%%слом%%' OR
-                          lower(title) LIKE '%%запчаст%%' OR lower(title) LIKE '%%ремонт%%' OR
-                          lower(title) LIKE '%%не работ%%' OR lower(title) LIKE '%%не включ%%' OR
-                          lower(title) LIKE '%%дефект%%'  OR lower(title) LIKE '%%трещин%%' OR
-                          lower(title) LIKE '%%поломк%%'  OR lower(title) LIKE '%%без дисплея%%' OR
-                          lower(title) LIKE '%%без аккумулятора%%' OR
-                          lower(title) LIKE '%%broken%%'  OR lower(title) LIKE '%%damaged%%' OR
-                          lower(title) LIKE '%%for parts%%' OR lower(title) LIKE '%%repair%%' OR
-                          lower(title) LIKE '%%defect%%'  OR
-                          lower(title) LIKE '%%buzilgan%%' OR lower(title) LIKE '%%singan%%' OR
-                          lower(title) LIKE '%%nosoz%%'   OR lower(title) LIKE '%%ehtiyot qism%%'
-                        ) AS is_damaged
-                    FROM marketplace.electronics
-                    WHERE category = %s
-                      AND model IS NOT NULL AND model != '' AND price > 0
-                      AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
-                ),
-                filtered AS (
-                    SELECT model, price_usd, is_damaged FROM base
-                    WHERE price_usd BETWEEN %s AND %s
-                )
-                SELECT model,
+                SELECT canonical_model AS model,
                     is_damaged,
-                    COUNT(*)                                                       AS cnt,
-                    ROUND(MIN(price_usd))                                          AS raw_min,
-                    ROUND(MAX(price_usd))                                          AS raw_max,
-                    ROUND(PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY price_usd)) AS min_usd,
-                    ROUND(PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY price_usd)) AS max_usd,
-                    ROUND(AVG(price_usd))                                          AS avg_usd
-                FROM filtered
-                GROUP BY model, is_damaged
+                    COUNT(*)                                                                 AS cnt,
+                    ROUND(MIN(price_usd_at_ingest))                                          AS raw_min,
+                    ROUND(MAX(price_usd_at_ingest))                                          AS raw_max,
+                    ROUND(PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY price_usd_at_ingest)) AS min_usd,
+                    ROUND(PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY price_usd_at_ingest)) AS max_usd,
+                    ROUND(AVG(price_usd_at_ingest))                                          AS avg_usd
+                FROM marketplace.electronics
+                WHERE category = %s
+                  AND canonical_model IS NOT NULL
+                  AND price_usd_at_ingest BETWEEN %s AND %s
+                  AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
+                GROUP BY canonical_model, is_damaged
                 HAVING COUNT(*) >= %s
-                ORDER BY AVG(price_usd)
-            """, [category, category, category, category, category, uzs_rate, category,
-                  days, days, min_usd, max_usd, min_count])
+                ORDER BY AVG(price_usd_at_ingest)
+            """, [category, min_usd, max_usd, days, days, min_count])
             cols = [c[0] for c in cur.description]
             rows = [dict(zip(cols, r)) for r in cur.fetchall()]
 
-        # Split normal vs damaged, normalise + merge duplicates, drop generic buckets
-        merged: dict[str, dict] = {}
-        damaged: dict[str, dict] = {}
-        for r in rows:
-            if r['model'] in skip:
-                continue
-            key = normalize(r['model'])
-            if r['is_damaged']:
-                # damaged listings: report raw min/max (full spread), not percentiles
-                d = damaged.setdefault(key, {'model': key, 'cnt': 0,
-                                             'min_usd': r['raw_min'],
-                                             'max_usd': r['raw_max']})
-                d['cnt']     += r['cnt']
-                d['min_usd']  = min(d['min_usd'], r['raw_min'])
-                d['max_usd']  = max(d['max_usd'], r['raw_max'])
-                continue
-            if key not in merged:
-                merged[key] = {'model': key, 'cnt': 0,
-                               'min_usd': r['min_usd'], 'max_usd': r['max_usd'],
-                               'avg_usd': r['avg_usd']}
-            m = merged[key]
-            m['cnt']     += r['cnt']
-            m['min_usd']  = min(m['min_usd'], r['min_usd'])
-            m['max_usd']  = max(m['max_usd'], r['max_usd'])
-            # recalculate avg as weighted average
-            total_old = m['cnt'] - r['cnt']
-            m['avg_usd'] = round(
-                (m['avg_usd'] * total_old + r['avg_usd'] * r['cnt']) / m['cnt']
-            ) if m['cnt'] else r['avg_usd']
-
-        result          = sorted(merged.values(),  key=lambda x: x['avg_usd'])
-        damaged_result  = sorted(damaged.values(), key=lambda x: x['min_usd'])
+        # damaged listings: report raw min/max (full spread), not percentiles
+        result = [{k: r[k] for k in ('model', 'cnt', 'min_usd', 'max_usd', 'avg_usd')}
+                  for r in rows if r['is_damaged'] is False]
+        damaged_result = sorted(
+            ({'model': r['model'], 'cnt': r['cnt'], 'min_usd': r['raw_min'], 'max_usd': r['raw_max']}
+             for r in rows if r['is_damaged']),
+            key=lambda x: x['min_usd'])
 
         # Individual broken / for-parts listings (no count threshold) so they can
-        # be surfaced separately instead of disappearing into the aggregate. Uses
-        # the SAME damage keyword set as the base CTE above, so every listing that
-        # is excluded from the main report shows up here with its title and price.
+        # be surfaced separately instead of disappearing into the aggregate.
         with connection.cursor() as cur:
             cur.execute("""
-                WITH with_chip AS (
-                    SELECT
-                        CASE
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND specs IS NOT NULL
-                               AND specs->>'chip' IS NOT NULL
-                               AND specs->>'chip' != ''
-                          THEN model || ' ' || (specs->>'chip')
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND title ~* '\\mM[1-9]\\M'
-                          THEN model || ' '
-                               || upper(substring(title from '(?i)\\mM[1-9]\\M'))
-                               || COALESCE(
-                                    ' ' || initcap((regexp_match(
-                                        title, '(?i)M[1-9]\\s*(pro|max)'))[1]),
-                                    '')
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                          THEN model || ' (Intel)'
-                          ELSE model
-                        END AS model,
-                        title,
-                        CASE WHEN price_currency = 'USD' THEN price::numeric
-                             ELSE price::numeric / %s END AS price_usd
-                    FROM marketplace.electronics
-                    WHERE category = %s
-                      AND model IS NOT NULL AND model != '' AND price > 0
-                      AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
-                      AND (
-                        lower(title) LIKE '%%разбит%%' OR lower(title) LIKE '%%слом%%' OR
-                        lower(title) LIKE '%%запчаст%%' OR lower(title) LIKE '%%ремонт%%' OR
-                        lower(title) LIKE '%%не работ%%' OR lower(title) LIKE '%%не включ%%' OR
-                        lower(title) LIKE '%%дефект%%'  OR lower(title) LIKE '%%трещин%%' OR
-                        lower(title) LIKE '%%поломк%%'  OR lower(title) LIKE '%%без дисплея%%' OR
-                        lower(title) LIKE '%%без аккумулятора%%' OR
-                        lower(title) LIKE '%%broken%%'  OR lower(title) LIKE '%%damaged%%' OR
-                        lower(title) LIKE '%%for parts%%' OR lower(title) LIKE '%%repair%%' OR
-                        lower(title) LIKE '%%defect%%'  OR
-                        lower(title) LIKE '%%buzilgan%%' OR lower(title) LIKE '%%singan%%' OR
-                        lower(title) LIKE '%%nosoz%%'   OR lower(title) LIKE '%%ehtiyot qism%%'
-                      )
-                )
-                SELECT model, title, ROUND(price_usd) AS price_usd
-                FROM with_chip
-                ORDER BY price_usd
-            """, [category, category, category, uzs_rate, category, days, days])
+                SELECT COALESCE(canonical_model, model), title, ROUND(price_usd_at_ingest)
+                FROM marketplace.electronics
+                WHERE category = %s
+                  AND is_damaged
+                  AND model IS NOT NULL AND model != '' AND price_usd_at_ingest > 0
+                  AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
+                ORDER BY price_usd_at_ingest
+            """, [category, days, days])
             broken_rows = cur.fetchall()
 
         broken_listings = [
-            {'model': normalize(r[0]), 'title': r[1], 'price_usd': int(r[2] or 0)}
+            {'model': r[0], 'title': r[1], 'price_usd': int(r[2] or 0)}
             for r in broken_rows
         ]
 
@@ -1651,23 +1700,36 @@ class ElectronicsReport(APIView):
 
 class ElectronicsListings(APIView):
     """
-    GET /api/electronics/listings/?category=macbook&model_label=MacBook+Air+M1&days=7&page=0
+    GET /api/electronics/listings/?category=macbook&model_label=MacBook+Air+M1&days=7[&cursor=...]
+
+    Returns individual listings (title, price, source url) for one display
+    model, cheapest first, filtered on the same ingest-time canonical_model,
+    price band and damage flag as ElectronicsReport, so the listing set
+    matches the count shown in the report.
 
-    Returns paginated individual listings (title, price, source url) for one
-    display model, using the SAME chip-resolution + normalization + price-band +
-    damage filtering as ElectronicsReport, so the listing set matches the count
-    shown in the report.
+    Keyset-paginated on (price_usd_at_ingest, ad_id): pass the returned
+    `next_cursor` back as ?cursor= for the next PAGE_SIZE listings. `total`
+    and `pages` come from a count cached until the next electronics ingest,
+    so a page costs one index range scan however deep it is.
     """
     PAGE_SIZE = 5
 
+    @staticmethod
+    def _encode_cursor(price_usd, ad_id):
+        payload = {"p": str(price_usd), "i": ad_id}
+        return base64.urlsafe_b64encode(_json.dumps(payload).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        payload = _json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return Decimal(payload["p"]), str(payload["i"])
+
+    @cached_response(ELECTRONICS)
     def get(self, request):
         category    = request.query_params.get('category', 'iphone')
         model_label = (request.query_params.get('model_label') or '').strip()
         max_usd     = ElectronicsReport.MAX_USD.get(category, 4000)
         min_usd     = ElectronicsReport.MIN_USD.get(category, 50)
-        uzs_rate    = _get_uzs_rate()
-        skip        = _SKIP_MODELS.get(category, set())
-        normalize   = _NORMALIZERS.get(category, lambda x: x.strip())
 
         try:
             days = int(request.query_params.get('days', 0))
@@ -1675,120 +1737,55 @@ class ElectronicsListings(APIView):
             days = 0
         if days < 0:
             days = 0
-        try:
-            page = int(request.query_params.get('page', 0))
-        except (TypeError, ValueError):
-            page = 0
-        if page < 0:
-            page = 0
 
         if not model_label:
-            return Response({'total': 0, 'page': 0, 'pages': 0, 'listings': []})
+            return Response({'total': 0, 'pages': 0, 'listings': [], 'next_cursor': None})
+
+        where = """
+                WHERE category = %s
+                  AND canonical_model = %s
+                  AND NOT is_damaged
+                  AND price_usd_at_ingest BETWEEN %s AND %s
+                  AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
+        """
+        filters = [category, model_label, min_usd, max_usd, days, days]
+
+        cursor = request.query_params.get('cursor')
+        after, position = '', []
+        if cursor:
+            try:
+                position = list(self._decode_cursor(cursor))
+            except (ValueError, KeyError, TypeError, ArithmeticError):
+                return Response({'error': 'invalid cursor'}, status=400)
+            after = 'AND (price_usd_at_ingest, ad_id) > (%s, %s)'
 
         with connection.cursor() as cur:
-            cur.execute("""
-                WITH base AS (
-                    SELECT
-                        CASE
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND specs IS NOT NULL
-                               AND specs->>'chip' IS NOT NULL
-                               AND specs->>'chip' != ''
-                          THEN model || ' ' || (specs->>'chip')
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                               AND title ~* '\\mM[1-9]\\M'
-                          THEN model || ' '
-                               || upper(substring(title from '(?i)\\mM[1-9]\\M'))
-                               || COALESCE(
-                                    ' ' || initcap((regexp_match(
-                                        title, '(?i)M[1-9]\\s*(pro|max)'))[1]),
-                                    '')
-                          WHEN %s = 'macbook'
-                               AND model IN ('MacBook Air', 'MacBook Pro')
-                          THEN model || ' (Intel)'
-                          -- CPU: resolve bare 'Intel Core'/'AMD Ryzen' labels — must
-                          -- match ElectronicsReport exactly (model_id, then title).
-                          WHEN %s = 'cpu'
-                               AND model IN ('Intel Core', 'AMD Ryzen', 'Intel Xeon', 'AMD')
-                          THEN CASE
-                                 WHEN specs IS NOT NULL
-                                      AND COALESCE(specs->>'model_id', '') != ''
-                                   THEN model || ' ' || (specs->>'model_id')
-                                 WHEN title ~* '\\multra\\s+[3579]\\s*[0-9]{3}'
-                                   THEN 'Intel Core Ultra '
-                                        || (regexp_match(title, '(?i)ultra\\s+([3579])\\s*([0-9]{3}[a-z]*)'))[1]
-                                        || ' '
-                                        || upper((regexp_match(title, '(?i)ultra\\s+([3579])\\s*([0-9]{3}[a-z]*)'))[2])
-                                 WHEN title ~* '\\mxeon\\M'
-                                   THEN 'Intel Xeon'
-                                 WHEN title ~* '\\mi[3579][\\s-]?[0-9]{4}'
-                                   THEN 'Intel Core i'
-                                        || (regexp_match(title, '(?i)\\mi([3579])[\\s-]?([0-9]{4,5}[a-z]*)'))[1]
-                                        || '-'
-                                        || upper((regexp_match(title, '(?i)\\mi([3579])[\\s-]?([0-9]{4,5}[a-z]*)'))[2])
-                                 ELSE model
-                               END
-                          ELSE model
-                        END AS model,
-                        title,
-                        url,
-                        scraped_at,
-                        CASE WHEN price_currency = 'USD' THEN price::numeric
-                             ELSE price::numeric / %s END AS price_usd,
-                        (
-                          lower(title) LIKE '%%разбит%%' OR lower(title) LIKE '%%слом%%' OR
-                          lower(title) LIKE '%%запчаст%%' OR lower(title) LIKE '%%ремонт%%' OR
-                          lower(title) LIKE '%%не работ%%' OR lower(title) LIKE '%%не включ%%' OR
-                          lower(title) LIKE '%%дефект%%'  OR lower(title) LIKE '%%трещин%%' OR
-                          lower(title) LIKE '%%поломк%%'  OR lower(title) LIKE '%%без дисплея%%' OR
-                          lower(title) LIKE '%%без аккумулятора%%' OR
-                          lower(title) LIKE '%%broken%%'  OR lower(title) LIKE '%%damaged%%' OR
-                          lower(title) LIKE '%%for parts%%' OR lower(title) LIKE '%%repair%%' OR
-                          lower(title) LIKE '%%defect%%'  OR
-                          lower(title) LIKE '%%buzilgan%%' OR lower(title) LIKE '%%singan%%' OR
-                          lower(title) LIKE '%%nosoz%%'   OR lower(title) LIKE '%%ehtiyot qism%%'
-                        ) AS is_damaged
-                    FROM marketplace.electronics
-                    WHERE category = %s
-                      AND model IS NOT NULL AND model != '' AND price > 0
-                      AND (%s = 0 OR scraped_at >= NOW() - INTERVAL '1 day' * %s)
-                )
-                SELECT model, title, url, scraped_at, ROUND(price_usd) AS price_usd
-                FROM base
-                WHERE NOT is_damaged
-                  AND price_usd BETWEEN %s AND %s
-                ORDER BY price_usd
-            """, [category, category, category, category, uzs_rate, category,
-                  days, days, min_usd, max_usd])
+            cur.execute(f"""
+                SELECT price_usd_at_ingest, ad_id, title, url, scraped_at
+                FROM marketplace.electronics
+                {where} {after}
+                ORDER BY price_usd_at_ingest, ad_id
+                LIMIT %s
+            """, filters + position + [self.PAGE_SIZE + 1])
             rows = cur.fetchall()
 
-        # Normalize + match to the requested display model (done in Python to
-        # mirror ElectronicsReport's normalization exactly).
-        matched = []
-        for raw_model, title, url, scraped_at, price_usd in rows:
-            if raw_model in skip:
-                continue
-            if normalize(raw_model) != model_label:
-                continue
-            matched.append({
-                'title': title or '',
-                'price_usd': int(price_usd or 0),
-                'source_url': url or '',
-                'scraped_at': scraped_at.isoformat() if scraped_at else None,
-            })
+        def count():
+            with connection.cursor() as cur:
+                cur.execute(f"SELECT COUNT(*) FROM marketplace.electronics {where}", filters)
+                return cur.fetchone()[0]
 
-        total = len(matched)
-        pages = (total + self.PAGE_SIZE - 1) // self.PAGE_SIZE if total else 0
-        if pages and page >= pages:
-            page = pages - 1
-        start = page * self.PAGE_SIZE
-        listings = matched[start:start + self.PAGE_SIZE]
+        total = cached_value('electronics-listings-total', [ELECTRONICS], filters, count)
+        next_cursor = self._encode_cursor(*rows[self.PAGE_SIZE - 1][:2]) if len(rows) > self.PAGE_SIZE else None
+        listings = [{
+            'title': title or '',
+            'price_usd': int(price_usd.quantize(Decimal(1), ROUND_HALF_UP)),
+            'source_url': url or '',
+            'scraped_at': scraped_at.isoformat() if scraped_at else None,
+        } for price_usd, _, title, url, scraped_at in rows[:self.PAGE_SIZE]]
 
         return Response({
             'total': total,
-            'page': page,
-            'pages': pages,
+            'pages': (total + self.PAGE_SIZE - 1) // self.PAGE_SIZE,
             'listings': listings,
+            'next_cursor': next_cursor,
         })
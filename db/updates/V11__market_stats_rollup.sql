@@ -0,0 +1,44 @@
+-- V11: Materialized market-stats rollup behind the channel analytics endpoints
+-- (BrandRanking, PriceMovers, ColorPremium, GearPremium, MarketBreadth,
+-- SeasonalTrends, AgeDepreciation, GearPriceSplit).
+--
+-- One row per (day, brand, model, year, gear_type, color, km_band) holding the
+-- listing count, the price sum (for exact averages) and a sparse price
+-- histogram used as a percentile sketch: {"<bucket>": count, ...}. Bucket
+-- layout lives in backend/cars/market_stats.py (price_bucket / bucket_bounds).
+--
+-- NULL dimensions are stored as sentinels so they can be part of the key:
+--   year 0, gear_type '', color '', km_band -1 (mileage unknown).
+--
+-- Rows are appended incrementally from marketplace.cars using the car_id
+-- watermark kept in market_stats_state; see `manage.py refresh_market_stats`.
+
+CREATE TABLE IF NOT EXISTS marketplace.market_stats_daily (
+    day         DATE          NOT NULL,
+    brand       VARCHAR(255)  NOT NULL,
+    model       VARCHAR(255)  NOT NULL,
+    year        INT           NOT NULL,
+    gear_type   VARCHAR(10)   NOT NULL,
+    color       VARCHAR(50)   NOT NULL,
+    km_band     SMALLINT      NOT NULL,   -- 1..8 = 50k km bands up to 400k, 0 / 9 out of range
+    cnt         INT           NOT NULL,
+    price_sum   NUMERIC(16, 2) NOT NULL,
+    price_hist  JSONB         NOT NULL,
+    PRIMARY KEY (day, brand, model, year, gear_type, color, km_band)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_stats_brand_model
+    ON marketplace.market_stats_daily (brand, model, day);
+
+CREATE TABLE IF NOT EXISTS marketplace.market_stats_state (
+    name          VARCHAR(50) PRIMARY KEY,
+    last_car_id   BIGINT      NOT NULL DEFAULT 0,
+    refreshed_at  TIMESTAMPTZ
+);
+
+INSERT INTO marketplace.market_stats_state (name, last_car_id)
+VALUES ('market_stats_daily', 0)
+ON CONFLICT (name) DO NOTHING;
+
+GRANT ALL PRIVILEGES ON marketplace.market_stats_daily TO marketplace_user;
+GRANT ALL PRIVILEGES ON marketplace.market_stats_state TO marketplace_user;
@@ -0,0 +1,24 @@
+-- V12: Enforce one row per OLX ad in marketplace.cars.
+--
+-- The Django model has always declared car_ad_id unique, but the column was
+-- added in V5 without a constraint. Bulk ingest (POST /api/cars/bulk/) relies
+-- on INSERT ... ON CONFLICT (car_ad_id), which needs a unique index.
+--
+-- Rows that duplicate an earlier ad keep their data (and any reviews /
+-- favorites pointing at them); only their car_ad_id is cleared so the index
+-- can be built. NULLs do not conflict with each other.
+
+UPDATE marketplace.cars c
+SET car_ad_id = NULL
+FROM (
+    SELECT car_ad_id, MIN(car_id) AS keep_id
+    FROM marketplace.cars
+    WHERE car_ad_id IS NOT NULL
+    GROUP BY car_ad_id
+    HAVING COUNT(*) > 1
+) d
+WHERE c.car_ad_id = d.car_ad_id
+  AND c.car_id <> d.keep_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cars_car_ad_id
+    ON marketplace.cars (car_ad_id);
@@ -0,0 +1,41 @@
+-- V13: Indexes for the car price / analytics read paths.
+--
+-- Until now marketplace.cars only had its primary key and (since V12) the
+-- unique car_ad_id index, so every bot price check and analytics endpoint
+-- scanned the whole table. The access paths are:
+--
+--   SmartPrice        brand = model = year =, created_at >=, price/mileage
+--                     ranges, optional gear_type / color
+--   PriceHistory      brand = model =, created_at >= now-400d, price/mileage
+--                     ranges, optional year / gear_type / color
+--   MileageDepreciation, WeeklyDigest year-ago averages
+--                     brand = model =, created_at range, price > 0
+--   WeeklyDigest, BestValue, /api/cars/ids/?since=
+--                     created_at >= (last week / window) across all models
+--
+-- Every brand/model query discards price <= 0 rows, so the composite
+-- indexes are partial on price > 0. They INCLUDE the columns those queries
+-- filter and aggregate on, so the hot paths can be answered index-only.
+-- created_at follows insertion order closely, so the whole-market time
+-- windows get a small BRIN index instead of another B-tree.
+--
+-- backend/cars/tests/test_query_plans.py fails if any of these queries goes
+-- back to a sequential scan of cars.
+
+-- SmartPrice: exact spec lookup, year equality before the recency range.
+CREATE INDEX IF NOT EXISTS idx_cars_brand_model_year_created
+    ON marketplace.cars (brand, model, year, created_at)
+    INCLUDE (price, mileage, gear_type, color)
+    WHERE price > 0;
+
+-- PriceHistory / MileageDepreciation / year-ago: per-model time range.
+CREATE INDEX IF NOT EXISTS idx_cars_brand_model_created
+    ON marketplace.cars (brand, model, created_at)
+    INCLUDE (price, mileage, year, gear_type, color)
+    WHERE price > 0;
+
+-- Whole-market recent windows.
+CREATE INDEX IF NOT EXISTS idx_cars_created_at_brin
+    ON marketplace.cars USING brin (created_at) WITH (pages_per_range = 32);
+
+ANALYZE marketplace.cars;
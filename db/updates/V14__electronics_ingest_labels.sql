@@ -0,0 +1,23 @@
+-- V14: Ingest-time labels for electronics listings.
+--
+-- ElectronicsReport / ElectronicsListings used to derive the display model
+-- (chip / CPU recovery from specs and title, spelling normalization), the
+-- broken-listing flag (21 title LIKE checks) and the USD price for every row
+-- of the category on every request. The API now computes them once when a
+-- listing is ingested (backend/cars/electronics_labels.py) and the
+-- endpoints group / filter on these columns.
+--
+-- Existing rows are labelled by `manage.py backfill_electronics_labels`;
+-- until then they have is_damaged NULL and are left out of the reports.
+
+ALTER TABLE marketplace.electronics
+    ADD COLUMN IF NOT EXISTS canonical_model     VARCHAR(255),  -- NULL = no usable model
+    ADD COLUMN IF NOT EXISTS is_damaged          BOOLEAN,
+    ADD COLUMN IF NOT EXISTS price_usd_at_ingest NUMERIC(14, 2);
+
+-- Report: GROUP BY canonical_model within a category and USD price band.
+-- Listings: one canonical_model, ordered by price.
+CREATE INDEX IF NOT EXISTS idx_electronics_category_label_price
+    ON marketplace.electronics (category, canonical_model, price_usd_at_ingest)
+    INCLUDE (is_damaged, scraped_at)
+    WHERE canonical_model IS NOT NULL;
@@ -0,0 +1,12 @@
+-- V15: Keyset index for the electronics listings drill-down.
+--
+-- ElectronicsListings pages one canonical_model's undamaged listings in
+-- (price_usd_at_ingest, ad_id) order, resuming from a cursor with
+--     (price_usd_at_ingest, ad_id) > (:price, :ad_id) ... LIMIT n
+-- This index matches that order exactly, so every page is a short range
+-- scan whatever its depth, and the cached total is an index-only count.
+
+CREATE INDEX IF NOT EXISTS idx_electronics_listings_keyset
+    ON marketplace.electronics (category, canonical_model, price_usd_at_ingest, ad_id)
+    INCLUDE (scraped_at)
+    WHERE NOT is_damaged;
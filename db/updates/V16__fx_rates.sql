@@ -0,0 +1,14 @@
+-- V16: Exchange-rate history (Central Bank of Uzbekistan).
+--
+-- Written only by the scheduled refresher (`manage.py refresh_fx_rates`,
+-- backend/cars/fx.py); read by the API to convert UZS prices, using the
+-- rate in force on the listing's own date. rate = UZS per 1 unit of
+-- `currency`, rate_date = the CBU's publication date.
+
+CREATE TABLE IF NOT EXISTS marketplace.fx_rates (
+    currency    VARCHAR(3)     NOT NULL,
+    rate_date   DATE           NOT NULL,
+    rate        NUMERIC(14, 4) NOT NULL,
+    fetched_at  TIMESTAMP      NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (currency, rate_date)
+);
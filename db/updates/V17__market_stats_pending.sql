@@ -0,0 +1,12 @@
+-- V17: Commit-safe watermark for the market-stats rollup (V11).
+--
+-- car_id is drawn from a sequence before the inserting transaction commits,
+-- so a lower car_id can become visible after a higher one. A refresh that
+-- finds other writers in flight no longer advances last_car_id to
+-- MAX(car_id): it records that id as pending_car_id together with the
+-- transaction ids it saw in flight (pg_locks), and the first refresh after
+-- all of those have finished rolls it up. See backend/cars/market_stats.py.
+
+ALTER TABLE marketplace.market_stats_state
+    ADD COLUMN IF NOT EXISTS pending_car_id BIGINT   NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS pending_xids   BIGINT[] NOT NULL DEFAULT '{}';
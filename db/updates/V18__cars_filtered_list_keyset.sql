@@ -0,0 +1,15 @@
+-- V18: Keyset index for the filtered car list.
+--
+-- CarFilteredList pages listings newest first, resuming from a cursor with
+--     (created_at, car_id) < (:created_at, :car_id)
+--     ORDER BY created_at DESC NULLS LAST, car_id DESC LIMIT n
+-- and, once the dated rows run out, the created_at IS NULL tail. This index
+-- matches that order exactly, so every page starts at its cursor instead of
+-- sorting the whole filtered set. Filters (brand, model, ...) are checked
+-- on the rows the scan passes; listings are spread evenly over time, so a
+-- page only walks a short stretch of the index unless the filter is rare.
+
+CREATE INDEX IF NOT EXISTS idx_cars_created_keyset
+    ON marketplace.cars (created_at DESC NULLS LAST, car_id DESC);
+
+ANALYZE marketplace.cars;
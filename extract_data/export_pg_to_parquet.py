@@ -1,11 +1,56 @@
-import pandas as pd
-import psycopg2
+"""
+Incremental export of marketplace.cars to a Hive-partitioned Parquet dataset.
+
+    cars/created_year=2025/created_month=07/part-0000123457.parquet
+    cars/created_year=2025/created_month=08/part-0000123457.parquet
+    cars/_watermark.json          {"car_id": 130210, "created_at": "...", ...}
+
+Each run exports only rows above the car_id high-water mark stored next to
+the dataset, streams them from a server-side cursor in CHUNK_ROWS chunks,
+and appends them through one pyarrow.ParquetWriter per (year, month) of
+created_at. The partition keys are created_year / created_month rather than
+year / month: cars already has a `year` column (model year), which a Hive
+reader would silently replace with the partition value. Memory is one chunk plus one open row group per touched
+partition, whatever the table size. String columns with few distinct values
+are dictionary-encoded. Only the files written by this run are uploaded, and
+the watermark is advanced after they all succeed.
+
+car_id is drawn from a sequence before the inserting transaction commits,
+so a row below max(car_id) can still be in flight when a run starts. Before
+exporting up to max(car_id) the run waits (up to SETTLE_TIMEOUT seconds)
+for every transaction writing to the table at that moment to finish
+(transactions on other tables are not waited for); if one does not, the
+run exports nothing and the next run tries again.
+
+Part files are named after the first car_id the run could export, so a
+retry after a failed upload overwrites its own partial output instead of
+duplicating it.
+
+Targets: ADLS Gen2 (default) or a local directory, e.g. for tests / ad-hoc use:
+
+    python export_pg_to_parquet.py                      # → ADLS
+    python export_pg_to_parquet.py --target /data/lake  # → local directory
+"""
+import argparse
+import json
 import logging
 import os
-from azure.identity import DefaultAzureCredential
-from azure.storage.filedatalake import DataLakeServiceClient
-from azure.core.credentials import AccessToken
-from azure.core.exceptions import HttpResponseError
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:  # azure-* is only needed for the ADLS target
+    from azure.identity import DefaultAzureCredential
+    from azure.storage.filedatalake import DataLakeServiceClient
+    from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+except ImportError:
+    DefaultAzureCredential = DataLakeServiceClient = None
+    HttpResponseError = ResourceNotFoundError = Exception
 
 # Configure logging with detailed format
 logging.basicConfig(
@@ -17,8 +62,89 @@ logger = logging.getLogger(__name__)
 # Azure storage configuration
 AZURE_STORAGE_ACCOUNT_NAME = os.getenv("AZURE_STORAGE_ACCOUNT_NAME", "stdev12311231eastus")
 FILE_SYSTEM_NAME = "data"
-FILE_PATH = "cars.parquet"
-LOCAL_FILE = "cars.parquet"
+DATASET = "cars"
+
+TABLE = "marketplace.cars"
+KEY = "car_id"
+PARTITION_BY = "created_at"
+CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "20000"))
+SETTLE_TIMEOUT = float(os.getenv("EXPORT_SETTLE_TIMEOUT", "300"))
+WATERMARK_FILE = "_watermark.json"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Low-cardinality text columns stored as Arrow dictionaries (categoricals
+# when read back with pandas). Enum columns are always dictionary-encoded.
+DICTIONARY_COLUMNS = {
+    "brand", "model", "gear_type", "color", "vehicle_type", "fuel_type", "condition",
+    "location", "owner_type", "body_type", "owner_count",
+}
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+class LocalTarget:
+    """Dataset in a local directory (tests, ad-hoc runs, mounted volumes)."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def read_text(self, path):
+        try:
+            with open(os.path.join(self.root, path), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def upload(self, local_path, path):
+        dest = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(local_path, dest)
+
+    def write_text(self, path, text):
+        dest = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(dest + ".tmp", dest)
+
+
+class ADLSTarget:
+    """Dataset in the ADLS Gen2 file system FILE_SYSTEM_NAME."""
+
+    def __init__(self):
+        service_client, self.credential = get_adls_service_client()
+        self.fs = service_client.get_file_system_client(file_system=FILE_SYSTEM_NAME)
+        logger.info("🔍 Checking file system permissions for %s", FILE_SYSTEM_NAME)
+        check_file_permissions(self.fs, "/")
+        try:
+            self.fs.create_file_system()
+            logger.info("Created filesystem: %s", FILE_SYSTEM_NAME)
+        except HttpResponseError:
+            logger.info("Filesystem %s already exists", FILE_SYSTEM_NAME)
+
+    def read_text(self, path):
+        try:
+            return self.fs.get_file_client(path).download_file().readall().decode("utf-8")
+        except ResourceNotFoundError:
+            return None
+
+    def upload(self, local_path, path):
+        file_client = self.fs.get_file_client(path)
+        try:
+            with open(local_path, "rb") as data:
+                file_client.upload_data(data, overwrite=True)
+            logger.info("✅ Uploaded %s", file_client.url)
+        except HttpResponseError as e:
+            logger.error("❌ Failed to upload %s: %s", path, str(e))
+            logger.error("🔍 Request ID: %s", e.response.headers.get("x-ms-request-id"))
+            logger.error("🔍 Error code: %s", e.error_code)
+            raise
+
+    def write_text(self, path, text):
+        self.fs.get_file_client(path).upload_data(text.encode("utf-8"), overwrite=True)
+
 
 def log_environment_variables():
     """Log Azure-related environment variables for debugging."""
@@ -28,21 +154,6 @@ def log_environment_variables():
     else:
         logger.warning("⚠️ No Azure-related environment variables found")
 
-def print_identity_details(credential):
-    """Log detailed information about the identity used."""
-    try:
-        token: AccessToken = credential.get_token("https://storage.azure.com/.default")
-        logger.info("🔐 Identity token obtained")
-        logger.debug("🔸 Token (first 40 chars): %s...", token.token[:40])
-        logger.debug("🔸 Token expires at: %s", token.expires_on)
-        logger.debug("🔸 Credential type: %s", type(credential).__name__)
-        # Log all credential sources attempted by DefaultAzureCredential
-        if isinstance(credential, DefaultAzureCredential):
-            for cred in credential._credential_providers:
-                logger.debug("🔸 Available credential provider: %s", type(cred).__name__)
-    except Exception as e:
-        logger.error("❌ Failed to obtain token from DefaultAzureCredential: %s", str(e))
-
 def check_file_permissions(file_system_client, file_path):
     """Check ACLs for the target file or directory."""
     try:
@@ -60,8 +171,7 @@ def get_adls_service_client():
     """Initialize DataLakeServiceClient with diagnostics."""
     credential = DefaultAzureCredential()
     log_environment_variables()
-    logger.info("🔎 Initializing ADLS client with identity:")
-    print_identity_details(credential)
+    logger.info("🔎 Initializing ADLS client")
 
     try:
         service_client = DataLakeServiceClient(
@@ -74,80 +184,211 @@ def get_adls_service_client():
         logger.error("❌ Failed to initialize DataLakeServiceClient: %s", str(ex))
         raise
 
-def main():
-    """Main function to export data and upload to ADLS."""
-    # PostgreSQL connection
-    try:
-        conn = psycopg2.connect(
-            host="postgres",
-            port=5432,
-            user="marketplace_user",
-            password="marketplace_user",
-            dbname="postgres"
-        )
-        logger.info("✅ Connected to PostgreSQL")
-    except Exception as e:
-        logger.error("❌ Failed to connect to PostgreSQL: %s", str(e))
-        raise
 
-    # Export data to Parquet
-    logger.info("Starting export from PostgreSQL to Parquet...")
-    query = "SELECT * FROM marketplace.cars;"
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def arrow_schema(conn, table):
+    """Arrow schema for `table` from information_schema, in column order."""
+    schema_name, table_name = table.split(".")
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name, data_type, numeric_precision, numeric_scale
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+        """, (schema_name, table_name))
+        columns = cur.fetchall()
+    if not columns:
+        raise ValueError(f"table {table} not found")
+
+    fields = []
+    for name, data_type, precision, scale in columns:
+        if data_type in ("integer", "smallint"):
+            type_ = pa.int32()
+        elif data_type == "bigint":
+            type_ = pa.int64()
+        elif data_type == "numeric":
+            type_ = pa.decimal128(precision or 38, scale or 0)
+        elif data_type in ("real", "double precision"):
+            type_ = pa.float64()
+        elif data_type == "boolean":
+            type_ = pa.bool_()
+        elif data_type == "date":
+            type_ = pa.date32()
+        elif data_type.startswith("timestamp"):
+            type_ = pa.timestamp("us", tz="UTC")  # TIMESTAMP columns hold UTC
+        elif data_type == "USER-DEFINED" or name in DICTIONARY_COLUMNS:
+            type_ = pa.dictionary(pa.int32(), pa.string())
+        else:
+            type_ = pa.string()
+        fields.append(pa.field(name, type_))
+    return pa.schema(fields)
+
+
+def partition_of(value):
+    if value is None:
+        return f"created_year={NULL_PARTITION}/created_month={NULL_PARTITION}"
+    return f"created_year={value.year}/created_month={value.month:02d}"
+
+
+def read_watermark(target):
+    raw = target.read_text(f"{DATASET}/{WATERMARK_FILE}")
+    return json.loads(raw) if raw else {KEY: 0, "created_at": None, "runs": 0}
+
+
+# xids of other transactions with uncommitted writes to `table`: the
+# transactionid lock lasts as long as the table's RowExclusiveLock.
+IN_FLIGHT_SQL = """
+    SELECT DISTINCT xid.transactionid::text::bigint
+    FROM pg_locks AS xid
+    JOIN pg_locks AS tbl ON tbl.pid = xid.pid
+    WHERE xid.locktype = 'transactionid' AND xid.mode = 'ExclusiveLock'
+      AND tbl.locktype = 'relation' AND tbl.mode = 'RowExclusiveLock'
+      AND tbl.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND tbl.relation = %s::regclass
+      AND xid.pid <> pg_backend_pid()
+"""
+
+
+def wait_for_writers(conn, table=TABLE, timeout=SETTLE_TIMEOUT, poll=0.5):
+    """Wait until every transaction writing to `table` right now has
+    finished (later ones are not waited for); False if some are still
+    running after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    with conn.cursor() as cur:
+        cur.execute(IN_FLIGHT_SQL, (table,))
+        waiting = {xid for (xid,) in cur.fetchall()}
+        while waiting:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+            cur.execute(IN_FLIGHT_SQL, (table,))
+            waiting &= {xid for (xid,) in cur.fetchall()}
+    return True
+
+
+def export_incremental(conn, target, table=TABLE, chunk_rows=CHUNK_ROWS, settle_timeout=SETTLE_TIMEOUT):
+    """Export rows of `table` above the target's watermark; returns the new
+    watermark dict (unchanged when there is nothing new, or when a writer
+    that may hold a car_id below the new mark is still running)."""
+    state = read_watermark(target)
+    low = state[KEY]
+    schema = arrow_schema(conn, table)
+    columns = schema.names
+    part_index = columns.index(PARTITION_BY)
+    key_index = columns.index(KEY)
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT max({KEY}) FROM {table}")
+        high = cur.fetchone()[0] or 0
+    if high <= low:
+        logger.info("Nothing to export above %s=%s", KEY, low)
+        return state
+    # A car_id <= high not visible to max() belongs to a writer that is in
+    # flight now or has committed since; the export query below sees it
+    # once they have all finished.
+    if not wait_for_writers(conn, table, settle_timeout):
+        logger.warning("Writers still in flight after %ss; leaving %s=%s for the next run",
+                       settle_timeout, KEY, low)
+        return state
+
+    staging = tempfile.mkdtemp(prefix="parquet-export-")
+    file_name = f"part-{low + 1:010d}.parquet"
+    writers = {}
+    rows_out = 0
+    max_created = state.get("created_at")
     try:
-        df = pd.read_sql_query(query, conn)
-        df.to_parquet(LOCAL_FILE, index=False)
-        logger.info("✅ Exported to %s", LOCAL_FILE)
-    except Exception as e:
-        logger.error("❌ Failed to export to Parquet: %s", str(e))
-        raise
+        # Named cursor → server-side; rows arrive itersize at a time.
+        with conn.cursor(name="export_cars") as cur:
+            cur.itersize = chunk_rows
+            cur.execute(
+                f"SELECT {', '.join(columns)} FROM {table} "
+                f"WHERE {KEY} > %s AND {KEY} <= %s ORDER BY {KEY}",
+                (low, high),
+            )
+            while True:
+                chunk = cur.fetchmany(chunk_rows)
+                if not chunk:
+                    break
+                by_partition = {}
+                for row in chunk:
+                    by_partition.setdefault(partition_of(row[part_index]), []).append(row)
+                for partition, rows in by_partition.items():
+                    writer = writers.get(partition)
+                    if writer is None:
+                        os.makedirs(os.path.join(staging, partition), exist_ok=True)
+                        writer = writers[partition] = pq.ParquetWriter(
+                            os.path.join(staging, partition, file_name), schema,
+                            compression="zstd", use_dictionary=True)
+                    writer.write_table(pa.Table.from_pydict(
+                        {name: [r[i] for r in rows] for i, name in enumerate(columns)},
+                        schema=schema))
+                rows_out += len(chunk)
+                created = [r[part_index] for r in chunk if r[part_index] is not None]
+                if created:
+                    newest = max(created).isoformat()
+                    max_created = max(max_created or newest, newest)
+                logger.debug("… %s rows (%s=%s)", rows_out, KEY, chunk[-1][key_index])
+        for writer in writers.values():
+            writer.close()
+
+        for partition in sorted(writers):
+            target.upload(os.path.join(staging, partition, file_name),
+                          f"{DATASET}/{partition}/{file_name}")
     finally:
-        conn.close()
-        logger.debug("🔒 PostgreSQL connection closed")
+        for writer in writers.values():
+            if writer.is_open:
+                writer.close()
+        shutil.rmtree(staging, ignore_errors=True)
 
-    # Upload to ADLS
-    logger.info("Uploading %s to Azure Data Lake...", LOCAL_FILE)
-    service_client, credential = get_adls_service_client()
-    file_system_client = service_client.get_file_system_client(file_system=FILE_SYSTEM_NAME)
+    state = {
+        KEY: high,
+        "created_at": max_created,
+        "runs": state.get("runs", 0) + 1,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "last_run": {"rows": rows_out, "partitions": sorted(writers), "file": file_name},
+    }
+    target.write_text(f"{DATASET}/{WATERMARK_FILE}", json.dumps(state, indent=2))
+    logger.info("✅ Exported %s rows into %s partitions; %s watermark %s → %s",
+                rows_out, len(writers), KEY, low, high)
+    return state
 
-    # Check file system permissions
-    logger.info("🔍 Checking file system permissions for %s", FILE_SYSTEM_NAME)
-    check_file_permissions(file_system_client, "/")
 
-    # Ensure file system exists
-    try:
-        file_system_client.create_file_system()
-        logger.info("Created filesystem: %s", FILE_SYSTEM_NAME)
-    except HttpResponseError:
-        logger.info("Filesystem %s already exists", FILE_SYSTEM_NAME)
+def connect():
+    return psycopg2.connect(
+        host=os.getenv("PG_HOST", "postgres"),
+        port=int(os.getenv("PG_PORT", "5432")),
+        user=os.getenv("PG_USER", "marketplace_user"),
+        password=os.getenv("PG_PASSWORD", "marketplace_user"),
+        dbname=os.getenv("PG_DB", "postgres"),
+    )
 
-    file_client = file_system_client.get_file_client(FILE_PATH)
-    logger.debug("📂 File system URL: %s", file_system_client.url)
-    logger.debug("📄 File client URL: %s", file_client.url)
-    logger.info("Uploading to URL: https://%s.dfs.core.windows.net/%s/%s",
-                AZURE_STORAGE_ACCOUNT_NAME, FILE_SYSTEM_NAME, FILE_PATH)
 
-    # Check file permissions before upload
-    logger.info("🔍 Checking permissions for %s", FILE_PATH)
-    check_file_permissions(file_system_client, FILE_PATH)
+def main():
+    """Export new rows and upload them to ADLS (or --target directory)."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", help="local dataset root instead of ADLS")
+    args = parser.parse_args()
 
     try:
-        logger.info("🔎 Uploading with identity:")
-        print_identity_details(credential)  # Use the credential from get_adls_service_client
-        with open(LOCAL_FILE, "rb") as data:
-            file_client.upload_data(data, overwrite=True)
-        logger.info("✅ Uploaded %s to ADLS Gen2", FILE_PATH)
-    except HttpResponseError as e:
-        logger.error("❌ Failed to upload to ADLS: %s", str(e))
-        logger.error("🔍 Request ID: %s", e.response.headers.get("x-ms-request-id"))
-        logger.error("🔍 Error code: %s", e.error_code)
-        raise
+        conn = connect()
+        logger.info("✅ Connected to PostgreSQL")
     except Exception as e:
-        logger.error("❌ Unexpected error during upload: %s", str(e))
+        logger.error("❌ Failed to connect to PostgreSQL: %s", str(e))
         raise
 
+    try:
+        target = LocalTarget(args.target) if args.target else ADLSTarget()
+        export_incremental(conn, target)
+    finally:
+        conn.close()
+        logger.debug("🔒 PostgreSQL connection closed")
+
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
         logger.error("❌ Script failed: %s", str(e))
-        exit(1)
\ No newline at end of file
+        exit(1)
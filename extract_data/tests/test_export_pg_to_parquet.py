@@ -0,0 +1,161 @@
+"""
+Incremental exporter against a local directory target.
+
+Needs a reachable Postgres (PG_HOST / PG_PORT / PG_USER / PG_PASSWORD /
+PG_DB, as for the exporter itself); builds a scratch copy of the cars table
+in its own schema.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+import export_pg_to_parquet as exporter
+
+TABLE = "export_test.cars"
+
+
+@pytest.fixture
+def conn():
+    try:
+        conn = exporter.connect()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no Postgres: {e}")
+    with conn.cursor() as cur:
+        cur.execute("""
+            DROP SCHEMA IF EXISTS export_test CASCADE;
+            CREATE SCHEMA export_test;
+            CREATE TYPE export_test.gear_enum AS ENUM ('AT', 'MT');
+            CREATE TABLE export_test.cars (
+                car_id      SERIAL PRIMARY KEY,
+                brand       VARCHAR(255),
+                model       VARCHAR(255),
+                year        INT,
+                price       DECIMAL(10, 2),
+                gear_type   export_test.gear_enum,
+                description TEXT,
+                created_at  TIMESTAMP
+            );
+        """)
+    conn.commit()
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA export_test CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def insert(conn, n, start):
+    with conn.cursor() as cur:
+        for i in range(n):
+            cur.execute(f"""
+                INSERT INTO {TABLE} (brand, model, year, price, gear_type, description, created_at)
+                VALUES (%s, %s, 2020, %s, %s, %s, %s)
+            """, ("Chevrolet", ["Cobalt", "Gentra"][i % 2], 10000 + i,
+                  ["AT", "MT"][i % 2], f"car {i}", start + timedelta(days=i)))
+    conn.commit()
+
+
+def files(root):
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*.parquet"))
+
+
+def test_incremental_partitioned_export(conn, tmp_path):
+    target = exporter.LocalTarget(str(tmp_path))
+    insert(conn, 50, datetime(2025, 6, 20))  # 20 Jun .. 8 Aug: three months
+    state = exporter.export_incremental(conn, target, table=TABLE, chunk_rows=7)
+
+    assert files(tmp_path) == [f"cars/created_year=2025/created_month={m}/part-0000000001.parquet"
+                               for m in ("06", "07", "08")]
+    assert state["car_id"] == 50 and state["last_run"]["rows"] == 50
+    assert json.loads((tmp_path / "cars/_watermark.json").read_text())["car_id"] == 50
+
+    dataset = ds.dataset(tmp_path / "cars", format="parquet", partitioning="hive")
+    table = dataset.to_table()
+    assert table.num_rows == 50
+    assert table.schema.field("brand").type == pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field("gear_type").type == pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field("price").type == pa.decimal128(10, 2)
+    july = dataset.to_table(filter=(ds.field("created_year") == 2025) & (ds.field("created_month") == 7))
+    assert july.num_rows == 31
+    assert set(table.column("year").to_pylist()) == {2020}  # model year, not the partition
+
+    # nothing new → nothing written
+    assert exporter.export_incremental(conn, target, table=TABLE) == state
+
+    # only the new rows, in their own part files; older files untouched
+    before = {p: (tmp_path / p).stat().st_mtime_ns for p in files(tmp_path)}
+    insert(conn, 5, datetime(2025, 8, 30))
+    state = exporter.export_incremental(conn, target, table=TABLE)
+    assert set(files(tmp_path)) - set(before) == {
+        "cars/created_year=2025/created_month=08/part-0000000051.parquet",
+        "cars/created_year=2025/created_month=09/part-0000000051.parquet",
+    }
+    assert all((tmp_path / p).stat().st_mtime_ns == t for p, t in before.items())
+    assert (state["car_id"], state["runs"]) == (55, 2)
+    assert ds.dataset(tmp_path / "cars", format="parquet", partitioning="hive").count_rows() == 55
+
+
+def test_failed_upload_keeps_watermark_and_retry_overwrites(conn, tmp_path):
+    target = exporter.LocalTarget(str(tmp_path))
+    insert(conn, 10, datetime(2025, 1, 25))
+    real_upload, uploaded = target.upload, []
+
+    def flaky(local_path, path):
+        if uploaded:
+            raise OSError("connection reset")
+        uploaded.append(path)
+        real_upload(local_path, path)
+    target.upload = flaky
+    with pytest.raises(OSError):
+        exporter.export_incremental(conn, target, table=TABLE)
+    assert exporter.read_watermark(target)["car_id"] == 0
+
+    target.upload = real_upload
+    exporter.export_incremental(conn, target, table=TABLE)
+    assert files(tmp_path) == ["cars/created_year=2025/created_month=01/part-0000000001.parquet",
+                               "cars/created_year=2025/created_month=02/part-0000000001.parquet"]
+    assert ds.dataset(tmp_path / "cars", format="parquet", partitioning="hive").count_rows() == 10
+
+
+def test_waits_for_lower_car_id_still_in_flight(conn, tmp_path):
+    target = exporter.LocalTarget(str(tmp_path))
+    slow = exporter.connect()
+    try:
+        with slow.cursor() as cur:  # takes car_id 1, commits after the run has started
+            cur.execute(f"INSERT INTO {TABLE} (brand, description, created_at) "
+                        "VALUES ('Kia', 'slow', '2025-03-01')")
+        insert(conn, 3, datetime(2025, 3, 2))
+
+        state = exporter.export_incremental(conn, target, table=TABLE, settle_timeout=0.2)
+        assert state["car_id"] == 0 and files(tmp_path) == []
+
+        threading.Timer(0.3, slow.commit).start()
+        state = exporter.export_incremental(conn, target, table=TABLE, settle_timeout=10)
+        assert state["car_id"] == 4
+        table = ds.dataset(tmp_path / "cars", format="parquet", partitioning="hive").to_table()
+        assert sorted(table.column("car_id").to_pylist()) == [1, 2, 3, 4]
+    finally:
+        slow.rollback()
+        slow.close()
+
+
+def test_does_not_wait_for_transactions_on_other_tables(conn, tmp_path):
+    target = exporter.LocalTarget(str(tmp_path))
+    idle = exporter.connect()
+    try:
+        with idle.cursor() as cur:  # open for the whole run, never touches the cars table
+            cur.execute("CREATE TEMP TABLE unrelated (x int)")
+            cur.execute("INSERT INTO unrelated VALUES (1)")
+        insert(conn, 3, datetime(2025, 3, 2))
+
+        state = exporter.export_incremental(conn, target, table=TABLE, settle_timeout=0.2)
+        assert state["car_id"] == 3
+    finally:
+        idle.rollback()
+        idle.close()
@@ -19,6 +19,9 @@ const CarList = ({ onSearch }) => {
     created_at: '',
   });
   const [currentPage, setCurrentPage] = useState(1);
+  // Keyset cursor for the next server page (null when everything is loaded)
+  const [nextCursor, setNextCursor] = useState(null);
+  const [lastQuery, setLastQuery] = useState('');
   const [error, setError] = useState(null);
   const rowsPerPage = 10;
 
@@ -67,6 +70,8 @@ const CarList = ({ onSearch }) => {
         console.log('Filter Config:', data.filters);
         setCars(data.results || []);
         setFilterConfig(data.filters || {});
+        setNextCursor(data.next_cursor || null);
+        setLastQuery(query.toString());
         setError(null);
         setCurrentPage(1);
       })
@@ -77,6 +82,27 @@ const CarList = ({ onSearch }) => {
       });
   };
 
+  // Append the next server page (same filters) and move to its first rows.
+  const loadMore = () => {
+    if (!nextCursor) return;
+    const query = new URLSearchParams(lastQuery);
+    query.set('cursor', nextCursor);
+    fetch(`${API_URL}?${query.toString()}`)
+      .then((res) => {
+        if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+        return res.json();
+      })
+      .then((data) => {
+        setCars((prev) => [...prev, ...(data.results || [])]);
+        setNextCursor(data.next_cursor || null);
+        setCurrentPage((p) => p + 1);
+      })
+      .catch((err) => {
+        console.error('Error loading more cars:', err);
+        setError('Failed to load more cars. Please try again.');
+      });
+  };
+
   useEffect(() => {
     fetchCars();
   }, []);
@@ -124,6 +150,7 @@ const CarList = ({ onSearch }) => {
   };
 
   const totalPages = Math.ceil(cars.length / rowsPerPage);
+  const atLastPage = currentPage === totalPages && !nextCursor;
   const displayedCars = cars.slice((currentPage - 1) * rowsPerPage, currentPage * rowsPerPage);
 
   const sidebarStyle = {
@@ -616,30 +643,36 @@ const CarList = ({ onSearch }) => {
                     letterSpacing: '0.5px',
                   }}
                 >
-                  Page {currentPage} of {totalPages}
+                  Page {currentPage} of {totalPages}{nextCursor ? '+' : ''}
                 </span>
                 <button
-                  onClick={() => setCurrentPage((p) => Math.min(p + 1, totalPages))}
-                  disabled={currentPage === totalPages}
+                  onClick={() => {
+                    if (currentPage === totalPages && nextCursor) {
+                      loadMore();
+                    } else {
+                      setCurrentPage((p) => Math.min(p + 1, totalPages));
+                    }
+                  }}
+                  disabled={atLastPage}
                   style={{
                     padding: '7px 18px',
                     borderRadius: '8px',
                     border: '1px solid #d5d9d9',
-                    background: currentPage === totalPages ? '#f5f6f6' : 'linear-gradient(180deg,#f7dfa5,#f0c14b)',
-                    color: currentPage === totalPages ? '#888' : '#111',
+                    background: atLastPage ? '#f5f6f6' : 'linear-gradient(180deg,#f7dfa5,#f0c14b)',
+                    color: atLastPage ? '#888' : '#111',
                     fontWeight: 500,
                     fontSize: '15px',
-                    cursor: currentPage === totalPages ? 'not-allowed' : 'pointer',
-                    boxShadow: currentPage === totalPages ? 'none' : '0 1px 0 #e2e2e2',
+                    cursor: atLastPage ? 'not-allowed' : 'pointer',
+                    boxShadow: atLastPage ? 'none' : '0 1px 0 #e2e2e2',
                     transition: 'background 0.2s, box-shadow 0.2s',
                   }}
                   onMouseOver={(e) => {
-                    if (currentPage !== totalPages) {
+                    if (!atLastPage) {
                       e.currentTarget.style.background = 'linear-gradient(180deg,#f0c14b,#e7b13b)';
                     }
                   }}
                   onMouseOut={(e) => {
-                    if (currentPage !== totalPages) {
+                    if (!atLastPage) {
                       e.currentTarget.style.background = 'linear-gradient(180deg,#f7dfa5,#f0c14b)';
                     }
                   }}
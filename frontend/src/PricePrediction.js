@@ -128,6 +128,7 @@ export default function PricePrediction() {
           params: {
             brand: form.brand,
             model: form.model,
+            page_size: 200,
             ...(form.year ? {
               year: `${Math.max(1990, parseInt(form.year) - 2)}-${parseInt(form.year) + 2}`
             } : {}),
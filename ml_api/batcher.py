@@ -0,0 +1,62 @@
+"""
+Micro-batcher for single-row predictions.
+
+Concurrent `/predict2` requests that arrive within WINDOW seconds of each
+other are coalesced into one vectorized `predict_many()` call, which runs in
+a worker thread so the event loop keeps accepting requests meanwhile. A
+batch is flushed early once it reaches MAX_BATCH rows.
+
+A lone request therefore waits at most one window (a few ms) before it is
+evaluated; under load the per-call overhead of the sklearn pipeline is paid
+once per batch instead of once per request.
+"""
+import asyncio
+
+
+class MicroBatcher:
+    def __init__(self, predict_many, window=0.003, max_batch=256):
+        self.predict_many = predict_many
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, row):
+        """Prediction for one feature dict, evaluated with whatever else is pending."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(None, self.predict_many, rows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():  # the client may have gone away
+                future.set_result(prediction)
+
+    def stats(self):
+        return {"batches": self.batches, "rows": self.rows,
+                "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0}
@@ -0,0 +1,65 @@
+"""
+Bounded LRU + TTL cache of /predict2 answers.
+
+Keys are normalized feature tuples (see main.normalize_v2). Every entry
+belongs to a model "token", the registry's (live, candidate, mode) at the
+time it was computed: the first lookup under a different token empties
+the cache, so a hot swap never serves prices from the previous model.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, maxsize=10_000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.token = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()   # key → (value, expires_at), least recently used first
+        self._lock = threading.Lock()
+
+    def reset_if_stale(self, token):
+        """Empty the cache if `token` is not the one its entries belong to;
+        True if it did."""
+        with self._lock:
+            if token == self.token:
+                return False
+            self._data.clear()
+            self.token = token
+            self.invalidations += 1
+            return True
+
+    def get(self, key, token):
+        self.reset_if_stale(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, token):
+        """Store `value`, unless it was computed by a model that has since
+        been swapped out."""
+        with self._lock:
+            if token != self.token or not self.maxsize:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "invalidations": self.invalidations}
@@ -0,0 +1,175 @@
+"""
+Array-backed random forest: export from sklearn, vectorized evaluation.
+
+`export()` flattens a fitted `RandomForestRegressor`, optionally behind the
+`ColumnTransformer(OneHotEncoder(...), remainder="passthrough")` that
+ml_lab/retrain.py trains, into a directory of plain .npy arrays, one entry
+per node of every tree:
+
+    feature.npy    int16       input column the node splits on
+    lower.npy      float32     go right when lower < x <= upper,
+    upper.npy      float32     left otherwise
+    children.npy   int32 (,2)  left / right child (absolute node index across
+                               all trees); leaves point at themselves
+    value.npy      float64     node prediction (only read at leaves)
+    roots.npy      int32       first node of each tree
+    meta.json                  column order, category lists, depth, format
+
+The one-hot matrix is never built. Categorical inputs are passed as
+category codes (-1 for categories unseen in training, i.e. all one-hot
+columns zero, as with handle_unknown="ignore"), and a split on one-hot
+column "brand=Kia" becomes "go right when code - 0.5 < brand <= code + 0.5".
+A numeric split "x <= t goes left" is (t, +inf]. Both kinds evaluate with
+the same two comparisons, so a batch walks every tree in lockstep with a
+handful of array gathers per level.
+
+sklearn compares float32 inputs against float64 thresholds; `lower` holds
+the largest float32 not above each threshold, which picks the same branch
+for every float32 input at half the size.
+
+`CompiledForest.load(path, mmap_mode="r")` maps the arrays instead of
+reading them, so loading is near-instant and the pages are shared by every
+process that maps the same files.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT = 1
+ARRAYS = ("feature", "lower", "upper", "children", "value", "roots")
+
+
+def _layout(model):
+    """(forest, numeric columns, {categorical column: categories}, one-hot
+    column → (input column, category code))."""
+    if not hasattr(model, "named_steps"):
+        names = list(getattr(model, "feature_names_in_", [f"x{i}" for i in range(model.n_features_in_)]))
+        return model, names, {}, [(i, -1) for i in range(len(names))]
+
+    steps = list(model.named_steps.values())
+    preprocessor, forest = steps[0], steps[-1]
+    inputs = list(preprocessor.feature_names_in_)
+    categorical, numeric = {}, []
+    columns = [None] * sum(s.stop - s.start for s in preprocessor.output_indices_.values())
+    for name, transformer, selected in preprocessor.transformers_:
+        selected = [inputs[c] if isinstance(c, (int, np.integer)) else c for c in selected]
+        out = preprocessor.output_indices_[name]
+        if transformer == "drop" or out.stop == out.start:
+            continue
+        if transformer == "passthrough":
+            for i, column in enumerate(selected):
+                columns[out.start + i] = ("num", len(numeric))
+                numeric.append(column)
+            continue
+        if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+            raise ValueError("Only plain one-hot encoding (no drop / infrequent categories) can be compiled")
+        position = out.start
+        for column, categories in zip(selected, transformer.categories_):
+            categorical[column] = [str(c) for c in categories]
+            for code in range(len(categories)):
+                columns[position] = ("cat", column, code)
+                position += 1
+
+    cat_names = list(categorical)
+    index = []
+    for entry in columns:
+        if entry[0] == "num":
+            index.append((entry[1], -1))
+        else:
+            index.append((len(numeric) + cat_names.index(entry[1]), entry[2]))
+    return forest, numeric, categorical, index
+
+
+def _float32_floor(thresholds):
+    """Largest float32 <= each float64 threshold."""
+    t32 = thresholds.astype(np.float32)
+    above = t32.astype(np.float64) > thresholds
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def export(model, path, check=None):
+    """Write the node arrays for `model` to directory `path`. With `check`
+    (a DataFrame of inputs), assert the compiled forest predicts what
+    `model.predict(check)` does before returning."""
+    forest, numeric, categorical, index = _layout(model)
+    index = np.asarray(index, dtype=np.int64).reshape(-1, 2)
+
+    parts = {name: [] for name in ARRAYS if name != "roots"}
+    roots, offset, depth = [], 0, 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        leaf = tree.children_left == -1
+        ids = np.arange(tree.node_count)
+        split = np.where(leaf, 0, tree.feature)
+        category = np.where(leaf, -1, index[split, 1])
+        parts["feature"].append(np.where(leaf, 0, index[split, 0]))
+        parts["lower"].append(np.where(category >= 0, category - 0.5,
+                                       _float32_floor(np.where(leaf, 0.0, tree.threshold))))
+        parts["upper"].append(np.where(category >= 0, category + 0.5, np.inf))
+        parts["children"].append(np.column_stack([np.where(leaf, ids, tree.children_left),
+                                                  np.where(leaf, ids, tree.children_right)]) + offset)
+        parts["value"].append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+
+    os.makedirs(path, exist_ok=True)
+    dtypes = {"feature": np.int16, "lower": np.float32, "upper": np.float32,
+              "children": np.int32, "value": np.float64}
+    for name, dtype in dtypes.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.concatenate(parts[name]).astype(dtype))
+    np.save(os.path.join(path, "roots.npy"), np.asarray(roots, dtype=np.int32))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"format": FORMAT, "n_trees": len(roots), "n_nodes": offset, "max_depth": depth,
+                   "numeric": numeric, "categorical": categorical}, f)
+
+    if check is not None:
+        compiled = CompiledForest.load(path)
+        np.testing.assert_allclose(compiled.predict(check), model.predict(check), rtol=1e-9,
+                                   err_msg=f"Compiled forest in {path} disagrees with sklearn")
+
+
+class CompiledForest:
+    """Drop-in for the sklearn model's `predict(df)` over exported arrays."""
+
+    def __init__(self, arrays, meta):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.numeric = meta["numeric"]
+        self.categorical = {c: pd.Index(cats) for c, cats in meta["categorical"].items()}
+        self.max_depth = meta["max_depth"]
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"Unsupported forest format {meta.get('format')} in {path}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def _inputs(self, df):
+        """float32 matrix: numeric columns, then category codes (-1 = unknown)."""
+        columns = [df[c].to_numpy(dtype=np.float32) for c in self.numeric]
+        for column, categories in self.categorical.items():
+            columns.append(categories.get_indexer(df[column].astype(str)).astype(np.float32))
+        return np.column_stack(columns) if columns else np.empty((len(df), 0), np.float32)
+
+    def predict(self, df):
+        x = self._inputs(df)
+        n, width = x.shape
+        trees = len(self.roots)
+        # one (row, tree) cursor per entry, flat: entry i is row i // trees
+        inputs = x.ravel()
+        offsets = np.repeat(np.arange(n, dtype=np.int32) * width, trees)
+        node = np.tile(self.roots, n)
+        children = self.children.reshape(-1)
+        for _ in range(self.max_depth):  # leaves loop onto themselves
+            value = inputs.take(offsets + self.feature.take(node))
+            right = (value > self.lower.take(node)) & (value <= self.upper.take(node))
+            node = children.take(2 * node + right)
+        return self.value.take(node).reshape(n, trees).mean(axis=1)
@@ -1,17 +1,43 @@
-from fastapi import FastAPI, Query
-import joblib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import json
 import os
+import re
 import pandas as pd
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import List
 import logging
 
-app = FastAPI()
+from batcher import MicroBatcher
+from cache import PredictionCache
+from registry import FORMATS, MODES, ModelRegistry, Watcher
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only Arrow IPC bodies on /predict2/batch need it
+    pa = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-model = joblib.load(os.path.join("models", "car_price_model.pkl"))
-model_v2 = joblib.load(os.path.join("models", "car_price_model_v2.pkl"))
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto")                    # auto: node arrays when exported | pickle
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"                    # share node arrays across workers via page cache
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"              # load + warm up before accepting traffic
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "30"))  # 0 = reload via admin endpoint only
+CANDIDATE_MODE = os.getenv("CANDIDATE_MODE", "shadow")              # off | shadow | ab
+CANDIDATE_SHARE = float(os.getenv("CANDIDATE_SHARE", "0.1"))        # rows answered by the candidate in ab mode
+SHADOW_QUEUE = int(os.getenv("CANDIDATE_SHADOW_QUEUE", "4"))        # shadow calls in flight before more are dropped
+ADMIN_TOKEN = os.getenv("ML_ADMIN_TOKEN")                           # unset = admin endpoints disabled
+MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "10000"))            # rows per /predict2/batch call
+BATCH_WINDOW = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "3")) / 1000  # micro-batcher coalescing window
+CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))          # /predict2 answers kept, 0 = no cache
+CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "3600"))           # seconds
+MILEAGE_BUCKET = int(os.getenv("PREDICT_CACHE_MILEAGE_BUCKET", "1000"))  # km; cached /predict2 rounds mileage to it (= ml_lab/top_specs.py --mileage-step)
+CACHE_PREFILL = os.getenv("PREDICT_CACHE_PREFILL", os.path.join(MODEL_DIR, "top_specs.json"))  # ml_lab/top_specs.py
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
 
 class CarFeatures(BaseModel):
     year: int
@@ -27,23 +53,227 @@ class CarFeaturesV2(BaseModel):
     fuel_type: str  = "Unknown"
     body_type: str  = "Unknown"
 
+FEATURES_V2 = list(CarFeaturesV2.model_fields)
+_rows_v2 = TypeAdapter(List[CarFeaturesV2])
+
+if CANDIDATE_MODE not in MODES:
+    raise ValueError(f"CANDIDATE_MODE must be one of {', '.join(MODES)}")
+if MODEL_FORMAT not in FORMATS:
+    raise ValueError(f"MODEL_FORMAT must be one of {', '.join(FORMATS)}")
+
+registry_v1 = ModelRegistry(
+    MODEL_DIR, "car_price_model", mode="off", format=MODEL_FORMAT, mmap=MODEL_MMAP,
+    warmup=pd.DataFrame([CarFeatures(year=2020, mileage=50_000).model_dump()]),
+)
+registry_v2 = ModelRegistry(
+    MODEL_DIR, "car_price_model_v2", mode=CANDIDATE_MODE, share=CANDIDATE_SHARE,
+    format=MODEL_FORMAT, mmap=MODEL_MMAP, shadow_queue=SHADOW_QUEUE,
+    warmup=pd.DataFrame([CarFeaturesV2(year=2020, mileage=50_000, brand="Chevrolet", model="Cobalt").model_dump()]),
+)
+registries = {r.name: r for r in (registry_v1, registry_v2)}
+
+def predict_many_v2(rows):
+    """One vectorized pipeline call for a list of CarFeaturesV2 dicts → (price, version) pairs."""
+    predictions, versions = registry_v2.predict(pd.DataFrame(rows, columns=FEATURES_V2))
+    return [(float(p), v) for p, v in zip(predictions, versions)]
+
+batcher = MicroBatcher(predict_many_v2, window=BATCH_WINDOW)
+cache = PredictionCache(CACHE_SIZE, CACHE_TTL)
+
+def normalize_v2(row):
+    """Features as /predict2 predicts them: trimmed strings, blank optional
+    fields as "Unknown" and, with the cache on, mileage rounded to
+    MILEAGE_BUCKET. Equal normalized features share one cache entry and
+    one answer; with the cache off the exact mileage is predicted."""
+    row = {k: v.strip() if isinstance(v, str) else v for k, v in row.items()}
+    for field, info in CarFeaturesV2.model_fields.items():
+        if not info.is_required() and not row.get(field):
+            row[field] = info.default
+    if CACHE_SIZE and MILEAGE_BUCKET > 1:
+        row["mileage"] = int(round(row["mileage"] / MILEAGE_BUCKET)) * MILEAGE_BUCKET
+    return row
+
+def prefill_cache():
+    """Predict the specs listed in CACHE_PREFILL (written by
+    ml_lab/top_specs.py) in one call and cache them for the current model."""
+    if not CACHE_SIZE or not os.path.isfile(CACHE_PREFILL):
+        return 0
+    try:
+        with open(CACHE_PREFILL) as f:
+            specs = _rows_v2.validate_json(f.read())
+    except (OSError, ValidationError) as e:
+        logger.warning(f"Not prefilling the prediction cache from {CACHE_PREFILL}: {e}")
+        return 0
+    rows = list({tuple(r[c] for c in FEATURES_V2): r
+                 for r in (normalize_v2(s.model_dump()) for s in specs)}.values())[:CACHE_SIZE]
+    if not rows:
+        return 0
+    token = registry_v2.token()
+    cache.reset_if_stale(token)
+    for row, answer in zip(rows, predict_many_v2(rows)):
+        cache.put(tuple(row[c] for c in FEATURES_V2), answer, token)
+    logger.info(f"Prefilled prediction cache with {len(rows)} specs for {token}")
+    return len(rows)
+
+@asynccontextmanager
+async def lifespan(app):
+    if MODEL_PRELOAD:
+        for registry in registries.values():
+            await run_in_threadpool(registry.preload)
+        await run_in_threadpool(prefill_cache)
+    watcher = Watcher(list(registries.values()), MODEL_WATCH_SECONDS) if MODEL_WATCH_SECONDS > 0 else None
+    if watcher:
+        watcher.start()
+    yield
+    if watcher:
+        watcher.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+def parse_smaps_rollup(text):
+    """MB figures from the text of /proc/<pid>/smaps_rollup: rss counts
+    shared pages (e.g. mmapped node arrays) in every worker, uss only what
+    this worker alone holds, pss splits shared pages across their users."""
+    kb = {m.group(1): int(m.group(2)) for m in re.finditer(r"^(\w+):\s+(\d+) kB$", text, re.M)}
+    mb = lambda *keys: round(sum(kb.get(k, 0) for k in keys) / 1024, 1)
+    return {"rss_mb": mb("Rss"), "pss_mb": mb("Pss"),
+            "uss_mb": mb("Private_Clean", "Private_Dirty"), "shared_mb": mb("Shared_Clean", "Shared_Dirty")}
+
+def worker_memory():
+    """This process's memory (parse_smaps_rollup); scale workers by uss.
+    None where /proc is unavailable."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return {"pid": os.getpid(), **parse_smaps_rollup(f.read())}
+    except OSError:
+        return None
+
 @app.get("/healthz")
 def health_check():
     logger.info("Health check endpoint called")
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "models": {name: r.status()["live"] for name, r in registries.items()},
+        "batcher": batcher.stats(),
+        "cache": cache.stats(),
+        "worker": worker_memory(),
+    }
 
 @app.post("/predict")
 def predict(data: CarFeatures):
     input_df = pd.DataFrame([data.dict()])
-    prediction = model.predict(input_df)[0]
+    predictions, versions = registry_v1.predict(input_df)
+    prediction = predictions[0]
     logger.info(f"Received prediction request: {data}")
     logger.info(f"Prediction result: {prediction}")
-    return {"predicted_price": prediction}
+    return {"predicted_price": prediction, "model_version": versions[0]}
 
 @app.post("/predict2")
-def predict_v2(data: CarFeaturesV2):
-    input_df = pd.DataFrame([data.dict()])
-    prediction = model_v2.predict(input_df)[0]
+async def predict_v2(data: CarFeaturesV2):
+    row = normalize_v2(data.model_dump())
+    key = tuple(row[c] for c in FEATURES_V2)
+    token = registry_v2.token()
+    if cache.reset_if_stale(token) and token[0] is not None:
+        # a new model went live: re-warm the popular specs off the request path
+        asyncio.get_running_loop().run_in_executor(None, prefill_cache)
+    answer = cache.get(key, token)
+    if answer is None:
+        # Evaluated together with any other /predict2 calls arriving in the same window
+        answer = await batcher.submit(row)
+        cache.put(key, answer, token)
+    prediction, version = answer
     logger.info(f"Received prediction request (v2): {data}")
     logger.info(f"Prediction result (v2): {prediction}")
-    return {"predicted_price": prediction}
\ No newline at end of file
+    return {"predicted_price": prediction, "model_version": version}
+
+def _check_batch_size(rows):
+    if rows > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} rows per batch")
+
+def _arrow_frame(body):
+    """Arrow IPC stream → DataFrame with the CarFeaturesV2 columns and defaults."""
+    if pa is None:
+        raise HTTPException(status_code=415, detail="Arrow input needs pyarrow installed")
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Arrow stream: {e}")
+    _check_batch_size(table.num_rows)
+    df = table.to_pandas()
+    required = [f for f, info in CarFeaturesV2.model_fields.items() if info.is_required()]
+    missing = [f for f in required if f not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+    for field, info in CarFeaturesV2.model_fields.items():
+        if field not in df.columns:
+            df[field] = info.default
+        elif not info.is_required():
+            df[field] = df[field].fillna(info.default)
+    if df[required].isna().any().any():
+        raise HTTPException(status_code=400, detail=f"Null values in {', '.join(required)}")
+    return df[FEATURES_V2]
+
+@app.post("/predict2/batch")
+async def predict_v2_batch(request: Request):
+    """Predict a JSON array of CarFeaturesV2 objects, or an Arrow IPC stream
+    (Content-Type: application/vnd.apache.arrow.stream) with the same
+    columns, in one pipeline call. Prices come back in input order."""
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(ARROW_STREAM):
+        df = _arrow_frame(body)
+    else:
+        # Count rows before validating them: an oversized body is rejected
+        # without building a model object per row.
+        try:
+            rows = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+        if isinstance(rows, list):
+            _check_batch_size(len(rows))
+        try:
+            df = pd.DataFrame([r.model_dump() for r in _rows_v2.validate_python(rows)], columns=FEATURES_V2)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    if not len(df):
+        return {"count": 0, "predicted_prices": []}
+    predictions, versions = await run_in_threadpool(registry_v2.predict, df)
+    logger.info(f"Batch prediction request (v2): {len(df)} rows")
+    result = {"count": len(df), "predicted_prices": [float(p) for p in predictions]}
+    if (versions == versions[0]).all():
+        result["model_version"] = versions[0]
+    else:  # A/B split: say which rows the candidate answered
+        result["model_versions"] = versions.tolist()
+    return result
+
+def _admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ML_ADMIN_TOKEN)")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def _registry(name):
+    if name not in registries:
+        raise HTTPException(status_code=404, detail=f"Unknown model {name}")
+    return registries[name]
+
+@app.get("/admin/models")
+def list_models(x_admin_token: str = Header(None)):
+    _admin(x_admin_token)
+    return {name: r.status() for name, r in registries.items()}
+
+@app.post("/admin/models/{name}/reload")
+def reload_model(name: str, version: str = None, slot: str = "live", x_admin_token: str = Header(None)):
+    """Load `version` (default: what CURRENT / CANDIDATE point at), warm it up
+    and swap it into `slot` (live | candidate) without a restart."""
+    _admin(x_admin_token)
+    registry = _registry(name)
+    if slot not in ("live", "candidate"):
+        raise HTTPException(status_code=400, detail="slot must be live or candidate")
+    if version and version not in registry.versions():
+        raise HTTPException(status_code=404, detail=f"No version {version} of {name}")
+    try:
+        loaded = registry.reload(version, slot=slot)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    logger.info(f"Admin reload of {name} {slot}: {loaded and loaded.version}")
+    return registry.status()
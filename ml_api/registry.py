@@ -0,0 +1,301 @@
+"""
+Versioned model registry with lazy loading, warm-up and hot swap.
+
+Layout under MODEL_DIR (./models, mounted from ml_api/models in compose):
+
+    models/
+      car_price_model_v2/
+        20261018-030000/model.pkl   one directory per trained version: the
+        20261018-030000/forest/     sklearn pickle, and the same forest as
+        20261019-030000/...         node arrays (forest.py)
+        CURRENT                     version to serve (default: newest directory)
+        CANDIDATE                   optional version to compare against it
+      car_price_model_v2.pkl        pre-registry layout, served as version
+                                    "legacy" while no version directory exists
+
+ml_lab/retrain.py writes each version into a dot-prefixed temporary
+directory, renames it into place and then replaces CURRENT, so a
+half-written model is never picked up.
+
+A version is served from its node arrays when it has them (MODEL_FORMAT
+"auto"), from model.pkl otherwise or with MODEL_FORMAT "pickle". Node
+arrays are memory-mapped by default (mmap=True): every worker process maps
+the same files, so the forest sits once in the OS page cache however many
+workers run, instead of once per process. Pickled forests cannot share
+this way (sklearn copies the tree arrays on unpickling). A version is
+loaded on first use (the app preloads at startup so this
+happens before traffic is accepted) and warmed up with one prediction
+before it is published. Publishing is a single reference swap: requests in
+flight finish on the model they started with, new ones get the new
+version, nothing restarts. Swaps are triggered by `Watcher`, which polls
+the pointers, or by the admin reload endpoint.
+
+With a CANDIDATE present, `predict()` either shadows it (live answers,
+candidate evaluated off the request path and the difference recorded) or
+A/B-splits rows between the two by a stable hash of the features. Shadow
+work runs on one thread with at most `shadow_queue` calls waiting; calls
+beyond that are not shadowed and are counted as dropped.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from forest import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+LEGACY = "legacy"
+MODEL_FILE = "model.pkl"
+FOREST_DIR = "forest"
+FORMATS = ("auto", "pickle")
+MODES = ("off", "shadow", "ab")
+
+
+class Loaded(NamedTuple):
+    version: str
+    model: object
+    loaded_at: float
+    format: str
+
+
+class ModelRegistry:
+    def __init__(self, root, name, warmup=None, mode="shadow", share=0.1, format="auto", mmap=True,
+                 shadow_queue=4):
+        self.root = root
+        self.name = name
+        self.dir = os.path.join(root, name)
+        self.warmup = warmup        # DataFrame predicted once before a version is published
+        self.mode = mode            # what to do with a candidate: off | shadow | ab
+        self.share = share          # fraction of rows the candidate answers in ab mode
+        self.format = format        # auto: node arrays when exported | pickle: always model.pkl
+        self.mmap = mmap            # map node arrays read-only instead of reading them in
+        self._live = None
+        self._candidate = None
+        self._seen = (None, None)   # (CURRENT, CANDIDATE) as last acted upon
+        self._lock = threading.Lock()
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shadow-{name}")
+        self._shadow_slots = threading.BoundedSemaphore(shadow_queue)  # running + waiting shadow calls
+        self._stats_lock = threading.Lock()
+        self._stats = {"live_rows": 0, "candidate_rows": 0, "shadow_rows": 0, "shadow_dropped": 0,
+                       "shadow_abs_diff": 0.0, "shadow_rel_diff": 0.0}
+
+    # -- what is on disk ---------------------------------------------------
+
+    def versions(self):
+        if not os.path.isdir(self.dir):
+            return []
+        return sorted(v for v in os.listdir(self.dir)
+                      if not v.startswith(".") and os.path.isfile(os.path.join(self.dir, v, MODEL_FILE)))
+
+    def _pointer(self, which):
+        try:
+            with open(os.path.join(self.dir, which)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_version(self):
+        version = self._pointer("CURRENT")
+        if version:
+            return version
+        versions = self.versions()
+        if versions:
+            return versions[-1]
+        if os.path.isfile(self.path(LEGACY)):
+            return LEGACY
+        raise FileNotFoundError(f"No {self.name} model under {self.root}")
+
+    def candidate_version(self):
+        version = self._pointer("CANDIDATE")
+        return version if version and version != self.current_version() else None
+
+    def path(self, version):
+        if version == LEGACY:
+            return os.path.join(self.root, f"{self.name}.pkl")
+        return os.path.join(self.dir, version, MODEL_FILE)
+
+    # -- loading and swapping ----------------------------------------------
+
+    def _load(self, version):
+        started = time.perf_counter()
+        forest_dir = os.path.join(self.dir, version, FOREST_DIR)
+        if self.format == "auto" and version != LEGACY and os.path.isfile(os.path.join(forest_dir, "meta.json")):
+            model = CompiledForest.load(forest_dir, mmap_mode="r" if self.mmap else None)
+            format = "forest-mmap" if self.mmap else "forest"
+        else:
+            model, format = joblib.load(self.path(version)), "pickle"
+        if self.warmup is not None:
+            model.predict(self.warmup)
+        logger.info(f"Loaded {self.name} {version} ({format}) in {time.perf_counter() - started:.2f}s")
+        return Loaded(version, model, time.time(), format)
+
+    def live(self):
+        """The published model, loading CURRENT on first use."""
+        live = self._live
+        if live is None:
+            with self._lock:
+                if self._live is None:
+                    current = self.current_version()
+                    self._live = self._load(current)
+                    self._seen = (current, self._seen[1])
+                live = self._live
+        return live
+
+    def candidate(self):
+        """The candidate model, if one is configured, loading it on first use."""
+        candidate = self._candidate
+        if candidate is None and self.mode != "off":
+            version = self.candidate_version()
+            if version is None:
+                return None
+            with self._lock:
+                if self._candidate is None:
+                    self._candidate = self._load(version)
+                    self._seen = (self._seen[0], version)
+                candidate = self._candidate
+        return candidate
+
+    def token(self):
+        """Identifies the models answering right now; changes on every swap."""
+        live, candidate = self._live, self._candidate
+        return (live and live.version, candidate and candidate.version, self.mode)
+
+    def preload(self):
+        self.live()
+        self.candidate()
+
+    def reload(self, version=None, slot="live"):
+        """Load `version` (default: what the pointer says), warm it up and
+        publish it in `slot`. The old model serves until the swap."""
+        if slot == "candidate":
+            version = version or self.candidate_version()
+            if version is None:
+                self._candidate = None
+                return None
+        else:
+            version = version or self.current_version()
+        with self._lock:
+            loaded = self._load(version)
+            if slot == "candidate":
+                self._candidate = loaded
+            else:
+                self._live = loaded
+                self._reset_stats()
+        return loaded
+
+    def refresh(self):
+        """Swap in whatever the pointers name if they changed since last seen.
+        A version pinned through the admin endpoint stays until they do."""
+        current, candidate = self.current_version(), self.candidate_version()
+        seen_current, seen_candidate = self._seen
+        if current != seen_current and self._live is not None:
+            self.reload(current)
+        if candidate != seen_candidate and self.mode != "off":
+            self.reload(candidate, slot="candidate")
+        self._seen = (current, candidate)
+
+    # -- prediction ----------------------------------------------------------
+
+    def predict(self, df):
+        """(predictions, versions) for the rows of `df`; versions[i] is the
+        model version that produced predictions[i]."""
+        live = self.live()
+        candidate = self.candidate()
+        if candidate is None or self.mode == "off":
+            self._count(live_rows=len(df))
+            return live.model.predict(df), np.full(len(df), live.version, dtype=object)
+
+        if self.mode == "shadow":
+            predictions = live.model.predict(df)
+            self._count(live_rows=len(df))
+            if self._shadow_slots.acquire(blocking=False):
+                self._shadow_pool.submit(self._shadow, candidate, df, predictions)
+            else:  # shadow thread is behind: skip rather than queue without bound
+                self._count(shadow_dropped=len(df))
+            return predictions, np.full(len(df), live.version, dtype=object)
+
+        # ab: a stable split, so the same features always get the same arm
+        buckets = pd.util.hash_pandas_object(df, index=False).to_numpy() % 10_000
+        to_candidate = buckets < self.share * 10_000
+        predictions = np.empty(len(df))
+        versions = np.full(len(df), live.version, dtype=object)
+        if (~to_candidate).any():
+            predictions[~to_candidate] = live.model.predict(df[~to_candidate])
+        if to_candidate.any():
+            predictions[to_candidate] = candidate.model.predict(df[to_candidate])
+            versions[to_candidate] = candidate.version
+        self._count(live_rows=int((~to_candidate).sum()), candidate_rows=int(to_candidate.sum()))
+        return predictions, versions
+
+    def _shadow(self, candidate, df, live_predictions):
+        try:
+            shadow = candidate.model.predict(df)
+        except Exception:
+            logger.exception(f"Shadow prediction with {self.name} {candidate.version} failed")
+            return
+        finally:
+            self._shadow_slots.release()
+        diff = np.abs(shadow - live_predictions)
+        self._count(shadow_rows=len(df), shadow_abs_diff=float(diff.sum()),
+                    shadow_rel_diff=float((diff / np.maximum(np.abs(live_predictions), 1.0)).sum()))
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def _reset_stats(self):
+        with self._stats_lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def status(self):
+        live, candidate = self._live, self._candidate
+        with self._stats_lock:
+            stats = dict(self._stats)
+        status = {
+            "live": live and {"version": live.version, "format": live.format, "loaded_at": live.loaded_at},
+            "candidate": candidate and {"version": candidate.version, "format": candidate.format,
+                                        "loaded_at": candidate.loaded_at},
+            "mode": self.mode,
+            "versions": self.versions(),
+            "live_rows": stats["live_rows"],
+        }
+        if self.mode == "ab":
+            status.update(share=self.share, candidate_rows=stats["candidate_rows"])
+        elif self.mode == "shadow" and (stats["shadow_rows"] or stats["shadow_dropped"]):
+            rows = stats["shadow_rows"]
+            status.update(shadow_rows=rows, shadow_dropped=stats["shadow_dropped"])
+            if rows:
+                status.update(shadow_mean_abs_diff=round(stats["shadow_abs_diff"] / rows, 2),
+                              shadow_mean_rel_diff=round(stats["shadow_rel_diff"] / rows, 4))
+        return status
+
+
+class Watcher(threading.Thread):
+    """Polls the registries' pointers every `interval` seconds and hot-swaps
+    new versions."""
+
+    def __init__(self, registries, interval):
+        super().__init__(name="model-watcher", daemon=True)
+        self.registries = registries
+        self.interval = interval
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            for registry in self.registries:
+                try:
+                    registry.refresh()
+                except Exception:
+                    logger.exception(f"Refreshing {registry.name} failed")
+
+    def stop(self):
+        self._halt.set()
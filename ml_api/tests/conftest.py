@@ -0,0 +1,55 @@
+import importlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyRegressor
+
+FEATURES_V2 = ["year", "mileage", "brand", "model", "gear_type", "color", "fuel_type", "body_type"]
+
+
+def constant_model(price):
+    """A model that prices every car at `price`, so tests can tell versions apart."""
+    return DummyRegressor(strategy="constant", constant=price).fit(np.zeros((1, 1)), [price])
+
+
+def publish(root, name, version, model, pointer="CURRENT"):
+    """Write `model` as `version` of `name` under MODEL_DIR `root` the way
+    ml_lab/retrain.py does, and point `pointer` at it (None: leave pointers)."""
+    path = os.path.join(root, name, version)
+    os.makedirs(path, exist_ok=True)
+    joblib.dump(model, os.path.join(path, "model.pkl"))
+    if pointer:
+        with open(os.path.join(root, name, pointer), "w") as f:
+            f.write(version)
+    return path
+
+
+def car(**overrides):
+    return {"year": 2018, "mileage": 60_000, "brand": "Chevrolet", "model": "Cobalt", **overrides}
+
+
+def frame(n):
+    return pd.DataFrame([car(year=2000 + i % 25, mileage=1000 * i) for i in range(n)]).reindex(
+        columns=FEATURES_V2, fill_value="Unknown")
+
+
+@pytest.fixture
+def load_main(tmp_path, monkeypatch):
+    """Import a fresh ml_api main against a tmp MODEL_DIR holding constant
+    models (v1 10000, v2 20000), with `env` overriding its settings."""
+    publish(tmp_path, "car_price_model", "v1", constant_model(10_000.0))
+    publish(tmp_path, "car_price_model_v2", "20260101-000000", constant_model(20_000.0))
+
+    def load(**env):
+        settings = {"MODEL_DIR": str(tmp_path), "MODEL_WATCH_SECONDS": "0", **env}
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+        sys.modules.pop("main", None)
+        return importlib.import_module("main")
+
+    yield load
+    sys.modules.pop("main", None)
@@ -0,0 +1,121 @@
+"""
+HTTP behaviour of main.py against constant models in a tmp MODEL_DIR
+(see conftest.load_main).
+"""
+import io
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import car, constant_model, frame, publish
+
+
+@pytest.fixture
+def client(load_main):
+    main = load_main(PREDICT_MAX_BATCH="5")
+    with TestClient(main.app) as client:
+        client.main = main
+        yield client
+
+
+def arrow(df):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def test_batch_json(client):
+    response = client.post("/predict2/batch", json=[car(), car(brand="Kia", color="")])
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "predicted_prices": [20000.0, 20000.0],
+                               "model_version": "20260101-000000"}
+    assert client.post("/predict2/batch", json=[]).json() == {"count": 0, "predicted_prices": []}
+
+
+def test_batch_arrow_fills_optional_columns(client):
+    df = frame(3)[["year", "mileage", "brand", "model"]]
+    response = client.post("/predict2/batch", content=arrow(df),
+                           headers={"content-type": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    assert response.json()["predicted_prices"] == [20000.0] * 3
+
+    missing = client.post("/predict2/batch", content=arrow(df[["year", "mileage"]]),
+                          headers={"content-type": "application/vnd.apache.arrow.stream"})
+    assert missing.status_code == 400
+    garbage = client.post("/predict2/batch", content=b"not arrow",
+                          headers={"content-type": "application/vnd.apache.arrow.stream"})
+    assert garbage.status_code == 400
+
+
+def test_batch_rejects_oversized_before_validating(client, monkeypatch):
+    validated = []
+    monkeypatch.setattr(client.main._rows_v2, "validate_python",
+                        lambda rows: validated.append(rows) or [])
+    assert client.post("/predict2/batch", json=[car()] * 6).status_code == 413
+    assert validated == []
+    assert client.post("/predict2/batch", content=arrow(frame(6)),
+                       headers={"content-type": "application/vnd.apache.arrow.stream"}).status_code == 413
+
+
+def test_batch_rejects_invalid(client):
+    assert client.post("/predict2/batch", json=[{"year": 2018}]).status_code == 422
+    assert client.post("/predict2/batch", content=b"[{",
+                       headers={"content-type": "application/json"}).status_code == 422
+
+
+def test_admin_reload(load_main, tmp_path):
+    main = load_main(ML_ADMIN_TOKEN="secret")
+    publish(tmp_path, "car_price_model_v2", "20260201-000000", constant_model(25_000.0), pointer=None)
+    with TestClient(main.app) as client:
+        url = "/admin/models/car_price_model_v2/reload"
+        assert client.post(url).status_code == 401
+        assert client.post(url, headers={"X-Admin-Token": "nope"}).status_code == 401
+        assert client.post(url + "?version=missing", headers={"X-Admin-Token": "secret"}).status_code == 404
+        assert client.post("/admin/models/nope/reload", headers={"X-Admin-Token": "secret"}).status_code == 404
+
+        status = client.post(url + "?version=20260201-000000", headers={"X-Admin-Token": "secret"}).json()
+        assert status["live"]["version"] == "20260201-000000"
+        assert client.post("/predict2", json=car()).json() == {
+            "predicted_price": 25_000.0, "model_version": "20260201-000000"}
+
+
+def test_admin_disabled_without_token(client):
+    assert client.get("/admin/models", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+SMAPS_ROLLUP = """\
+55d0c0a00000-7ffd8b5fe000 ---p 00000000 00:00 0                          [rollup]
+Rss:              262144 kB
+Pss:              180224 kB
+Pss_Anon:         120000 kB
+Shared_Clean:     102400 kB
+Shared_Dirty:       2048 kB
+Private_Clean:     20480 kB
+Private_Dirty:    137216 kB
+Referenced:       262144 kB
+Anonymous:        137216 kB
+Swap:                  0 kB
+"""
+
+
+def test_parse_smaps_rollup(load_main):
+    main = load_main()
+    assert main.parse_smaps_rollup(SMAPS_ROLLUP) == {
+        "rss_mb": 256.0, "pss_mb": 176.0, "uss_mb": 154.0, "shared_mb": 102.0}
+    assert main.parse_smaps_rollup("") == {"rss_mb": 0, "pss_mb": 0, "uss_mb": 0, "shared_mb": 0}
+
+
+def test_healthz_reports_worker_memory(client):
+    worker = client.get("/healthz").json()["worker"]
+    assert worker is None or worker["rss_mb"] >= worker["uss_mb"] > 0
+
+
+def test_mileage_bucketed_only_with_cache(load_main):
+    row = car(mileage=61_499, color="  ", brand=" Kia ")
+    cached = load_main(PREDICT_CACHE_SIZE="100").normalize_v2(dict(row))
+    assert (cached["mileage"], cached["brand"], cached["color"]) == (61_000, "Kia", "Unknown")
+    uncached = load_main(PREDICT_CACHE_SIZE="0").normalize_v2(dict(row))
+    assert (uncached["mileage"], uncached["brand"], uncached["color"]) == (61_499, "Kia", "Unknown")
@@ -0,0 +1,60 @@
+import asyncio
+
+from batcher import MicroBatcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def recording(fn=lambda rows: [r * 10 for r in rows]):
+    calls = []
+
+    def predict_many(rows):
+        calls.append(list(rows))
+        return fn(rows)
+    return predict_many, calls
+
+
+def test_concurrent_submits_share_one_call_in_order():
+    predict_many, calls = recording()
+    batcher = MicroBatcher(predict_many, window=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    assert run(main()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert batcher.stats() == {"batches": 1, "rows": 5, "avg_batch": 5.0}
+
+
+def test_exception_reaches_every_waiter():
+    def fail(rows):
+        raise ValueError("model exploded")
+    batcher = MicroBatcher(recording(fail)[0], window=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+    results = run(main())
+    assert len(results) == 3
+    assert all(isinstance(r, ValueError) and str(r) == "model exploded" for r in results)
+    assert batcher.stats()["batches"] == 0
+
+
+def test_full_batch_flushes_without_waiting_for_the_window():
+    predict_many, calls = recording()
+    batcher = MicroBatcher(predict_many, window=30, max_batch=3)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=5)
+    assert run(main()) == [0, 10, 20]
+    assert calls == [[0, 1, 2]]
+
+
+def test_rows_past_max_batch_go_in_the_next_batch():
+    predict_many, calls = recording()
+    batcher = MicroBatcher(predict_many, window=0.01, max_batch=2)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    assert run(main()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1], [2, 3], [4]]
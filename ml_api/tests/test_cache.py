@@ -0,0 +1,37 @@
+import cache as cache_module
+from cache import PredictionCache
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(maxsize=2)
+    for key in ("a", "b"):
+        assert cache.get(key, "v1") is None
+        cache.put(key, key.upper(), "v1")
+    assert cache.get("a", "v1") == "A"      # a is now most recently used
+    cache.put("c", "C", "v1")               # evicts b
+    assert cache.get("b", "v1") is None
+    assert cache.get("c", "v1") == "C"
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 3
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl=60)
+    cache.get("a", "v1")
+    cache.put("a", 1.0, "v1")
+    now[0] += 59
+    assert cache.get("a", "v1") == 1.0
+    now[0] += 2
+    assert cache.get("a", "v1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_model_swap_invalidates():
+    cache = PredictionCache()
+    cache.get("a", "v1")
+    cache.put("a", 1.0, "v1")
+    assert cache.get("a", "v2") is None     # new model: everything from v1 is gone
+    cache.put("b", 2.0, "v1")               # computed by v1 but finished after the swap
+    assert cache.get("b", "v2") is None
+    assert cache.stats()["invalidations"] == 2
@@ -0,0 +1,79 @@
+"""
+Compiled forest against sklearn, on pipelines shaped like ml_lab/retrain.py's.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+import forest
+
+CAT_COLS = ["brand", "model", "gear_type", "color", "fuel_type", "body_type"]
+FEATURES = ["year", "mileage"] + CAT_COLS
+
+
+def cars(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"year": rng.integers(1995, 2026, n), "mileage": rng.integers(0, 400_000, n)})
+    for col in CAT_COLS:
+        df[col] = rng.choice([f"{col}-{i}" for i in range(12)] + ["Unknown"], n)
+    price = (df["year"] - 1990) * 900 - df["mileage"] * 0.015 + (df["brand"] == "brand-3") * 4000
+    return df[FEATURES], price + rng.normal(0, 300, n)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    X, y = cars(3000, seed=1)
+    return Pipeline([
+        ("preprocessor", ColumnTransformer([
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CAT_COLS),
+        ], remainder="passthrough")),
+        ("model", RandomForestRegressor(n_estimators=20, max_depth=12, random_state=0)),
+    ]).fit(X, y)
+
+
+def test_pipeline_parity(pipeline, tmp_path):
+    X, _ = cars(1000, seed=2)
+    X.loc[::7, "brand"] = "never-seen"     # unknown categories → all one-hot columns zero
+    X.loc[::11, "mileage"] = 10_000_000    # beyond the training range
+    forest.export(pipeline, tmp_path, check=X)
+
+    compiled = forest.CompiledForest.load(tmp_path)
+    np.testing.assert_allclose(compiled.predict(X), pipeline.predict(X), rtol=1e-9)
+    np.testing.assert_allclose(compiled.predict(X.iloc[:1]), pipeline.predict(X.iloc[:1]), rtol=1e-9)
+
+
+def test_plain_forest_parity(tmp_path):
+    X, y = cars(2000, seed=3)
+    X = X[["year", "mileage"]]
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)  # unbounded depth
+    forest.export(model, tmp_path)
+
+    compiled = forest.CompiledForest.load(tmp_path, mmap_mode="r")
+    assert isinstance(compiled.value, np.memmap)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-9)
+
+
+def test_thresholds_between_float32_values(tmp_path):
+    # Midpoints between adjacent float32 values are not float32-representable;
+    # inputs on either side must still take sklearn's branch.
+    x = np.float32(1.1)
+    values = np.array([np.nextafter(x, np.float32(-np.inf)), x, np.nextafter(x, np.float32(np.inf))])
+    X = pd.DataFrame({"year": np.repeat(values, 10).astype(np.float64), "mileage": 0.0})
+    y = np.repeat([1.0, 2.0, 3.0], 10)
+    model = RandomForestRegressor(n_estimators=3, bootstrap=False, random_state=0).fit(X, y)
+    forest.export(model, tmp_path, check=X)
+    np.testing.assert_array_equal(forest.CompiledForest.load(tmp_path).predict(X), model.predict(X))
+
+
+def test_artifact_smaller_than_pickle(pipeline, tmp_path):
+    import joblib
+    joblib.dump(pipeline, tmp_path / "model.pkl")
+    forest.export(pipeline, tmp_path / "forest")
+    size = sum(f.stat().st_size for f in (tmp_path / "forest").iterdir())
+    assert size < os.path.getsize(tmp_path / "model.pkl") / 2
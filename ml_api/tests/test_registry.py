@@ -0,0 +1,168 @@
+"""
+ModelRegistry against constant models in a tmp MODEL_DIR: lazy loading,
+pointer-driven and admin swaps, candidate shadow / A/B modes.
+"""
+import threading
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+import forest
+from conftest import constant_model, frame, publish
+from registry import ModelRegistry, Watcher
+
+NAME = "car_price_model_v2"
+
+
+def registry(root, **kwargs):
+    return ModelRegistry(str(root), NAME, warmup=frame(1), **kwargs)
+
+
+def price(reg, n=1):
+    predictions, versions = reg.predict(frame(n))
+    return predictions[0], versions[0]
+
+
+def drain(reg):
+    """Wait for shadow work queued so far."""
+    reg._shadow_pool.submit(lambda: None).result(timeout=5)
+
+
+def test_loads_lazily_newest_version_without_pointer(tmp_path):
+    publish(tmp_path, NAME, "20260101-000000", constant_model(1.0), pointer=None)
+    publish(tmp_path, NAME, "20260102-000000", constant_model(2.0), pointer=None)
+    reg = registry(tmp_path)
+    assert reg.status()["live"] is None and reg.token()[0] is None
+
+    assert price(reg) == (2.0, "20260102-000000")
+    assert reg.status()["live"]["version"] == "20260102-000000"
+    assert reg.status()["versions"] == ["20260101-000000", "20260102-000000"]
+
+
+def test_swaps_when_current_pointer_changes(tmp_path):
+    publish(tmp_path, NAME, "a", constant_model(1.0))
+    reg = registry(tmp_path)
+    assert price(reg, 3) == (1.0, "a")
+    token = reg.token()
+
+    reg.refresh()  # nothing moved
+    assert reg.token() == token
+
+    publish(tmp_path, NAME, "b", constant_model(2.0))
+    reg.refresh()
+    assert price(reg) == (2.0, "b")
+    assert reg.token() != token
+    assert reg.status()["live_rows"] == 1  # counters restart with the new version
+
+
+def test_watcher_polls_pointers(tmp_path):
+    publish(tmp_path, NAME, "a", constant_model(1.0))
+    reg = registry(tmp_path)
+    reg.preload()
+    watcher = Watcher([reg], interval=0.02)
+    watcher.start()
+    try:
+        publish(tmp_path, NAME, "b", constant_model(2.0))
+        deadline = time.monotonic() + 5
+        while reg.token()[0] != "b" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert price(reg) == (2.0, "b")
+    finally:
+        watcher.stop()
+        watcher.join(timeout=1)
+
+
+def test_admin_pin_holds_until_pointer_moves(tmp_path):
+    publish(tmp_path, NAME, "a", constant_model(1.0))
+    publish(tmp_path, NAME, "b", constant_model(2.0))
+    reg = registry(tmp_path)
+    reg.preload()
+
+    reg.reload("a")          # roll back by hand while CURRENT says b
+    reg.refresh()
+    assert price(reg) == (1.0, "a")
+
+    publish(tmp_path, NAME, "c", constant_model(3.0))
+    reg.refresh()
+    assert price(reg) == (3.0, "c")
+
+
+def test_ab_split_is_stable_per_feature_row(tmp_path):
+    publish(tmp_path, NAME, "live", constant_model(1.0))
+    publish(tmp_path, NAME, "cand", constant_model(2.0), pointer="CANDIDATE")
+    reg = registry(tmp_path, mode="ab", share=0.3)
+    df = frame(1000)
+
+    predictions, versions = reg.predict(df)
+    assert set(versions) == {"live", "cand"}
+    np.testing.assert_array_equal(predictions, np.where(versions == "cand", 2.0, 1.0))
+    assert 0.2 < (versions == "cand").mean() < 0.4
+
+    order = np.random.default_rng(0).permutation(len(df))
+    _, shuffled = reg.predict(df.iloc[order])
+    np.testing.assert_array_equal(shuffled, versions[order])
+    status = reg.status()
+    assert status["candidate_rows"] == 2 * (versions == "cand").sum()
+    assert status["live_rows"] + status["candidate_rows"] == 2000
+
+
+def test_shadow_records_differences_off_the_request_path(tmp_path):
+    publish(tmp_path, NAME, "live", constant_model(20_000.0))
+    publish(tmp_path, NAME, "cand", constant_model(21_000.0), pointer="CANDIDATE")
+    reg = registry(tmp_path, mode="shadow")
+
+    predictions, versions = reg.predict(frame(10))
+    assert set(predictions) == {20_000.0} and set(versions) == {"live"}
+    drain(reg)
+    status = reg.status()
+    assert status["candidate"]["version"] == "cand"
+    assert (status["shadow_rows"], status["shadow_dropped"]) == (10, 0)
+    assert status["shadow_mean_abs_diff"] == 1000.0
+    assert status["shadow_mean_rel_diff"] == 0.05
+
+
+class Gated:
+    """Wraps a model; predict() blocks until the gate opens."""
+
+    def __init__(self, model, gate):
+        self.model, self.gate = model, gate
+
+    def predict(self, df):
+        self.gate.wait(timeout=5)
+        return self.model.predict(df)
+
+
+def test_shadow_work_is_dropped_when_backed_up(tmp_path):
+    publish(tmp_path, NAME, "live", constant_model(1.0))
+    publish(tmp_path, NAME, "cand", constant_model(2.0), pointer="CANDIDATE")
+    reg = registry(tmp_path, mode="shadow", shadow_queue=2)
+    reg.preload()
+    gate = threading.Event()
+    reg._candidate = reg._candidate._replace(model=Gated(reg._candidate.model, gate))
+
+    for _ in range(5):
+        reg.predict(frame(4))    # answers never wait for the shadow thread
+    assert reg.status()["shadow_dropped"] == 3 * 4
+
+    gate.set()
+    drain(reg)
+    reg.predict(frame(4))        # slots are free again
+    drain(reg)
+    status = reg.status()
+    assert (status["shadow_rows"], status["shadow_dropped"]) == (3 * 4, 3 * 4)
+
+
+def test_exported_forest_is_memory_mapped(tmp_path):
+    X = frame(200)[["year", "mileage"]]
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, X["year"] * 100.0)
+    forest.export(model, publish(tmp_path, NAME, "v1", model) + "/forest", check=X)
+
+    mapped = ModelRegistry(str(tmp_path), NAME, warmup=X[:1], mmap=True).live()
+    assert mapped.format == "forest-mmap"
+    assert all(isinstance(getattr(mapped.model, a), np.memmap) for a in forest.ARRAYS)
+    np.testing.assert_allclose(mapped.model.predict(X), model.predict(X), rtol=1e-9)
+
+    read = ModelRegistry(str(tmp_path), NAME, mmap=False).live()
+    assert read.format == "forest"
+    assert not any(isinstance(getattr(read.model, a), np.memmap) for a in forest.ARRAYS)
@@ -5,8 +5,24 @@ Improvements over the original notebook:
 - Pulls from the live PostgreSQL (122k records) instead of an 8k JSON dump
 - Removes the 30-day recency filter — uses ALL historical data
 - Fills NULL categorical features as "Unknown" instead of dropping rows
+- Streams rows in chunks (server-side cursor, or --parquet for the
+  extract_data export) into category / int32 / float32 columns, applying
+  the sanity ranges while loading; load time and peak RSS are reported
+- Scores every model on a rolling holdout (the newest 20% of rows by car_id),
+  then refits it on all rows before publishing
+- --incremental: grows the live v2 forest with warm_start trees fitted on
+  the rows added since its training watermark, and falls back to a full
+  rebuild when drift (PSI) or an accuracy drop crosses a threshold; every
+  run writes a metrics JSON to <output>/metrics/
 - Uses 200 estimators (was 100) for better forest stability
 - Saves both v2 (full features) and v1-compat (year+mileage only)
+- Publishes each run as a new version in ml_api's model registry
+  (<output>/<model>/<version>/model.pkl + CURRENT pointer), which a running
+  ml_api picks up without a restart; --candidate publishes v2 as CANDIDATE
+  instead, for shadow / A/B comparison against the live version
+- Also exports each forest as memory-mappable node arrays (<version>/forest/,
+  see ml_api/forest.py), checked against the sklearn predictions, which
+  ml_api serves instead of unpickling model.pkl
 
 Usage:
     # Run inside Docker on car-dev-net so it can reach postgres:5432
@@ -14,88 +30,207 @@ Usage:
       --network car-dev-net \
       -v $(pwd)/ml_api/models:/output \
       -v $(pwd)/ml_lab/retrain.py:/retrain.py \
+      -v $(pwd)/ml_api/forest.py:/forest.py \
       python:3.12 bash -c \
         "pip install -q psycopg2-binary pandas 'scikit-learn==1.3.0' 'numpy==1.26.4' joblib && python /retrain.py"
+
+    # Daily: only what arrived since the last run, full rebuild on drift
+    ... python /retrain.py --incremental
 """
 
+import argparse
+import json
+import os
+import resource
+import shutil
 import sys
+import time
 import psycopg2
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
 import joblib
+from datetime import datetime, timezone
+
+# forest.py is shared with ml_api: next to this script in Docker, ../ml_api in the repo
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ml_api"))
+import forest
 
 DB_CONFIG = dict(
     host="postgres", port=5432, dbname="postgres",
     user="marketplace_user", password="marketplace_user",
 )
 OUTPUT_DIR = "/output"
+KEEP_VERSIONS = 5
+FEATURE_COLS = ["year", "mileage", "brand", "model",
+                "gear_type", "color", "fuel_type", "body_type"]
+PARITY_ROWS = 2000   # rows the exported forest is checked against sklearn on
+
+# Incremental retraining (--incremental)
+HOLDOUT_FRACTION    = 0.2    # newest rows by car_id, never trained on, that models are scored on
+MIN_NEW_ROWS        = 500    # fewer new rows than this: keep the live model
+TREES_PER_INCREMENT = 10     # warm_start trees added per incremental run
+MAX_TREES           = 200    # a forest grown past this is rebuilt instead
+R2_DROP_MAX         = 0.05   # live model's R² on new rows vs at its training → rebuild
+PSI_MAX             = 0.2    # population stability index of any DRIFT_COLS → rebuild
+DRIFT_COLS          = ["year", "mileage", "price"]
+
+# Sanity ranges, applied while loading so rejected rows never reach pandas
+YEARS    = (1990, 2026)
+MILEAGES = (0, 1_000_000)
+PRICES   = (200, 300_000)
+NUM_DTYPES = {"year": np.int32, "mileage": np.int32, "price": np.float32, "car_id": np.int64}
+CAT_COLS = ["brand", "model", "gear_type", "color", "fuel_type", "body_type"]
+OPTIONAL_CAT_COLS = ("gear_type", "color", "fuel_type", "body_type")   # NULL → "Unknown"
+CHUNK_ROWS = 20_000
+
+QUERY = """
+    SELECT car_id, year, mileage, price::float8 AS price, brand, model,
+           gear_type::text AS gear_type, color, fuel_type::text AS fuel_type, body_type
+    FROM marketplace.cars
+    WHERE car_id  > %(since)s
+      AND brand   IS NOT NULL
+      AND model   IS NOT NULL
+      AND year    BETWEEN %(year_min)s    AND %(year_max)s
+      AND mileage BETWEEN %(mileage_min)s AND %(mileage_max)s
+      AND price   BETWEEN %(price_min)s   AND %(price_max)s
+"""
+RANGES = dict(year_min=YEARS[0], year_max=YEARS[1], mileage_min=MILEAGES[0],
+              mileage_max=MILEAGES[1], price_min=PRICES[0], price_max=PRICES[1])
+
+
+class FrameBuilder:
+    """Accumulates column chunks into compact arrays: int32 / float32
+    numerics and, for CAT_COLS, int32 codes into a growing vocabulary, so no
+    object column is ever built. `frame()` turns them into one DataFrame
+    with `category` dtypes."""
+
+    def __init__(self):
+        self.rows = 0
+        self.numeric = {col: [] for col in NUM_DTYPES}
+        self.codes = {col: [] for col in CAT_COLS}
+        self.vocab = {col: {} for col in CAT_COLS}
+
+    def add(self, columns):
+        """`columns`: column name → sequence of values, one chunk."""
+        for col, dtype in NUM_DTYPES.items():
+            self.numeric[col].append(np.asarray(columns[col], dtype=dtype))
+        for col in CAT_COLS:
+            vocab, values = self.vocab[col], columns[col]
+            if col in OPTIONAL_CAT_COLS:
+                values = ("Unknown" if v is None else v for v in values)
+            self.codes[col].append(np.fromiter((vocab.setdefault(v, len(vocab)) for v in values),
+                                               dtype=np.int32, count=len(columns[col])))
+        self.rows += len(columns["year"])
+
+    def frame(self):
+        data = {col: np.concatenate(chunks) if chunks else np.empty(0, NUM_DTYPES[col])
+                for col, chunks in self.numeric.items()}
+        for col in CAT_COLS:
+            codes = np.concatenate(self.codes[col]) if self.codes[col] else np.empty(0, np.int32)
+            data[col] = pd.Categorical.from_codes(codes, categories=list(self.vocab[col]))
+        self.numeric = self.codes = None    # the frame owns the data now
+        return pd.DataFrame({col: data[col] for col in FEATURE_COLS + ["price", "car_id"]}, copy=False)
+
 
-def load_data():
-    print("Connecting to database...")
-    conn = psycopg2.connect(**DB_CONFIG)
-    query = """
-        SELECT year, mileage, brand, model, gear_type, color,
-               fuel_type, body_type, price
-        FROM marketplace.cars
-        WHERE year    IS NOT NULL
-          AND mileage IS NOT NULL
-          AND price   IS NOT NULL
-          AND brand   IS NOT NULL
-          AND model   IS NOT NULL
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    print(f"Loaded {len(df):,} rows")
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # ru_maxrss is in kB on Linux
+
+
+def load_data(parquet=None, since=0):
+    """Cars with car_id > `since` passing the sanity ranges, streamed
+    CHUNK_ROWS at a time from a server-side cursor (or from the Parquet
+    export under `parquet`)."""
+    started = time.perf_counter()
+    builder = FrameBuilder()
+    if parquet:
+        print(f"Reading Parquet export {parquet}...")
+        for chunk in _parquet_chunks(parquet, since):
+            builder.add(chunk)
+    else:
+        print("Connecting to database...")
+        conn = psycopg2.connect(**DB_CONFIG)
+        with conn.cursor(name="retrain_cars") as cur:
+            cur.itersize = CHUNK_ROWS
+            cur.execute(QUERY, dict(RANGES, since=since))
+            rows = cur.fetchmany(CHUNK_ROWS)
+            names = [c.name for c in cur.description]   # named cursors know it after the first fetch
+            while rows:
+                builder.add(dict(zip(names, zip(*rows))))
+                rows = cur.fetchmany(CHUNK_ROWS)
+        conn.close()
+    df = builder.frame()
+    print(f"Loaded {len(df):,} rows in {time.perf_counter() - started:.1f}s "
+          f"({df.memory_usage(deep=True).sum() / 2**20:,.1f} MB, peak RSS {peak_rss_mb():,.0f} MB)")
     return df
 
 
+def _parquet_chunks(path, since=0):
+    """Column chunks from extract_data's Parquet dataset, filtered and
+    projected by pyarrow before they become Python values."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    price = ds.field("price").cast(pa.float64())    # NUMERIC is stored as decimal
+    f = ((ds.field("car_id") > since) & ds.field("brand").is_valid() & ds.field("model").is_valid()
+         & (ds.field("year") >= YEARS[0]) & (ds.field("year") <= YEARS[1])
+         & (ds.field("mileage") >= MILEAGES[0]) & (ds.field("mileage") <= MILEAGES[1])
+         & (price >= PRICES[0]) & (price <= PRICES[1]))
+    for batch in dataset.to_batches(columns=FEATURE_COLS + ["price", "car_id"], filter=f, batch_size=CHUNK_ROWS):
+        chunk = {col: batch.column(col).cast(pa.float64()).to_numpy(zero_copy_only=False)
+                 for col in NUM_DTYPES}
+        for col in CAT_COLS:
+            chunk[col] = batch.column(col).cast(pa.string()).to_pylist()
+        yield chunk
+
+
 def clean(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    for col in ("price", "year", "mileage"):
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    df = df.dropna(subset=["price", "year", "mileage"])
-
-    # Sanity ranges
-    df = df[(df["year"]    >= 1990) & (df["year"]    <= 2026)]
-    df = df[(df["mileage"] >= 0)    & (df["mileage"] <= 1_000_000)]
-    df = df[(df["price"]   >= 200)  & (df["price"]   <= 300_000)]
-
-    before = len(df)
-
-    # Remove price outliers per brand/model group using residual from a fast
-    # linear fit — catches e.g. currency-unformatted values like "12500000"
-    X = df[["year", "mileage"]].values
-    y = df["price"].values
+    """Drop price outliers from a load_data() frame (ranges and NULL
+    categoricals are already handled there), with a single row selection."""
+    # Remove price outliers using the residual from a fast linear fit on
+    # year + mileage — catches e.g. currency-unformatted values like "12500000"
+    X = df[["year", "mileage"]].to_numpy(dtype=np.float64)
+    y = df["price"].to_numpy(dtype=np.float64)
     lr = LinearRegression().fit(X, y)
     residuals = np.abs(y - lr.predict(X))
     threshold = residuals.mean() + 3 * residuals.std()
-    df = df[residuals < threshold]
-    print(f"Removed {before - len(df):,} outliers → {len(df):,} remain")
-
-    # Fill NULL categoricals so rows aren't dropped
-    for col in ("gear_type", "color", "fuel_type", "body_type"):
-        df[col] = df[col].fillna("Unknown")
-
-    df = df.dropna()
+    keep = residuals < threshold
+    df = df[keep].reset_index(drop=True)
+    print(f"Removed {(~keep).sum():,} outliers → {len(df):,} remain")
     print(f"Final training set: {len(df):,} rows")
     return df
 
 
+def rolling_split(df: pd.DataFrame):
+    """(train, holdout), the holdout being the newest HOLDOUT_FRACTION of
+    rows by car_id: models are scored on listings newer than any they
+    learned from, as they will be used."""
+    df = df.iloc[np.argsort(df["car_id"].to_numpy(), kind="stable")]
+    cut = int(len(df) * (1 - HOLDOUT_FRACTION))
+    return df.iloc[:cut], df.iloc[cut:]
+
+
+def evaluate(model, df: pd.DataFrame, cols=FEATURE_COLS):
+    preds = model.predict(df[cols])
+    y = df["price"].to_numpy(dtype=np.float64)
+    return {"r2": round(float(r2_score(y, preds)), 4),
+            "rmse": round(float(np.sqrt(np.mean((preds - y) ** 2))), 2)}
+
+
 def train(df: pd.DataFrame):
-    feature_cols = ["year", "mileage", "brand", "model",
-                    "gear_type", "color", "fuel_type", "body_type"]
+    """Fit the v2 pipeline from scratch; returns (pipeline, metrics). The
+    metrics are those of a fit without the rolling holdout; the returned
+    pipeline is refitted on every row, newest listings included."""
+    feature_cols = FEATURE_COLS
     num_cols = ["year", "mileage"]
     cat_cols = ["brand", "model", "gear_type", "color", "fuel_type", "body_type"]
 
-    X = df[feature_cols]
-    y = df["price"]
-
     preprocessor = ColumnTransformer([
         ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
     ], remainder="passthrough")
@@ -109,53 +244,214 @@ def train(df: pd.DataFrame):
         )),
     ])
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    fit_rows, holdout = rolling_split(df)
     print("Training v2 model (year+mileage+brand+model+gear+color+fuel+body)...")
-    pipeline.fit(X_train, y_train)
-    r2 = pipeline.score(X_test, y_test)
-    print(f"  R² on test set: {r2:.4f}")
+    started = time.perf_counter()
+    pipeline.fit(fit_rows[feature_cols], fit_rows["price"])
+    metrics = evaluate(pipeline, holdout)
+    print(f"  R² on rolling holdout: {metrics['r2']:.4f}")
+    print(f"  RMSE: ${metrics['rmse']:,.0f}")
+    print("Refitting v2 on all rows...")
+    pipeline.fit(df[feature_cols], df["price"])
+    metrics.update(train_seconds=round(time.perf_counter() - started, 1), rows_used=len(df),
+                   rows_holdout=len(holdout), watermark=int(df["car_id"].max()))
+    return pipeline, metrics
 
-    # Rough RMSE
-    preds = pipeline.predict(X_test)
-    rmse = np.sqrt(np.mean((preds - y_test.values) ** 2))
-    print(f"  RMSE: ${rmse:,.0f}")
 
+def grow(pipeline, df: pd.DataFrame):
+    """Add TREES_PER_INCREMENT warm_start trees fitted on `df` to a trained
+    v2 pipeline. The fitted encoder is reused as is, so the existing trees
+    stay valid; categories it has never seen encode as unknown until the
+    next full rebuild."""
+    preprocessor, rf = pipeline.named_steps["preprocessor"], pipeline.named_steps["model"]
+    rf.set_params(warm_start=True, n_estimators=rf.n_estimators + TREES_PER_INCREMENT)
+    rf.fit(preprocessor.transform(df[FEATURE_COLS]), df["price"])
+    rf.set_params(warm_start=False)
     return pipeline
 
 
 def train_simple(df: pd.DataFrame):
     """Train the year+mileage-only v1-compatible model."""
-    X = df[["year", "mileage"]]
-    y = df["price"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    fit_rows, holdout = rolling_split(df)
     m = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
     print("Training v1 model (year+mileage only)...")
-    m.fit(X_train, y_train)
-    r2 = m.score(X_test, y_test)
-    print(f"  R² on test set: {r2:.4f}")
-    return m
+    m.fit(fit_rows[["year", "mileage"]], fit_rows["price"])
+    r2 = evaluate(m, holdout, ["year", "mileage"])["r2"]
+    print(f"  R² on rolling holdout: {r2:.4f}")
+    return m.fit(df[["year", "mileage"]], df["price"])
 
 
-def main():
-    df_raw  = load_data()
-    df      = clean(df_raw)
+def reference(df: pd.DataFrame):
+    """Decile edges of DRIFT_COLS and the share of rows in each bin, kept
+    with a full rebuild as the baseline later data is compared against."""
+    ref = {}
+    for col in DRIFT_COLS:
+        values = df[col].to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, 11)[1:-1]))
+        ref[col] = {"edges": edges.tolist(), "shares": _shares(values, edges).tolist()}
+    return ref
+
+
+def _shares(values, edges):
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return counts / max(counts.sum(), 1)
+
+
+def psi(ref, df: pd.DataFrame):
+    """Population stability index of each DRIFT_COLS column of `df` against
+    `ref` (< 0.1 stable, > 0.2 shifted)."""
+    out = {}
+    for col, baseline in ref.items():
+        expected = np.maximum(np.asarray(baseline["shares"]), 1e-4)
+        actual = np.maximum(_shares(df[col].to_numpy(dtype=np.float64), np.asarray(baseline["edges"])), 1e-4)
+        out[col] = round(float(np.sum((actual - expected) * np.log(actual / expected))), 4)
+    return out
+
+
+def publish(model, name, version, check, pointer="CURRENT", training=None):
+    """Write `model` (pickle + node arrays, plus `training` as training.json)
+    as `version` of `name` and point `pointer` at it. `check` holds inputs
+    the node arrays must reproduce the sklearn predictions on.
+
+    The version directory is written under a dot-prefixed name and renamed
+    into place, and the pointer is replaced atomically, so ml_api's registry
+    never sees a partial model."""
+    base = os.path.join(OUTPUT_DIR, name)
+    tmp = os.path.join(base, f".{version}")
+    os.makedirs(tmp, exist_ok=True)
+    joblib.dump(model, os.path.join(tmp, "model.pkl"))
+    forest.export(model, os.path.join(tmp, "forest"), check=check)
+    if training is not None:
+        with open(os.path.join(tmp, "training.json"), "w") as f:
+            json.dump(training, f, indent=2, ensure_ascii=False)
+    os.rename(tmp, os.path.join(base, version))
+
+    with open(os.path.join(base, f".{pointer}"), "w") as f:
+        f.write(version + "\n")
+    os.replace(os.path.join(base, f".{pointer}"), os.path.join(base, pointer))
+    print(f"Saved → {base}/{version} ({pointer})")
+    prune(base)
+
+
+def prune(base):
+    """Drop all but the newest KEEP_VERSIONS versions, never a pointed-at one."""
+    pinned = set()
+    for pointer in ("CURRENT", "CANDIDATE"):
+        if os.path.exists(os.path.join(base, pointer)):
+            with open(os.path.join(base, pointer)) as f:
+                pinned.add(f.read().strip())
+    versions = sorted(v for v in os.listdir(base)
+                      if not v.startswith(".") and os.path.isdir(os.path.join(base, v)))
+    for version in versions[:-KEEP_VERSIONS]:
+        if version not in pinned:
+            shutil.rmtree(os.path.join(base, version))
+
 
-    model_v2  = train(df)
-    model_v1  = train_simple(df)
+def live_training(name="car_price_model_v2"):
+    """(version, training.json) of the version CURRENT points at; (version,
+    None) when it predates training.json, (None, None) without a CURRENT."""
+    base = os.path.join(OUTPUT_DIR, name)
+    try:
+        with open(os.path.join(base, "CURRENT")) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None, None
+    try:
+        with open(os.path.join(base, version, "training.json")) as f:
+            return version, json.load(f)
+    except (FileNotFoundError, ValueError):
+        return version, None
+
+
+def full_rebuild(run, parquet, pointer):
+    df = clean(load_data(parquet))
+    check = df.sample(min(PARITY_ROWS, len(df)), random_state=42)[FEATURE_COLS]
+
+    model_v2, metrics = train(df)
+    run.update(metrics, mode="full", n_estimators=model_v2.named_steps["model"].n_estimators)
+    training = dict(run, reference=reference(df))
+    publish(model_v2, "car_price_model_v2", run["version"], check, pointer, training)
+    run["published"] = pointer
+    if pointer == "CURRENT":
+        publish(train_simple(df), "car_price_model", run["version"], check[["year", "mileage"]])
+
+
+def incremental(run, parquet, pointer):
+    """Grow the live v2 forest on the rows since its watermark, or hand
+    over to a full rebuild when the live model no longer fits the data."""
+    base_version, previous = live_training()
+    if previous is None:
+        run["reason"] = "live model has no training watermark"
+        return full_rebuild(run, parquet, pointer)
+
+    new = load_data(parquet, since=previous["watermark"])
+    run.update(base_version=base_version, rows_new=len(new))
+    if len(new) < MIN_NEW_ROWS:
+        run.update(mode="skipped", reason=f"{len(new)} new rows < MIN_NEW_ROWS")
+        print(f"Only {len(new):,} rows since car_id {previous['watermark']}; keeping {base_version}")
+        return
+    new = clean(new)
+    fit_rows, holdout = rolling_split(new)
+
+    model = joblib.load(os.path.join(OUTPUT_DIR, "car_price_model_v2", base_version, "model.pkl"))
+    before = evaluate(model, holdout)
+    drift = psi(previous["reference"], new)
+    run["drift"] = {"psi": drift, "r2_at_training": previous["r2"], "r2_on_new_rows": before["r2"]}
+    reasons = [f"PSI({col}) {value} > {PSI_MAX}" for col, value in drift.items() if value > PSI_MAX]
+    if previous["r2"] - before["r2"] > R2_DROP_MAX:
+        reasons.append(f"R² {previous['r2']} → {before['r2']} on new rows")
+    if model.named_steps["model"].n_estimators + TREES_PER_INCREMENT > MAX_TREES:
+        reasons.append(f"forest would exceed MAX_TREES={MAX_TREES}")
+    if reasons:
+        run["reason"] = "; ".join(reasons)
+        print(f"Full rebuild: {run['reason']}")
+        return full_rebuild(run, parquet, pointer)
+
+    print(f"Growing {base_version} with {TREES_PER_INCREMENT} trees on {len(fit_rows):,} new rows...")
+    started = time.perf_counter()
+    grow(model, fit_rows)
+    train_seconds = round(time.perf_counter() - started, 1)
+    after = evaluate(model, holdout)
+    print(f"  R² on rolling holdout: {before['r2']:.4f} → {after['r2']:.4f}")
+    if after["r2"] < before["r2"] - R2_DROP_MAX:
+        run["reason"] = f"grown forest scored R² {after['r2']} vs {before['r2']} before growing"
+        print(f"Full rebuild: {run['reason']}")
+        return full_rebuild(run, parquet, pointer)
+
+    run.update(after, mode="incremental", train_seconds=train_seconds, rows_used=len(fit_rows),
+               rows_holdout=len(holdout), watermark=int(fit_rows["car_id"].max()),
+               n_estimators=model.named_steps["model"].n_estimators)
+    training = dict(run, reference=previous["reference"])   # drift stays measured against the last full rebuild
+    publish(model, "car_price_model_v2", run["version"], holdout[FEATURE_COLS].head(PARITY_ROWS), pointer, training)
+    run["published"] = pointer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--candidate", action="store_true",
+                        help="publish v2 as CANDIDATE instead of CURRENT (v1 is not retrained)")
+    parser.add_argument("--parquet", metavar="DIR",
+                        help="train from extract_data's Parquet export (cars/ dataset) instead of PostgreSQL")
+    parser.add_argument("--incremental", action="store_true",
+                        help="grow the live v2 model on rows since its watermark; rebuild only on drift")
+    args = parser.parse_args()
 
-    import os
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    started = time.perf_counter()
+    version = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    pointer = "CANDIDATE" if args.candidate else "CURRENT"
+    run = {"version": version, "trained_at": datetime.now(timezone.utc).isoformat(), "published": None}
+    if args.incremental:
+        incremental(run, args.parquet, pointer)
+    else:
+        full_rebuild(run, args.parquet, pointer)
 
-    v2_path = f"{OUTPUT_DIR}/car_price_model_v2.pkl"
-    v1_path = f"{OUTPUT_DIR}/car_price_model.pkl"
-    joblib.dump(model_v2, v2_path)
-    joblib.dump(model_v1, v1_path)
-    print(f"Saved → {v2_path}")
-    print(f"Saved → {v1_path}")
+    run.update(total_seconds=round(time.perf_counter() - started, 1), peak_rss_mb=round(peak_rss_mb()))
+    os.makedirs(os.path.join(OUTPUT_DIR, "metrics"), exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, "metrics", f"{version}.json")
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2, ensure_ascii=False)
+    print(json.dumps(run, indent=2, ensure_ascii=False))
+    print(f"Metrics → {path}")
 
 
 if __name__ == "__main__":
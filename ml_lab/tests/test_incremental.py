@@ -0,0 +1,194 @@
+"""
+retrain.py --incremental against synthetic listings and a tmp OUTPUT_DIR:
+which branch a run takes (skip / grow / full rebuild), the drift measure
+behind it, the training watermark and the metrics JSON every run writes.
+"""
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timedelta, timezone
+
+import joblib
+import numpy as np
+import pytest
+
+import retrain
+
+BRANDS = {"Chevrolet": ["Cobalt", "Gentra", "Spark"], "Kia": ["K5", "Sportage"], "BYD": ["Song"]}
+
+
+def cars(n, first_id, seed, year_shift=0):
+    """`n` listings with car_ids from `first_id`, as load_data() returns them;
+    year_shift moves model years (and with them prices) later."""
+    rng = np.random.default_rng(seed)
+    brand = rng.choice(list(BRANDS), n)
+    year = rng.integers(2005, 2020, n) + year_shift
+    mileage = rng.integers(0, 300_000, n)
+    price = (3000 + (year - 2000) * 700 - mileage * 0.015 + (brand == "BYD") * 6000
+             + rng.normal(0, 250, n))
+    builder = retrain.FrameBuilder()
+    builder.add({
+        "car_id": range(first_id, first_id + n), "year": year, "mileage": mileage, "price": price,
+        "brand": brand.tolist(), "model": [rng.choice(BRANDS[b]) for b in brand],
+        "gear_type": rng.choice(["AT", "MT", None], n).tolist(),
+        "color": rng.choice(["white", "black", "silver"], n).tolist(),
+        "fuel_type": rng.choice(["petrol", "gas", None], n).tolist(),
+        "body_type": [None] * n,
+    })
+    return builder.frame()
+
+
+class Table:
+    """Stands in for marketplace.cars behind retrain.load_data."""
+
+    def __init__(self, df):
+        self.df = df
+        self.loads = []
+
+    def append(self, df):
+        self.df = retrain.pd.concat([self.df, df], ignore_index=True)
+
+    def load_data(self, parquet=None, since=0):
+        self.loads.append(since)
+        rows = self.df[self.df["car_id"] > since].reset_index(drop=True)
+        return rows.astype({c: "category" for c in retrain.CAT_COLS})
+
+
+class Clock(datetime):
+    """Run versions are timestamps to the second: one fake day per run."""
+    current = datetime(2026, 10, 1, 3, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def run(monkeypatch, *args):
+    """retrain.main() with `args`; returns its metrics JSON."""
+    monkeypatch.setattr(sys, "argv", ["retrain.py", *args])
+    Clock.current += timedelta(days=1)
+    retrain.main()
+    version = Clock.current.strftime("%Y%m%d-%H%M%S")
+    with open(os.path.join(retrain.OUTPUT_DIR, "metrics", f"{version}.json")) as f:
+        return json.load(f)
+
+
+def live():
+    return retrain.live_training("car_price_model_v2")
+
+
+@pytest.fixture(scope="module")
+def baseline(tmp_path_factory):
+    """One full rebuild on 2000 listings, copied into each test's OUTPUT_DIR."""
+    root = tmp_path_factory.mktemp("baseline")
+    patch = pytest.MonkeyPatch()
+    table = Table(cars(2000, 1, seed=1))
+    patch.setattr(retrain, "OUTPUT_DIR", str(root))
+    patch.setattr(retrain, "load_data", table.load_data)
+    patch.setattr(retrain, "datetime", Clock)
+    metrics = run(patch)
+    patch.undo()
+    return root, table.df, metrics
+
+
+@pytest.fixture
+def output(baseline, tmp_path, monkeypatch):
+    root, df, _ = baseline
+    shutil.copytree(root, tmp_path / "out")
+    table = Table(df)
+    monkeypatch.setattr(retrain, "OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setattr(retrain, "load_data", table.load_data)
+    monkeypatch.setattr(retrain, "datetime", Clock)
+    return table
+
+
+def test_full_rebuild_trains_on_every_row(baseline):
+    root, df, metrics = baseline
+    assert metrics["mode"] == "full" and metrics["published"] == "CURRENT"
+    assert metrics["rows_used"] == len(retrain.clean(df))          # holdout included after scoring
+    assert metrics["watermark"] == 2000
+    assert 0.9 < metrics["r2"] <= 1
+    with open(root / "car_price_model_v2" / "CURRENT") as f:
+        version = f.read().strip()
+    with open(root / "car_price_model_v2" / version / "training.json") as f:
+        training = json.load(f)
+    assert set(training["reference"]) == set(retrain.DRIFT_COLS)
+    assert (root / "car_price_model" / version / "model.pkl").exists()
+
+
+def test_psi_separates_shifted_from_unshifted_data():
+    ref = retrain.reference(cars(5000, 1, seed=1))
+    same = retrain.psi(ref, cars(3000, 1, seed=2))
+    shifted = retrain.psi(ref, cars(3000, 1, seed=3, year_shift=6))
+    assert all(value < 0.1 for value in same.values())
+    assert shifted["year"] > retrain.PSI_MAX and shifted["price"] > retrain.PSI_MAX
+    assert retrain.psi(ref, cars(5000, 1, seed=1)) == {col: 0 for col in retrain.DRIFT_COLS}
+
+
+def test_too_few_new_rows_keeps_the_live_model(output, monkeypatch):
+    before = live()
+    output.append(cars(retrain.MIN_NEW_ROWS - 1, 2001, seed=4))
+    metrics = run(monkeypatch, "--incremental")
+
+    assert output.loads == [2000]
+    assert metrics["mode"] == "skipped" and metrics["published"] is None
+    assert metrics["rows_new"] == retrain.MIN_NEW_ROWS - 1
+    assert live() == before
+
+
+def test_grows_on_new_rows_and_moves_the_watermark(output, monkeypatch):
+    base_version, base = live()
+    output.append(cars(800, 2001, seed=5))
+    metrics = run(monkeypatch, "--incremental")
+
+    assert metrics["mode"] == "incremental" and metrics["published"] == "CURRENT"
+    assert metrics["base_version"] == base_version
+    assert metrics["n_estimators"] == 100 + retrain.TREES_PER_INCREMENT
+    assert all(value < retrain.PSI_MAX for value in metrics["drift"]["psi"].values())
+    # the rolling holdout of the new rows is left for the next run
+    assert 2000 < metrics["watermark"] < 2800
+    version, training = live()
+    assert version == metrics["version"] and training["watermark"] == metrics["watermark"]
+    assert training["reference"] == base["reference"]
+    model = joblib.load(os.path.join(retrain.OUTPUT_DIR, "car_price_model_v2", version, "model.pkl"))
+    assert len(model.named_steps["model"].estimators_) == 110
+
+    output.append(cars(600, 2801, seed=6))
+    metrics = run(monkeypatch, "--incremental")
+    assert output.loads[-1] == training["watermark"]
+    assert metrics["mode"] == "incremental" and metrics["watermark"] > training["watermark"]
+    assert metrics["n_estimators"] == 120
+
+
+def test_drift_triggers_a_full_rebuild(output, monkeypatch):
+    output.append(cars(800, 2001, seed=7, year_shift=6))
+    metrics = run(monkeypatch, "--incremental")
+
+    assert metrics["mode"] == "full" and metrics["published"] == "CURRENT"
+    assert "PSI(year)" in metrics["reason"]
+    assert metrics["drift"]["psi"]["year"] > retrain.PSI_MAX
+    assert output.loads == [2000, 0]                  # rebuilt from every row
+    assert metrics["watermark"] == 2800 and metrics["n_estimators"] == 100
+    assert live()[1]["watermark"] == 2800
+
+
+def test_forest_size_cap_triggers_a_full_rebuild(output, monkeypatch):
+    monkeypatch.setattr(retrain, "MAX_TREES", 105)
+    output.append(cars(800, 2001, seed=5))
+    metrics = run(monkeypatch, "--incremental")
+
+    assert metrics["mode"] == "full"
+    assert metrics["reason"] == "forest would exceed MAX_TREES=105"
+    assert metrics["n_estimators"] == 100
+
+
+def test_accuracy_drop_triggers_a_full_rebuild(output, monkeypatch):
+    new = cars(800, 2001, seed=8)
+    new["price"] = new["price"][::-1].to_numpy()       # same distribution, prices unrelated to features
+    output.append(new)
+    metrics = run(monkeypatch, "--incremental")
+
+    assert metrics["mode"] == "full"
+    assert "R²" in metrics["reason"]
+    assert metrics["drift"]["r2_on_new_rows"] < metrics["drift"]["r2_at_training"] - retrain.R2_DROP_MAX
@@ -0,0 +1,136 @@
+"""
+retrain.py's streaming loader: FrameBuilder dtypes, and the Parquet path
+selecting the same rows as the SQL one.
+
+The SQL comparison needs a reachable Postgres (PG_HOST / PG_PORT / PG_USER /
+PG_PASSWORD / PG_DB, as for extract_data's tests); it builds a scratch cars
+table in its own schema.
+"""
+import os
+from decimal import Decimal
+
+import numpy as np
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import retrain
+
+
+def chunk(rows):
+    """Cursor-style rows (tuples in QUERY's column order) → column chunk."""
+    names = ["car_id", "year", "mileage", "price", "brand", "model",
+             "gear_type", "color", "fuel_type", "body_type"]
+    return dict(zip(names, zip(*rows)))
+
+
+def test_chunks_become_compact_columns():
+    builder = retrain.FrameBuilder()
+    builder.add(chunk([(1, 2018, 60000, 9500.0, "Chevrolet", "Cobalt", "AT", "white", None, "sedan"),
+                       (2, 2020, 15000, 14200.5, "Kia", "K5", None, None, "petrol", None)]))
+    builder.add(chunk([(3, 2015, 120000, 6100.0, "Chevrolet", "Gentra", "MT", "", "gas", "sedan")]))
+    df = builder.frame()
+
+    assert df.dtypes[["year", "mileage"]].tolist() == [np.int32, np.int32]
+    assert df.dtypes["price"] == np.float32 and df.dtypes["car_id"] == np.int64
+    assert all(df.dtypes[col] == "category" for col in retrain.CAT_COLS)
+    assert df["car_id"].tolist() == [1, 2, 3]
+    assert df["model"].tolist() == ["Cobalt", "K5", "Gentra"]      # vocabulary grows across chunks
+    assert df["gear_type"].tolist() == ["AT", "Unknown", "MT"]
+    assert df["fuel_type"].tolist() == ["Unknown", "petrol", "gas"]
+    assert df["body_type"].tolist() == ["sedan", "Unknown", "sedan"]
+    assert df["color"].tolist() == ["white", "Unknown", ""]         # only NULL becomes Unknown
+    assert list(df.columns) == retrain.FEATURE_COLS + ["price", "car_id"]
+
+
+def test_empty_load_has_the_same_columns():
+    df = retrain.FrameBuilder().frame()
+    assert len(df) == 0 and list(df.columns) == retrain.FEATURE_COLS + ["price", "car_id"]
+
+
+# Edge rows around every sanity range, plus NULL required / optional columns.
+ROWS = [
+    # year, mileage, price, brand, model, gear_type, color, fuel_type, body_type
+    (2018, 60000, "9500.00", "Chevrolet", "Cobalt", "AT", "white", "petrol", "sedan"),
+    (1990, 0, "200.00", "Chevrolet", "Spark", None, None, None, None),
+    (2026, 1000000, "300000.00", "Kia", "K5", "MT", "black", "gas", "sedan"),
+    (1989, 50000, "8000.00", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2027, 50000, "8000.00", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, -1, "8000.00", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, 1000001, "8000.00", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, 50000, "199.99", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, 50000, "300000.01", "Chevrolet", "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, 50000, "8000.00", None, "Nexia", "MT", "white", "gas", "sedan"),
+    (2018, 50000, "8000.00", "Chevrolet", None, "MT", "white", "gas", "sedan"),
+    (2019, 45000, "11000.00", "Chevrolet", "Malibu", "AT", "", None, "sedan"),
+]
+
+
+@pytest.fixture
+def scratch_db(monkeypatch):
+    config = dict(host=os.getenv("PG_HOST", "postgres"), port=int(os.getenv("PG_PORT", "5432")),
+                  user=os.getenv("PG_USER", "marketplace_user"),
+                  password=os.getenv("PG_PASSWORD", "marketplace_user"), dbname=os.getenv("PG_DB", "postgres"))
+    try:
+        conn = psycopg2.connect(**config)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no Postgres: {e}")
+    with conn.cursor() as cur:
+        cur.execute("""
+            DROP SCHEMA IF EXISTS retrain_test CASCADE;
+            CREATE SCHEMA retrain_test;
+            CREATE TABLE retrain_test.cars (
+                car_id SERIAL PRIMARY KEY, year INT, mileage INT, price DECIMAL(10, 2),
+                brand VARCHAR(255), model VARCHAR(255), gear_type VARCHAR(10), color VARCHAR(50),
+                fuel_type VARCHAR(20), body_type VARCHAR(50)
+            );
+        """)
+        cur.executemany("""
+            INSERT INTO retrain_test.cars (year, mileage, price, brand, model, gear_type, color,
+                                           fuel_type, body_type)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, ROWS)
+    conn.commit()
+    monkeypatch.setattr(retrain, "DB_CONFIG", config)
+    monkeypatch.setattr(retrain, "QUERY", retrain.QUERY.replace("marketplace.cars", "retrain_test.cars"))
+    yield conn
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA retrain_test CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def write_parquet(root):
+    """ROWS as extract_data's exporter lays them out: decimal prices,
+    dictionary strings, Hive partitions."""
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([("car_id", pa.int32()), ("year", pa.int32()), ("mileage", pa.int32()),
+                        ("price", pa.decimal128(10, 2))]
+                       + [(col, dictionary) for col in retrain.CAT_COLS])
+    columns = list(zip(*ROWS))
+    data = {"car_id": list(range(1, len(ROWS) + 1)), "year": columns[0], "mileage": columns[1],
+            "price": [Decimal(p) for p in columns[2]]}
+    data.update(zip(["brand", "model", "gear_type", "color", "fuel_type", "body_type"], columns[3:]))
+    table = pa.Table.from_pydict(data, schema=schema)
+    for month, rows in (("01", slice(0, 6)), ("02", slice(6, None))):
+        os.makedirs(root / f"created_year=2025/created_month={month}")
+        pq.write_table(table[rows], root / f"created_year=2025/created_month={month}/part-0000000001.parquet")
+
+
+def as_rows(df):
+    return [tuple(str(v) for v in row) for row in df.sort_values("car_id").itertuples(index=False)]
+
+
+def test_parquet_filter_matches_sql_ranges(scratch_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(retrain, "CHUNK_ROWS", 4)
+    write_parquet(tmp_path)
+
+    from_sql = retrain.load_data()
+    from_parquet = retrain.load_data(str(tmp_path))
+    assert sorted(from_sql["car_id"]) == [1, 2, 3, 12]
+    assert as_rows(from_parquet) == as_rows(from_sql)
+    assert from_parquet.dtypes.equals(from_sql.dtypes)
+
+    assert sorted(retrain.load_data(since=2)["car_id"]) == [3, 12]
+    assert sorted(retrain.load_data(str(tmp_path), since=2)["car_id"]) == [3, 12]
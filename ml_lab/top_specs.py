@@ -0,0 +1,82 @@
+"""
+Write the most common car specs in marketplace.cars to top_specs.json, the
+list ml_api pre-fills its /predict2 cache from at startup and after every
+model swap (PREDICT_CACHE_PREFILL in ml_api/main.py).
+
+Specs are keyed the way /predict2 caches requests: mileage rounded to
+--mileage-step, which must equal ml_api's PREDICT_CACHE_MILEAGE_BUCKET, and
+blank fields as "Unknown". Each popular spec is written twice, as its two
+clients ask for it: with fuel and body type, as the web form sends them,
+and without (both "Unknown"), as the Telegram bot does.
+
+Usage (same network and /output mount as retrain.py; run after it or daily):
+    docker run --rm \
+      --network car-dev-net \
+      -v $(pwd)/ml_api/models:/output \
+      -v $(pwd)/ml_lab/top_specs.py:/top_specs.py \
+      python:3.12 bash -c \
+        "pip install -q psycopg2-binary && python /top_specs.py --top 2000"
+"""
+
+import argparse
+import json
+import os
+import psycopg2
+
+DB_CONFIG = dict(
+    host="postgres", port=5432, dbname="postgres",
+    user="marketplace_user", password="marketplace_user",
+)
+OUTPUT_DIR = "/output"
+
+QUERY = """
+    SELECT brand, model, year, mileage, gear_type, color,
+           COALESCE(fuel_type, 'Unknown') AS fuel_type,
+           COALESCE(body_type, 'Unknown') AS body_type,
+           count(*)                       AS listings
+    FROM (
+        SELECT brand, model, year,
+               (round(mileage / %(step)s::numeric) * %(step)s)::int AS mileage,
+               COALESCE(gear_type::text, 'Unknown')                 AS gear_type,
+               COALESCE(NULLIF(color, ''), 'Unknown')               AS color,
+               COALESCE(fuel_type::text, 'Unknown')                 AS fuel_type,
+               COALESCE(NULLIF(body_type, ''), 'Unknown')           AS body_type
+        FROM marketplace.cars
+        WHERE brand   IS NOT NULL
+          AND model   IS NOT NULL
+          AND year    BETWEEN 1990 AND 2026
+          AND mileage BETWEEN 0 AND 1000000
+    ) AS spec
+    GROUP BY GROUPING SETS ((brand, model, year, mileage, gear_type, color, fuel_type, body_type),
+                            (brand, model, year, mileage, gear_type, color))
+    -- a full spec with both Unknown is the bot's key again
+    HAVING GROUPING(fuel_type) = 1 OR fuel_type <> 'Unknown' OR body_type <> 'Unknown'
+    ORDER BY listings DESC
+    LIMIT %(top)s
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--top", type=int, default=2000, help="number of specs to write")
+    parser.add_argument("--mileage-step", type=int, default=1000,
+                        help="km; listings are grouped by mileage rounded to this "
+                             "(ml_api's PREDICT_CACHE_MILEAGE_BUCKET)")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    with conn, conn.cursor() as cur:
+        cur.execute(QUERY, {"step": args.mileage_step, "top": args.top})
+        columns = [c.name for c in cur.description]
+        specs = [dict(zip(columns, row)) for row in cur.fetchall()]
+    conn.close()
+
+    path = os.path.join(OUTPUT_DIR, "top_specs.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(specs, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    print(f"Saved {len(specs):,} specs → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -534,12 +534,14 @@ def _report_view(category: str, days: int) -> tuple[str, InlineKeyboardMarkup, l
     return "\n".join(lines), InlineKeyboardMarkup(rows), models
 
 
-def _fetch_listings(category: str, model_label: str, days: int, page: int) -> dict | None:
+def _fetch_listings(category: str, model_label: str, days: int,
+                    cursor: str | None) -> dict | None:
+    params = {'category': category, 'model_label': model_label, 'days': days}
+    if cursor:
+        params['cursor'] = cursor
     try:
         r = requests.get(
-            f"{DJANGO_URL}/api/electronics/listings/",
-            params={'category': category, 'model_label': model_label,
-                    'days': days, 'page': page}, timeout=12,
+            f"{DJANGO_URL}/api/electronics/listings/", params=params, timeout=12,
         )
         r.raise_for_status()
         return r.json()
@@ -549,12 +551,14 @@ def _fetch_listings(category: str, model_label: str, days: int, page: int) -> di
 
 
 def _listings_view(category: str, model_label: str, days: int, page: int,
-                   idx: int) -> tuple[str, InlineKeyboardMarkup, str]:
+                   idx: int, cursors: list) -> tuple[str, InlineKeyboardMarkup, str]:
+    """`cursors[n]` is the keyset cursor that opens page n (None for page 0);
+    the next page's cursor is appended as pages are visited."""
     cat   = ELEC_CATEGORIES.get(category, {})
     emoji = cat.get('emoji', '🛒')
     per_label = ELEC_PERIOD_LABEL.get(str(days), f"{days} days")
 
-    payload = _fetch_listings(category, model_label, days, page)
+    payload = _fetch_listings(category, model_label, days, cursors[page])
     if payload is None:
         text = f"{emoji} <b>{model_label}</b> — ⚠️ could not fetch listings."
         kb = InlineKeyboardMarkup([[InlineKeyboardButton("← Back to report", callback_data="e|back")]])
@@ -562,8 +566,10 @@ def _listings_view(category: str, model_label: str, days: int, page: int,
 
     listings = payload.get('listings', [])
     total    = payload.get('total', 0)
-    page     = payload.get('page', page)
-    pages    = payload.get('pages', 0)
+    next_cursor = payload.get('next_cursor')
+    del cursors[page + 1:]
+    if next_cursor:
+        cursors.append(next_cursor)
 
     lines = [f"{emoji} <b>{model_label} — listings</b>"]
     if total:
@@ -590,7 +596,7 @@ def _listings_view(category: str, model_label: str, days: int, page: int,
     nav = []
     if page > 0:
         nav.append(InlineKeyboardButton("◀ Prev", callback_data=f"e|pg|{idx}|{page - 1}"))
-    if page < pages - 1:
+    if next_cursor:
         nav.append(InlineKeyboardButton("▶ Next", callback_data=f"e|pg|{idx}|{page + 1}"))
     btn_rows = [nav] if nav else []
     btn_rows.append([InlineKeyboardButton("← Back to report", callback_data="e|back")])
@@ -663,6 +669,12 @@ async def handle_electronics_callback(update: Update, context: ContextTypes.DEFA
         idx  = int(parts[2])
         page = int(parts[3]) if action == 'pg' else 0
         models = state['models']
+        if action == 'lst' or state.get('listing_idx') != idx:
+            state['listing_idx'], state['cursors'] = idx, [None]
+            page = 0
+        cursors = state['cursors']
+        if page >= len(cursors):
+            page = len(cursors) - 1
         if idx < 0 or idx >= len(models):
             text, kb, refreshed = _report_view(state['category'], state['days'])
             state['models'] = [m['model'] for m in refreshed]
@@ -670,7 +682,7 @@ async def handle_electronics_callback(update: Update, context: ContextTypes.DEFA
             return
         model_label = models[idx]
         text, kb, pm = _listings_view(state['category'], model_label,
-                                     state['days'], page, idx)
+                                     state['days'], page, idx, cursors)
         await _edit(text, kb, pm)
         return
 
@@ -0,0 +1,250 @@
+"""
+Shared asyncio fetch engine for the OLX scrapers.
+
+Replaces the per-scraper `RateLimiter` + `requests.Session` +
+`ThreadPoolExecutor(5)` combo. The old limiter slept *while holding its
+lock*, so the five detail threads queued behind each other's sleeps, and a
+listing page was only requested after every detail of the previous one had
+finished. Here:
+
+  - TokenBucket   : per-host politeness budget (mean interval + jitter).
+                    A caller reserves its slot synchronously and then sleeps
+                    on its own — nobody waits on a lock.
+  - per-host cap  : at most `per_host` requests in flight per host.
+  - retry/backoff : 429 / 5xx / connection errors retried with exponential
+                    backoff (Retry-After honoured); the slot is released
+                    while backing off.
+  - pages()       : iterate listing pages in order while the next ones are
+                    already downloading, so listing and detail fetches of
+                    consecutive pages overlap instead of alternating.
+
+Async code uses FetchEngine directly; the synchronous scrapers share one
+through BackgroundFetcher, which runs it on a private event-loop thread:
+
+    FETCHER = BackgroundFetcher(rate=1 / 1.0, per_host=4)
+    html = FETCHER.get(url)                     # one page
+    nxt = FETCHER.submit(next_url)              # prefetch, returns a Future
+    htmls = FETCHER.get_many(detail_urls)       # str or Exception per url
+"""
+
+import asyncio
+import atexit
+import logging
+import random
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class FetchError(Exception):
+    """A URL could not be fetched (non-retryable status or retries exhausted)."""
+
+    def __init__(self, url: str, reason):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+class _Retryable(Exception):
+    def __init__(self, status: int, retry_after: float | None = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------------------------
+# Token bucket
+# ---------------------------------------------------------------------------
+class TokenBucket:
+    """
+    GCRA-style token bucket: `rate` requests/second on average, up to `burst`
+    back-to-back. Each slot's spacing is stretched or shrunk by up to
+    ±`jitter` (fraction of the interval) so requests don't tick like a clock.
+
+    Single event loop, no awaits before the reservation → no lock needed.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0):
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self._tat = 0.0  # theoretical arrival time of the next request
+
+    def reserve(self, now: float) -> float:
+        """Claim the next slot; returns how long the caller must wait for it."""
+        tat = max(self._tat, now)
+        allowed_at = tat - (self.burst - 1) * self.interval
+        spacing = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._tat = tat + spacing
+        return max(0.0, allowed_at - now)
+
+    async def acquire(self) -> None:
+        delay = self.reserve(asyncio.get_running_loop().time())
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+class FetchEngine:
+    """
+    Async HTTP GETs with per-host rate limit + concurrency cap + retries.
+
+        async with FetchEngine(rate=1.0, per_host=4) as engine:
+            html = await engine.fetch(url)
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 1, jitter: float = 0.3,
+                 per_host: int = 4, retries: int = 3, backoff: float = 1.5,
+                 timeout: float = 20, headers: dict | None = None):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        self._hosts: dict[str, tuple[asyncio.Semaphore, TokenBucket]] = {}
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit_per_host=self.per_host),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    def _host(self, url: str):
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.per_host),
+                                 TokenBucket(self.rate, self.burst, self.jitter))
+        return self._hosts[host]
+
+    async def fetch(self, url: str) -> str:
+        """GET `url` and return the body text; raises FetchError."""
+        slots, bucket = self._host(url)
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with slots:
+                    await bucket.acquire()
+                    self.stats["requests"] += 1
+                    async with self._session.get(url) as resp:
+                        if resp.status in RETRY_STATUSES:
+                            raise _Retryable(resp.status, _retry_after(resp))
+                        if resp.status >= 400:
+                            self.stats["failures"] += 1
+                            raise FetchError(url, f"HTTP {resp.status}")
+                        text = await resp.text()
+                logger.info("Fetched page: %s", url)
+                return text
+            except _Retryable as e:
+                reason, retry_after = e, e.retry_after
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = e
+            if attempt == self.retries:
+                self.stats["failures"] += 1
+                raise FetchError(url, reason)
+            self.stats["retries"] += 1
+            delay = retry_after or self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+            logger.warning("Retry %d/%d for %s in %.1fs (%s)", attempt + 1, self.retries, url, delay, reason)
+            await asyncio.sleep(delay)
+
+    async def fetch_all(self, urls) -> list:
+        """Fetch many URLs concurrently; each result is the text or the exception."""
+        return await asyncio.gather(*(self.fetch(u) for u in urls), return_exceptions=True)
+
+    async def pages(self, urls, prefetch: int = 1):
+        """
+        Yield (url, text | exception) in order while up to `prefetch` following
+        pages are already downloading. Breaking out cancels the prefetches.
+        """
+        urls = iter(urls)
+        pending = []
+        try:
+            for url in urls:
+                pending.append((url, asyncio.ensure_future(self.fetch(url))))
+                if len(pending) > prefetch:
+                    yield await _settle(*pending.pop(0))
+            while pending:
+                yield await _settle(*pending.pop(0))
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+
+async def _settle(url, task):
+    try:
+        return url, await task
+    except FetchError as e:
+        return url, e
+
+
+def _retry_after(resp) -> float | None:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Sync bridge
+# ---------------------------------------------------------------------------
+class BackgroundFetcher:
+    """
+    One FetchEngine on a private event-loop thread, shared by synchronous
+    code (main loop + detail worker threads). Started lazily on first use.
+    """
+
+    def __init__(self, **engine_kwargs):
+        self._engine_kwargs = engine_kwargs
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._start_lock = threading.Lock()
+        self.engine: FetchEngine | None = None
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="fetch-engine", daemon=True).start()
+            engine = FetchEngine(**self._engine_kwargs)
+            asyncio.run_coroutine_threadsafe(engine.__aenter__(), loop).result()
+            self._loop, self.engine = loop, engine
+            atexit.register(self.close)
+
+    def submit(self, url: str):
+        """Start fetching `url`; returns a concurrent.futures.Future[str]."""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self.engine.fetch(url), self._loop)
+
+    def get(self, url: str) -> str:
+        return self.submit(url).result()
+
+    def get_many(self, urls) -> list:
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self.engine.fetch_all(list(urls)), self._loop).result()
+
+    def close(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.engine.__aexit__(None, None, None), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
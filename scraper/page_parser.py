@@ -0,0 +1,135 @@
+"""
+Pluggable HTML parsing for the OLX scrapers.
+
+The scrapers used to build every page with BeautifulSoup(..., 'html.parser')
+— a pure-Python tokenizer plus a pure-Python tree walk for every find(). A
+listing page is ~300 KB and every card, price and parameter lookup walked it
+again. parse_html() keeps the small slice of the BeautifulSoup API the
+extractors use, so extract_card() / parse_detail() / extract_car_ad_info()
+run unchanged on either backend:
+
+  - "lxml" : libxml2 parser; find/find_all become compiled XPath queries.
+             Default when lxml is installed.
+  - "soup" : BeautifulSoup + html.parser (the previous path; reference).
+
+Supported on both: find(tag, attrs, class_=, href=True), find_all(...),
+select_one("tag.cls tag.cls"), get_text(separator, strip), get(attr),
+node["attr"].
+
+    doc = parse_html(html)                  # OLX_PARSER=lxml|soup overrides
+    cards = doc.find_all('div', {'data-cy': 'l-card'})
+    price = cards[0].find('p', {'data-testid': 'ad-price'}).get_text(strip=True)
+"""
+
+import os
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+BACKENDS = ('lxml', 'soup')
+DEFAULT_BACKEND = os.environ.get('OLX_PARSER') or ('lxml' if lxml else 'soup')
+
+
+def parse_html(html, backend: str | None = None):
+    """Parse a page with the given backend (default DEFAULT_BACKEND)."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'soup':
+        return BeautifulSoup(html, 'html.parser')
+    if backend == 'lxml':
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', errors='replace')
+        return LxmlNode(lxml.html.document_fromstring(html))
+    raise ValueError(f"unknown parser backend {backend!r} (expected one of {BACKENDS})")
+
+
+def _literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat('" + "', \"'\", '".join(value.split("'")) + "')"
+
+
+def _class_test(cls: str) -> str:
+    return f"[contains(concat(' ', normalize-space(@class), ' '), {_literal(' ' + cls + ' ')})]"
+
+
+_QUERIES: dict = {}
+
+
+def _query(tag, attrs, class_, href):
+    """Compiled XPath for a find_all() call, cached per distinct signature."""
+    key = (tag, tuple(sorted((attrs or {}).items())), class_, href)
+    if key not in _QUERIES:
+        path = f".//{tag or '*'}"
+        for name, value in (attrs or {}).items():
+            if name == 'class':
+                path += _class_test(value)
+            elif value is True:
+                path += f"[@{name}]"
+            else:
+                path += f"[@{name}={_literal(value)}]"
+        if class_:
+            path += _class_test(class_)
+        if href:
+            path += "[@href]"
+        _QUERIES[key] = etree.XPath(path)
+    return _QUERIES[key]
+
+
+def _css_query(selector: str):
+    """Compiled XPath for a descendant chain like 'div.a span.b'."""
+    key = ('css', selector)
+    if key not in _QUERIES:
+        path = '.'
+        for step in selector.split():
+            tag, *classes = step.split('.')
+            path += f"//{tag or '*'}" + ''.join(_class_test(c) for c in classes)
+        _QUERIES[key] = etree.XPath(path)
+    return _QUERIES[key]
+
+
+# Text nodes BeautifulSoup leaves out of get_text(): script/style bodies.
+# Comments are not text nodes in XPath, so they are skipped as well.
+_TEXT = etree.XPath(".//text()[not(parent::script or parent::style)]") if lxml else None
+
+
+class LxmlNode:
+    """An lxml element behind the BeautifulSoup methods the extractors call."""
+
+    __slots__ = ('el',)
+
+    def __init__(self, el):
+        self.el = el
+
+    def find_all(self, tag=None, attrs=None, class_=None, href=None):
+        return [LxmlNode(e) for e in _query(tag, attrs, class_, href)(self.el)]
+
+    def find(self, tag=None, attrs=None, class_=None, href=None):
+        found = _query(tag, attrs, class_, href)(self.el)
+        return LxmlNode(found[0]) if found else None
+
+    def select_one(self, selector: str):
+        found = _css_query(selector)(self.el)
+        return LxmlNode(found[0]) if found else None
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        strings = _TEXT(self.el)
+        if strip:
+            strings = [s.strip() for s in strings]
+            strings = [s for s in strings if s]
+        return separator.join(strings)
+
+    def get(self, name, default=None):
+        return self.el.get(name, default)
+
+    def __getitem__(self, name):
+        value = self.el.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
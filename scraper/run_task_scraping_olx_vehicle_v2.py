@@ -17,21 +17,22 @@ import sys
 import logging
 import locale
 import re
-import random
+import queue
 import threading
-import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 
 from pytz import timezone
 import pandas as pd
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
 import subprocess
 import json
 
+from fetch_engine import BackgroundFetcher
+from page_parser import parse_html
+from scraper_utils import KnownIds, post_bulk, EARLY_STOP_THRESHOLD
+
 BRANDS_JSON_PATH = os.path.join(os.path.dirname(__file__), 'brands_models.json')
 
 USE_SELENIUM = 'S' in sys.argv
@@ -53,6 +54,8 @@ def log(msg):
 
 # Constants
 API_URL_DB = 'http://django:8000/api/cars/'
+API_URL_BULK = 'http://django:8000/api/cars/bulk/'
+API_URL_IDS = 'http://django:8000/api/cars/ids/'
 API_URL_FILTERED = 'http://django:8000/api/cars/filtered-list/'
 
 # Locale and timezone config
@@ -66,68 +69,41 @@ UZSUM_TO_USD = 12500
 # ---------------------------------------------------------------------------
 # PERFORMANCE FIX 1: requests.Session with connection pooling + retries.
 # v1 called bare requests.get() per request, opening a new TCP connection each
-# time and with no retry on transient OLX errors (429/5xx). v2 uses a single
-# pooled Session shared across threads with automatic backoff retries.
+# time and with no retry on transient errors. Used for our own Django API;
+# OLX pages go through FETCHER below.
 # ---------------------------------------------------------------------------
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-)
 REQUEST_TIMEOUT = 20  # FIX: v1 had no timeout, so a hung OLX request could stall forever
 
 
 def build_session():
     session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
     retry = Retry(
         total=3,
         backoff_factor=1.5,
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=frozenset(["GET", "POST"]),
     )
-    adapter = HTTPAdapter(
-        pool_connections=20,
-        pool_maxsize=20,  # allows the 5-worker thread pool to reuse connections
-        max_retries=retry,
-    )
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
-# Session used for scraping OLX (with browser UA + retries).
-SESSION = build_session()
-# Separate session for talking to our own Django API (UA irrelevant, but reuse pooling).
 API_SESSION = build_session()
 
 
 # ---------------------------------------------------------------------------
-# PERFORMANCE FIX 2: thread-safe rate limiter.
-# v1 had no throttling at all, which both risks getting blocked by OLX and,
-# combined with no concurrency, was simply slow. v2 enforces a minimum spacing
-# between outbound OLX requests plus random jitter to look less robotic. It is
-# thread-safe because detail pages are now fetched concurrently.
+# PERFORMANCE FIX 2: shared async fetch engine for OLX (see fetch_engine.py).
+# v1 had no throttling at all; the first v2 RateLimiter slept while holding
+# its lock, so the detail threads queued behind each other's sleeps. The
+# engine keeps the same budget — one request per ~1s on average (0.8s + mean
+# jitter) — through a per-host token bucket, caps in-flight requests per
+# host, and retries 429/5xx with backoff.
+# RELIABILITY FIX: v1 never checked the status, so HTTP 404/500 pages were
+# silently parsed as if they were valid; FETCHER raises FetchError for those.
 # ---------------------------------------------------------------------------
-class RateLimiter:
-    def __init__(self, min_interval=0.8, max_jitter=0.4):
-        self.min_interval = min_interval
-        self.max_jitter = max_jitter
-        self._lock = threading.Lock()
-        self._last_ts = 0.0
-
-    def wait(self):
-        with self._lock:
-            now = time.monotonic()
-            elapsed = now - self._last_ts
-            delay = self.min_interval - elapsed
-            if delay > 0:
-                time.sleep(delay)
-            # add jitter outside the strict interval so threads don't sync up
-            time.sleep(random.uniform(0, self.max_jitter))
-            self._last_ts = time.monotonic()
-
-
-RATE_LIMITER = RateLimiter(min_interval=0.8, max_jitter=0.4)
+FETCHER = BackgroundFetcher(rate=1 / 1.0, jitter=0.2, per_host=4,
+                            retries=3, backoff=1.5, timeout=REQUEST_TIMEOUT)
 
 
 def load_brands_and_models():
@@ -208,16 +184,6 @@ CONDITION_MAP = {
 }
 
 
-def fetch_page(url):
-    # RELIABILITY FIX: enforce timeout + raise_for_status. v1's fetch_page did
-    # neither, so HTTP 404/500 pages were silently parsed as if they were valid.
-    RATE_LIMITER.wait()
-    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
-    response.raise_for_status()
-    log(f"Fetched page: {url}")
-    return BeautifulSoup(response.content, 'html.parser')
-
-
 def extract_car_ad_info(ad):
     car_info = {}
 
@@ -278,12 +244,15 @@ def filter_vehicle_ads(vehicle_ads):
     return filtered
 
 
-def scrape_olx_for_vehicles(search_phrase):
+def search_url(search_phrase, page=1):
     query = search_phrase.strip().replace(" ", "-")
     url = f"https://www.olx.uz/transport/legkovye-avtomobili/q-{query}/?currency=UZS"
-    log(f"Scraping first page: {url}")
-    soup = fetch_page(url)
-    ad_cards = soup.find_all('div', {'data-cy': 'l-card'})
+    return url if page <= 1 else f"{url}&page={page}"
+
+
+def parse_search_page(doc):
+    """Return (number of cards, filtered ads) for one search results page."""
+    ad_cards = doc.find_all('div', {'data-cy': 'l-card'})
     all_ads = []
     for ad in ad_cards:
         parsed = extract_car_ad_info(ad)
@@ -291,7 +260,7 @@ def scrape_olx_for_vehicles(search_phrase):
             all_ads.append(parsed)
     filtered = filter_vehicle_ads(all_ads)
     log(f"Total ads found: {len(all_ads)}; After filtering: {len(filtered)}")
-    return filtered
+    return len(ad_cards), filtered
 
 
 def parse_date(date_str):
@@ -305,24 +274,21 @@ def parse_date(date_str):
 
 
 # ---------------------------------------------------------------------------
-# DEDUP FIX: load all known car_ad_ids from the DB once at startup.
+# DEDUP FIX: load known car_ad_ids from the DB once at startup.
 # v1 issued one GET per ad to check existence (inside save_to_db), and only
-# AFTER fetching every detail page. v2 loads the whole id set up front so we can
-# skip the expensive detail-page fetch entirely for ads we already have.
+# AFTER fetching every detail page. v2 loads the recent id set up front (ids
+# only, newline text from /api/cars/ids/) and settles older ads with one
+# membership check per results page, so we can skip the expensive
+# detail-page fetch entirely for ads we already have.
 # ---------------------------------------------------------------------------
 def load_existing_ad_ids():
-    if TEST_MODE:
-        return set()
+    known = KnownIds(None if TEST_MODE else API_SESSION, API_URL_IDS, timeout=REQUEST_TIMEOUT)
     try:
-        resp = API_SESSION.get(API_URL_DB, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        ids = {str(row.get("car_ad_id")) for row in data if row.get("car_ad_id")}
-        log(f"Loaded {len(ids)} existing car_ad_ids from DB for dedup")
-        return ids
+        known.load()
+        log(f"Loaded {len(known)} recent car_ad_ids from DB for dedup")
     except Exception as e:
-        log(f"⚠️ Could not preload existing ad ids ({e}); proceeding without dedup cache")
-        return set()
+        log(f"⚠️ Could not preload existing ad ids ({e}); relying on per-page id checks")
+    return known
 
 
 def _ad_id_from_url(reference_url):
@@ -333,11 +299,12 @@ def _ad_id_from_url(reference_url):
 
 # ---------------------------------------------------------------------------
 # PERFORMANCE FIX 3: detail-page fetch extracted into a standalone function so
-# it can be dispatched across a ThreadPoolExecutor. In v1 detail fetching was
-# inlined in a giant serial loop. Here each call is independent and thread-safe
-# (shared Session + RateLimiter handle coordination).
+# it can run on a pool of parse workers. In v1 detail fetching was inlined in
+# a giant serial loop. Here each call is independent and thread-safe (the
+# shared FETCHER handles rate limiting and per-host concurrency). `pending`
+# is the detail page's FETCHER future when the download was started earlier.
 # ---------------------------------------------------------------------------
-def fetch_and_parse_detail(ad, brand, model):
+def fetch_and_parse_detail(ad, brand, model, pending=None):
     reference_url = ad.get('reference_url')
 
     # Price (USD)
@@ -364,7 +331,8 @@ def fetch_and_parse_detail(ad, brand, model):
 
     if reference_url:
         try:
-            detail_html = fetch_page(reference_url)
+            html = pending.result() if pending else FETCHER.get(reference_url)
+            detail_html = parse_html(html)
 
             params_div = detail_html.find('div', {'data-testid': 'ad-parameters-container'})
             params = params_div.find_all('p') if params_div else []
@@ -483,51 +451,28 @@ def fetch_and_parse_detail(ad, brand, model):
     }
 
 
-def process_vehicle_data(vehicle_ads, brand, model, existing_ids):
-    # DEDUP FIX: filter out ads whose id is already in the DB BEFORE fetching
-    # their detail pages — the most expensive part of scraping.
-    to_fetch = []
-    for ad in vehicle_ads:
-        ad_id = _ad_id_from_url(ad.get('reference_url'))
-        if ad_id and ad_id in existing_ids:
-            log(f"⏩ Skipping detail fetch — already in DB: {ad_id}")
-            continue
-        to_fetch.append(ad)
-
-    processed = []
-    # PERFORMANCE FIX 3: concurrent detail fetches (max_workers=5).
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(fetch_and_parse_detail, ad, brand, model) for ad in to_fetch]
-        for fut in futures:
-            try:
-                result = fut.result()
-                if result:
-                    processed.append(result)
-            except Exception as e:
-                log(f"❌ Detail worker failed: {e}")
-    return processed
-
-
 def save_to_db(processed_ads, existing_ids):
+    # PERFORMANCE FIX: one POST per page to /api/cars/bulk/ (single
+    # INSERT ... ON CONFLICT DO NOTHING) instead of a POST + exists() check
+    # per ad. 200 "exists" semantics are kept as status "existing".
+    batch = []
     for ad in processed_ads:
         if ad.get("car_ad_id") and ad.get("description") and ad.get("created_at"):
-            try:
-                if hasattr(ad["created_at"], "isoformat"):
-                    ad["created_at"] = ad["created_at"].isoformat()
-
-                post_response = API_SESSION.post(API_URL_DB, json=ad, timeout=REQUEST_TIMEOUT)
-                # RELIABILITY FIX: treat BOTH 201 (created) and 200 (already
-                # exists, per the new upsert in CarList.post) as success. v1
-                # only accepted 201 and logged everything else as an error.
-                if post_response.status_code in (200, 201):
-                    existing_ids.add(str(ad["car_ad_id"]))  # keep dedup cache current
-                    log(f"✅ Saved/exists via API ({post_response.status_code}): {ad['car_ad_id']}")
-                else:
-                    log(f"❌ API error ({post_response.status_code}) for: {ad['car_ad_id']}")
-            except Exception as e:
-                logging.error(f"Request failed for car {ad.get('car_ad_id')}: {e}")
+            if hasattr(ad["created_at"], "isoformat"):
+                ad["created_at"] = ad["created_at"].isoformat()
+            batch.append(ad)
         else:
             logging.warning(f"Skipping invalid ad: {ad.get('car_ad_id')}")
+    if not batch:
+        return
+
+    statuses = post_bulk(API_SESSION, API_URL_BULK, batch, "car_ad_id", timeout=REQUEST_TIMEOUT)
+    for ad_id, state in statuses.items():
+        if state in ("created", "existing"):
+            existing_ids.add(ad_id)  # keep dedup cache current
+    created = sum(s == "created" for s in statuses.values())
+    failed = sum(s == "error" for s in statuses.values())
+    log(f"✅ Saved via bulk API: {created} new, {len(statuses) - created - failed} existing, {failed} failed")
 
 
 def export_data_to_csv(brand, model):
@@ -555,55 +500,190 @@ def export_data_to_csv(brand, model):
         logging.error(f"Error fetching data from API: {e}")
 
 
-def main():
-    log(f"Task started at {datetime.now()}")
-    brand_model_pairs = load_brands_and_models()
+# ---------------------------------------------------------------------------
+# PERFORMANCE FIX 5: staged pipeline across brand/model pairs.
+# v1 (and the first v2) handled one pair at a time — first search page, then
+# its detail pages, then the POSTs — so the network sat idle during parsing
+# and saving and vice versa. Now four stages run concurrently, connected by
+# bounded queues so a fast stage can't run away from a slow one:
+#
+#   search (1 thread)  → detail_q → parse (PARSE_WORKERS) → save_q → persist (1)
+#
+# The search stage pages through each pair's results (next page prefetched)
+# and starts every new ad's detail download on FETCHER as it enqueues it, so
+# detail_q's bound also caps how many detail pages are in flight or buffered.
+# Pagination stops after EARLY_STOP_THRESHOLD consecutive pages with nothing
+# new, like the electronics scraper.
+# ---------------------------------------------------------------------------
+MAX_SEARCH_PAGES = int(os.environ.get('OLX_MAX_SEARCH_PAGES', '10'))
+PARSE_WORKERS = 5
+DETAIL_QUEUE_SIZE = 50
+SAVE_QUEUE_SIZE = 200
+SAVE_BATCH = 100
+SAVE_IDLE_FLUSH = 5.0  # seconds; flush a partial batch when input goes quiet
+_DONE = object()
+
+
+def _dump_test_output(prefix, brand, model, data):
+    path = os.path.join(os.path.dirname(__file__), f'{prefix}_{brand}_{model}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    log(f"✅ Test mode: saved {len(data)} records to {path}")
+
+
+def search_pair(brand, model, existing_ids, queued, is_first_run, detail_q, stats):
+    phrase = f"{model} {brand}"
+    raw_ads = []
+    consecutive_empty = 0
+    next_page = FETCHER.submit(search_url(phrase, 1))
+    for page in range(1, MAX_SEARCH_PAGES + 1):
+        try:
+            doc = parse_html(next_page.result())
+        except Exception as e:
+            log(f"❌ Failed to fetch search page {page} for {brand}/{model}: {e}")
+            next_page = None
+            break
+        next_page = FETCHER.submit(search_url(phrase, page + 1)) if page < MAX_SEARCH_PAGES else None
+
+        n_cards, ads = parse_search_page(doc)
+        if not n_cards:
+            break
+        stats["search_pages"] += 1
+        raw_ads.extend(ads)
+
+        # DEDUP FIX: skip ads already in the DB BEFORE fetching their
+        # detail pages — the most expensive part of scraping.
+        existing_ids.resolve(_ad_id_from_url(ad.get('reference_url')) for ad in ads)
+        new = 0
+        for ad in ads:
+            ad_id = _ad_id_from_url(ad.get('reference_url'))
+            if ad_id and (ad_id in existing_ids or ad_id in queued):
+                log(f"⏩ Skipping detail fetch — already in DB: {ad_id}")
+                continue
+            if ad_id:
+                queued.add(ad_id)
+            pending = FETCHER.submit(ad['reference_url']) if ad.get('reference_url') else None
+            detail_q.put((brand, model, ad, pending))
+            new += 1
+        log(f"[{brand}/{model}] page {page}: {n_cards} cards, {new} new")
+
+        if is_first_run or new:
+            consecutive_empty = 0
+        else:
+            consecutive_empty += 1
+            if consecutive_empty >= EARLY_STOP_THRESHOLD:
+                log(f"🛑 [{brand}/{model}] Early stop — DB is up to date (page {page})")
+                break
+    if next_page:
+        next_page.cancel()
 
-    # DEDUP FIX: load the existing id set once for the whole run.
-    existing_ids = load_existing_ad_ids()
+    if TEST_MODE:
+        _dump_test_output('test_raw_output', brand, model, raw_ads)
+
+
+def search_stage(pairs, existing_ids, detail_q, stats):
+    is_first_run = len(existing_ids) == 0
+    queued = set()  # enqueued but not saved yet, so not in existing_ids
+    try:
+        for brand, model in pairs:
+            try:
+                search_pair(brand, model, existing_ids, queued, is_first_run, detail_q, stats)
+            except Exception as e:
+                # RELIABILITY FIX: a failure on one pair must not abort the rest.
+                log(f"❌ Failed to scrape pair {brand}/{model}: {e}")
+    finally:
+        for _ in range(PARSE_WORKERS):
+            detail_q.put(_DONE)
+
+
+def parse_stage(detail_q, save_q):
+    while (item := detail_q.get()) is not _DONE:
+        brand, model, ad, pending = item
+        try:
+            record = fetch_and_parse_detail(ad, brand, model, pending)
+            if record:
+                save_q.put(record)
+        except Exception as e:
+            log(f"❌ Detail worker failed: {e}")
+    save_q.put(_DONE)
 
-    last_brand = last_model = None
-    for pair in brand_model_pairs:
-        brand = pair.get("brand")
-        model = pair.get("model")
-        if not brand or not model:
-            log("⚠️ Skipping invalid brand-model pair.")
-            continue
-        last_brand, last_model = brand, model
 
-        search_phrase = f"{model} {brand}"
+def persist_stage(save_q, existing_ids, stats):
+    open_workers = PARSE_WORKERS
+    batch = []
+    by_pair = {}  # TEST_MODE output, one file per pair as before
+
+    def flush():
+        stats["saved"] += len(batch)
         try:
-            ads = scrape_olx_for_vehicles(search_phrase)
+            if TEST_MODE:
+                for rec in batch:
+                    by_pair.setdefault((rec["brand"], rec["model"]), []).append(rec)
+            else:
+                save_to_db(batch, existing_ids)
         except Exception as e:
-            # RELIABILITY FIX: a failure on one pair must not abort the rest.
-            log(f"❌ Failed to scrape pair {brand}/{model}: {e}")
+            log(f"❌ Failed to save batch of {len(batch)}: {e}")
+        batch.clear()
+
+    while open_workers:
+        try:
+            item = save_q.get(timeout=SAVE_IDLE_FLUSH)
+        except queue.Empty:
+            if batch:
+                flush()
             continue
+        if item is _DONE:
+            open_workers -= 1
+            continue
+        batch.append(item)
+        if len(batch) >= SAVE_BATCH:
+            flush()
+    if batch:
+        flush()
+    for (brand, model), records in by_pair.items():
+        _dump_test_output('test_output', brand, model, records)
+
+
+def run_pipeline(pairs, existing_ids):
+    detail_q = queue.Queue(maxsize=DETAIL_QUEUE_SIZE)
+    save_q = queue.Queue(maxsize=SAVE_QUEUE_SIZE)
+    stats = {"search_pages": 0, "saved": 0}
+    stages = [
+        threading.Thread(target=search_stage, args=(pairs, existing_ids, detail_q, stats), name="search"),
+        *(threading.Thread(target=parse_stage, args=(detail_q, save_q), name=f"parse-{i}")
+          for i in range(PARSE_WORKERS)),
+        threading.Thread(target=persist_stage, args=(save_q, existing_ids, stats), name="persist"),
+    ]
+    for t in stages:
+        t.start()
+    for t in stages:
+        t.join()
+    return stats
 
-        if TEST_MODE:
-            raw_output_path = os.path.join(
-                os.path.dirname(__file__), f'test_raw_output_{brand}_{model}.json'
-            )
-            with open(raw_output_path, 'w', encoding='utf-8') as f:
-                json.dump(ads, f, ensure_ascii=False, indent=2, default=str)
-            log(f"✅ Test mode: saved raw ads to {raw_output_path}")
 
-        processed = process_vehicle_data(ads, brand, model, existing_ids)
+def main():
+    log(f"Task started at {datetime.now()}")
+    pairs = []
+    for pair in load_brands_and_models():
+        brand = pair.get("brand")
+        model = pair.get("model")
+        if not brand or not model:
+            log("⚠️ Skipping invalid brand-model pair.")
+            continue
+        pairs.append((brand, model))
+
+    # DEDUP FIX: load the existing id set once for the whole run.
+    existing_ids = load_existing_ad_ids()
 
-        if TEST_MODE:
-            test_output_path = os.path.join(
-                os.path.dirname(__file__), f'test_output_{brand}_{model}.json'
-            )
-            with open(test_output_path, 'w', encoding='utf-8') as f:
-                json.dump(processed, f, ensure_ascii=False, indent=2, default=str)
-            log(f"✅ Test mode: saved data to {test_output_path}")
-        else:
-            save_to_db(processed, existing_ids)
+    stats = run_pipeline(pairs, existing_ids)
+    log(f"Pipeline done: {len(pairs)} pairs, {stats['search_pages']} search pages, "
+        f"{stats['saved']} records")
 
     # PERFORMANCE FIX 4: export CSV ONCE after all pairs, not inside the loop.
     # v1 called export_data_to_csv on every iteration (and always for the same
     # hardcoded Chevrolet/Lacetti), doing N redundant API round-trips.
-    if not TEST_MODE and last_brand and last_model:
-        export_data_to_csv(last_brand, last_model)
+    if not TEST_MODE and pairs:
+        export_data_to_csv(*pairs[-1])
 
     log(f"Task completed at {datetime.now()}")
 
@@ -2,8 +2,9 @@
 OLX.uz real-estate scraper — apartments + houses.
 
 Follows the same architecture as run_task_scraping_olx_vehicle_v2.py:
-  - single pooled requests.Session with automatic backoff retries
-  - thread-safe RateLimiter (min interval + jitter) on every OLX request
+  - shared fetch engine for every OLX request (per-host token bucket with
+    jitter, per-host concurrency cap, backoff retries)
+  - next listing page prefetched while the current page's details download
   - robust int parsing (strip non-digits, never crash on garbage)
   - dedup against the DB up front so we skip detail fetches we already have
   - concurrent detail-page fetches via ThreadPoolExecutor
@@ -20,17 +21,17 @@ import os
 import sys
 import json
 import re
-import time
-import random
 import logging
-import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
+
+from fetch_engine import BackgroundFetcher
+from page_parser import parse_html
+from scraper_utils import KnownIds, post_bulk
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'scrape_apartments_config.json')
 
@@ -58,22 +59,19 @@ def load_config():
 CONFIG = load_config()
 DJANGO_URL = os.environ.get('DJANGO_URL', CONFIG.get('django_api_url', 'http://django:8000'))
 API_URL = f"{DJANGO_URL.rstrip('/')}/api/apartments/"
+BULK_URL = f"{DJANGO_URL.rstrip('/')}/api/apartments/bulk/"
+IDS_URL = f"{DJANGO_URL.rstrip('/')}/api/apartments/ids/"
 MAX_RETRIES = CONFIG.get('max_retries', 3)
 SLEEP_BETWEEN = CONFIG.get('sleep_between_requests', 1.5)
 
 # ---------------------------------------------------------------------------
-# HTTP session with pooling + retries (same pattern as v2 build_session)
+# API session with pooling + retries (same pattern as v2 build_session)
 # ---------------------------------------------------------------------------
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-)
 REQUEST_TIMEOUT = 20
 
 
 def build_session():
     session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
     retry = Retry(
         total=MAX_RETRIES,
         backoff_factor=1.5,
@@ -86,32 +84,12 @@ def build_session():
     return session
 
 
-SESSION = build_session()
 API_SESSION = build_session()
 
-
-# ---------------------------------------------------------------------------
-# Thread-safe rate limiter (same as v2). Detail pages are fetched concurrently.
-# ---------------------------------------------------------------------------
-class RateLimiter:
-    def __init__(self, min_interval=0.8, max_jitter=0.4):
-        self.min_interval = min_interval
-        self.max_jitter = max_jitter
-        self._lock = threading.Lock()
-        self._last_ts = 0.0
-
-    def wait(self):
-        with self._lock:
-            now = time.monotonic()
-            elapsed = now - self._last_ts
-            delay = self.min_interval - elapsed
-            if delay > 0:
-                time.sleep(delay)
-            time.sleep(random.uniform(0, self.max_jitter))
-            self._last_ts = time.monotonic()
-
-
-RATE_LIMITER = RateLimiter(min_interval=SLEEP_BETWEEN, max_jitter=0.4)
+# OLX pages go through the shared fetch engine (same as v2): one request per
+# SLEEP_BETWEEN + 0.2s on average, at most 4 in flight, 429/5xx retried.
+FETCHER = BackgroundFetcher(rate=1 / (SLEEP_BETWEEN + 0.2), jitter=0.2, per_host=4,
+                            retries=MAX_RETRIES, backoff=1.5, timeout=REQUEST_TIMEOUT)
 
 
 # ---------------------------------------------------------------------------
@@ -141,11 +119,7 @@ def _to_float(val):
 
 
 def fetch_page(url):
-    RATE_LIMITER.wait()
-    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
-    response.raise_for_status()
-    log(f"Fetched page: {url}")
-    return BeautifulSoup(response.content, 'html.parser')
+    return parse_html(FETCHER.get(url))
 
 
 def _ad_id_from_url(url):
@@ -341,18 +315,13 @@ def build_record(detail, category_name):
 # Dedup + persistence
 # ---------------------------------------------------------------------------
 def load_existing_ad_ids():
-    if TEST_MODE:
-        return set()
+    known = KnownIds(None if TEST_MODE else API_SESSION, IDS_URL, timeout=REQUEST_TIMEOUT)
     try:
-        resp = API_SESSION.get(API_URL, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        ids = {str(row.get("ad_id")) for row in data if row.get("ad_id")}
-        log(f"Loaded {len(ids)} existing apartment ad_ids from DB for dedup")
-        return ids
+        known.load()
+        log(f"Loaded {len(known)} recent apartment ad_ids from DB for dedup")
     except Exception as e:
-        log(f"⚠️ Could not preload existing ad ids ({e}); proceeding without dedup cache")
-        return set()
+        log(f"⚠️ Could not preload existing ad ids ({e}); relying on per-page id checks")
+    return known
 
 
 def fetch_and_build(card, category_name):
@@ -369,19 +338,23 @@ def fetch_and_build(card, category_name):
 
 
 def save_to_db(records, existing_ids):
+    batch = []
     for rec in records:
         if not rec.get("ad_id"):
             log("⚠️ Skipping record with no ad_id")
             continue
-        try:
-            resp = API_SESSION.post(API_URL, json=rec, timeout=REQUEST_TIMEOUT)
-            if resp.status_code in (200, 201):
-                existing_ids.add(str(rec["ad_id"]))
-                log(f"✅ Saved/exists via API ({resp.status_code}): {rec['ad_id']}")
-            else:
-                log(f"❌ API error ({resp.status_code}) for {rec['ad_id']}: {resp.text[:200]}")
-        except Exception as e:
-            logging.error(f"Request failed for apartment {rec.get('ad_id')}: {e}")
+        batch.append(rec)
+    if not batch:
+        return
+
+    statuses = post_bulk(API_SESSION, BULK_URL, batch, "ad_id", timeout=REQUEST_TIMEOUT)
+    for ad_id, state in statuses.items():
+        if state in ("created", "existing"):
+            existing_ids.add(ad_id)
+    created = sum(s == "created" for s in statuses.values())
+    failed = sum(s == "error" for s in statuses.values())
+    log(f"✅ Saved apartment via bulk API: {created} new, "
+        f"{len(statuses) - created - failed} existing, {failed} failed")
 
 
 # ---------------------------------------------------------------------------
@@ -393,22 +366,28 @@ def scrape_category(category, existing_ids):
     max_pages = category.get("max_pages", 1)
 
     all_records = []
+    # The next listing page downloads while this page's details are fetched.
+    next_listing = FETCHER.submit(_page_url(base_url, 1))
     for page in range(1, max_pages + 1):
         url = _page_url(base_url, page)
         try:
-            soup = fetch_page(url)
+            doc = parse_html(next_listing.result())
         except Exception as e:
             log(f"❌ Failed to fetch listing page {url}: {e}")
             break
+        next_listing = FETCHER.submit(_page_url(base_url, page + 1)) if page < max_pages else None
 
-        cards = soup.find_all('div', {'data-cy': 'l-card'})
+        cards = doc.find_all('div', {'data-cy': 'l-card'})
         if not cards:
             log(f"No cards on page {page} of {name}; stopping pagination")
+            if next_listing:
+                next_listing.cancel()
             break
 
         parsed_cards = [extract_card(c) for c in cards]
 
         # Dedup BEFORE the expensive detail fetch (same as v2 process step).
+        existing_ids.resolve(_ad_id_from_url(c.get("url")) for c in parsed_cards)
         to_fetch = []
         for card in parsed_cards:
             ad_id = _ad_id_from_url(card.get("url"))
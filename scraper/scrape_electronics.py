@@ -2,8 +2,8 @@
 OLX.uz electronics scraper — video cards (GPUs) + Apple products.
 
 Same architecture as run_task_scraping_olx_vehicle_v2.py:
-  - pooled requests.Session with backoff retries
-  - thread-safe RateLimiter (min interval + jitter)
+  - shared fetch engine for OLX (per-host token bucket, concurrency cap, retries)
+  - next listing page prefetched while the current page's details download
   - robust int parsing, dedup against the DB, concurrent detail fetches
   - POST to the Django API; 200 (exists) and 201 (created) both = success
 
@@ -25,19 +25,17 @@ import os
 import sys
 import json
 import re
-import time
-import random
 import logging
-import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
 
-from scraper_utils import RunTracker, human_sleep, EARLY_STOP_THRESHOLD
+from fetch_engine import BackgroundFetcher
+from page_parser import parse_html
+from scraper_utils import KnownIds, RunTracker, human_sleep, post_bulk, EARLY_STOP_THRESHOLD
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'scrape_electronics_config.json')
 
@@ -62,19 +60,16 @@ def load_config():
 CONFIG = load_config()
 DJANGO_URL = os.environ.get('DJANGO_URL', CONFIG.get('django_api_url', 'http://django:8000'))
 API_URL = f"{DJANGO_URL.rstrip('/')}/api/electronics/"
+BULK_URL = f"{DJANGO_URL.rstrip('/')}/api/electronics/bulk/"
+IDS_URL = f"{DJANGO_URL.rstrip('/')}/api/electronics/ids/"
 MAX_RETRIES = CONFIG.get('max_retries', 3)
 SLEEP_BETWEEN = CONFIG.get('sleep_between_requests', 1.5)
 
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-)
 REQUEST_TIMEOUT = 20
 
 
 def build_session():
     session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
     retry = Retry(
         total=MAX_RETRIES,
         backoff_factor=1.5,
@@ -87,29 +82,12 @@ def build_session():
     return session
 
 
-SESSION = build_session()
 API_SESSION = build_session()
 
-
-class RateLimiter:
-    def __init__(self, min_interval=0.8, max_jitter=0.4):
-        self.min_interval = min_interval
-        self.max_jitter = max_jitter
-        self._lock = threading.Lock()
-        self._last_ts = 0.0
-
-    def wait(self):
-        with self._lock:
-            now = time.monotonic()
-            elapsed = now - self._last_ts
-            delay = self.min_interval - elapsed
-            if delay > 0:
-                time.sleep(delay)
-            time.sleep(random.uniform(0, self.max_jitter))
-            self._last_ts = time.monotonic()
-
-
-RATE_LIMITER = RateLimiter(min_interval=SLEEP_BETWEEN, max_jitter=0.4)
+# OLX pages go through the shared fetch engine (same as v2): one request per
+# SLEEP_BETWEEN + 0.2s on average, at most 4 in flight, 429/5xx retried.
+FETCHER = BackgroundFetcher(rate=1 / (SLEEP_BETWEEN + 0.2), jitter=0.2, per_host=4,
+                            retries=MAX_RETRIES, backoff=1.5, timeout=REQUEST_TIMEOUT)
 
 
 # ---------------------------------------------------------------------------
@@ -126,11 +104,7 @@ def _to_int(val):
 
 
 def fetch_page(url):
-    RATE_LIMITER.wait()
-    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
-    response.raise_for_status()
-    log(f"Fetched page: {url}")
-    return BeautifulSoup(response.content, 'html.parser')
+    return parse_html(FETCHER.get(url))
 
 
 def _ad_id_from_url(url):
@@ -600,18 +574,13 @@ def parse_detail(detail_html, card, category_name):
 # Dedup + persistence
 # ---------------------------------------------------------------------------
 def load_existing_ad_ids():
-    if TEST_MODE:
-        return set()
+    known = KnownIds(None if TEST_MODE else API_SESSION, IDS_URL, timeout=REQUEST_TIMEOUT)
     try:
-        resp = API_SESSION.get(API_URL, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        ids = {str(row.get("ad_id")) for row in data if row.get("ad_id")}
-        log(f"Loaded {len(ids)} existing electronics ad_ids from DB for dedup")
-        return ids
+        known.load()
+        log(f"Loaded {len(known)} recent electronics ad_ids from DB for dedup")
     except Exception as e:
-        log(f"⚠️ Could not preload existing ad ids ({e}); proceeding without dedup cache")
-        return set()
+        log(f"⚠️ Could not preload existing ad ids ({e}); relying on per-page id checks")
+    return known
 
 
 def fetch_and_build(card, category_name):
@@ -627,19 +596,23 @@ def fetch_and_build(card, category_name):
 
 
 def save_to_db(records, existing_ids):
+    batch = []
     for rec in records:
         if not rec.get("ad_id"):
             log("⚠️ Skipping record with no ad_id")
             continue
-        try:
-            resp = API_SESSION.post(API_URL, json=rec, timeout=REQUEST_TIMEOUT)
-            if resp.status_code in (200, 201):
-                existing_ids.add(str(rec["ad_id"]))
-                log(f"✅ Saved/exists via API ({resp.status_code}): {rec['ad_id']}")
-            else:
-                log(f"❌ API error ({resp.status_code}) for {rec['ad_id']}: {resp.text[:200]}")
-        except Exception as e:
-            logging.error(f"Request failed for electronics {rec.get('ad_id')}: {e}")
+        batch.append(rec)
+    if not batch:
+        return
+
+    statuses = post_bulk(API_SESSION, BULK_URL, batch, "ad_id", timeout=REQUEST_TIMEOUT)
+    for ad_id, state in statuses.items():
+        if state in ("created", "existing"):
+            existing_ids.add(ad_id)
+    created = sum(s == "created" for s in statuses.values())
+    failed = sum(s == "error" for s in statuses.values())
+    log(f"✅ Saved electronics via bulk API: {created} new, "
+        f"{len(statuses) - created - failed} existing, {failed} failed")
 
 
 def scrape_category(category, existing_ids, tracker: RunTracker):
@@ -652,21 +625,27 @@ def scrape_category(category, existing_ids, tracker: RunTracker):
     total_saved = 0
     pages_done = 0
 
+    # The next listing page downloads while this page's details are fetched.
+    next_listing = FETCHER.submit(_page_url(base_url, 1))
     for page in range(1, max_pages + 1):
         url = _page_url(base_url, page)
         try:
-            soup = fetch_page(url)
+            doc = parse_html(next_listing.result())
         except Exception as e:
             log(f"❌ Failed to fetch listing page {url}: {e}")
             break
+        next_listing = FETCHER.submit(_page_url(base_url, page + 1)) if page < max_pages else None
 
-        cards = soup.find_all('div', {'data-cy': 'l-card'})
+        cards = doc.find_all('div', {'data-cy': 'l-card'})
         if not cards:
             log(f"No cards on page {page} of {name}; stopping pagination")
+            if next_listing:
+                next_listing.cancel()
             break
 
         parsed_cards = [extract_card(c) for c in cards]
 
+        existing_ids.resolve(_ad_id_from_url(c.get("url")) for c in parsed_cards)
         to_fetch = []
         for card in parsed_cards:
             ad_id = _ad_id_from_url(card.get("url"))
@@ -681,6 +660,8 @@ def scrape_category(category, existing_ids, tracker: RunTracker):
                 f"({consecutive_empty}/{EARLY_STOP_THRESHOLD} empty)")
             if consecutive_empty >= EARLY_STOP_THRESHOLD:
                 log(f"🛑 [{name}] Early stop — DB is up to date (page {page})")
+                if next_listing:
+                    next_listing.cancel()
                 tracker.update(pages_scraped=pages_done, new_records=total_saved, early_stopped=True)
                 return total_saved, True
         else:
@@ -3,12 +3,15 @@ Shared utilities for all OLX scrapers:
   - RunTracker  : POST start / PATCH progress / PATCH finish to Django API
   - human_sleep : random delay with occasional long "reading" pauses
   - EARLY_STOP_THRESHOLD : stop pagination when N consecutive pages have 0 new ads
+  - post_bulk   : write a page of records in one POST to a /bulk/ endpoint
+  - KnownIds    : dedup cache of ad ids already in the DB (compact /ids/ feed)
 """
 
 import os
 import time
 import random
 import logging
+from datetime import datetime, timedelta, timezone
 
 import requests
 
@@ -18,6 +21,7 @@ DJANGO_URL = os.environ.get('DJANGO_URL', 'http://django:8000')
 RUNS_URL   = f"{DJANGO_URL.rstrip('/')}/api/scraper-runs/"
 
 EARLY_STOP_THRESHOLD = int(os.environ.get('EARLY_STOP_PAGES', '2'))
+DEDUP_WINDOW_DAYS    = int(os.environ.get('DEDUP_WINDOW_DAYS', '30'))
 
 
 # ---------------------------------------------------------------------------
@@ -34,6 +38,101 @@ def human_sleep(base_min: float = 1.0, base_max: float = 2.5):
     time.sleep(delay)
 
 
+# ---------------------------------------------------------------------------
+# Bulk ingest
+# ---------------------------------------------------------------------------
+BULK_CHUNK = 500
+
+
+def post_bulk(session, bulk_url: str, records: list, key: str, timeout=30) -> dict:
+    """
+    POST records as a JSON array to a Django /bulk/ endpoint (one INSERT per
+    request instead of one POST per record). Returns {id: status} where
+    status is 'created', 'existing' or 'error'; records of a failed request
+    are all reported as 'error'.
+    """
+    statuses = {}
+    for i in range(0, len(records), BULK_CHUNK):
+        chunk = records[i:i + BULK_CHUNK]
+        try:
+            resp = session.post(bulk_url, json=chunk, timeout=timeout)
+            if resp.status_code != 200:
+                logger.error("Bulk POST %s failed (%s): %s", bulk_url, resp.status_code, resp.text[:200])
+                statuses.update({str(r.get(key)): 'error' for r in chunk})
+                continue
+            for item in resp.json()['results']:
+                rec_id = str(chunk[item['index']].get(key))
+                statuses[rec_id] = item['status']
+                if item['status'] == 'error':
+                    logger.error("Rejected %s: %s", rec_id, item.get('errors'))
+        except Exception as e:
+            logger.error("Bulk POST %s failed: %s", bulk_url, e)
+            statuses.update({str(r.get(key)): 'error' for r in chunk})
+    return statuses
+
+
+# ---------------------------------------------------------------------------
+# Dedup cache
+# ---------------------------------------------------------------------------
+class KnownIds:
+    """
+    Set-like cache of ad ids already stored in Django.
+
+    Startup only downloads ids from the last DEDUP_WINDOW_DAYS days (0 = all)
+    as newline-delimited text from GET <ids_url>, so memory and startup time
+    follow recent volume, not table size. Older ads that resurface on a
+    listing page are settled by resolve(): one POST per page with just the
+    candidates not cached yet.
+
+        ids = KnownIds(session, ".../api/cars/ids/")
+        ids.load()
+        ids.resolve(page_ids)
+        if ad_id in ids: ...
+
+    session=None makes it an offline, always-empty cache (test mode).
+    """
+
+    def __init__(self, session, ids_url: str, timeout=30):
+        self.session = session
+        self.ids_url = ids_url
+        self.timeout = timeout
+        self._ids: set[str] = set()
+
+    def load(self, window_days: int = DEDUP_WINDOW_DAYS) -> None:
+        if self.session is None:
+            return
+        params = {}
+        if window_days:
+            since = datetime.now(timezone.utc) - timedelta(days=window_days)
+            params['since'] = since.isoformat()
+        with self.session.get(self.ids_url, params=params, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            self._ids.update(line for line in resp.iter_lines(decode_unicode=True) if line)
+
+    def resolve(self, candidates) -> None:
+        """Cache whichever of `candidates` the DB already has."""
+        pending = [str(c) for c in candidates if c and str(c) not in self._ids]
+        if self.session is None or not pending:
+            return
+        try:
+            resp = self.session.post(self.ids_url, data='\n'.join(pending).encode(),
+                                     headers={'Content-Type': 'text/plain'}, timeout=self.timeout)
+            resp.raise_for_status()
+            unknown = set(resp.text.split())
+            self._ids.update(c for c in pending if c not in unknown)
+        except Exception as e:
+            logger.warning("KnownIds.resolve failed (%s); treating %d ids as new", e, len(pending))
+
+    def add(self, ad_id) -> None:
+        self._ids.add(str(ad_id))
+
+    def __contains__(self, ad_id) -> bool:
+        return str(ad_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
 # ---------------------------------------------------------------------------
 # Run tracker
 # ---------------------------------------------------------------------------
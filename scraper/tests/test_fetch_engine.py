@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from fetch_engine import BackgroundFetcher, FetchEngine, FetchError, TokenBucket
+
+PAGE = (Path(__file__).resolve().parent.parent / "test_page.html").read_bytes()
+DELAY = 0.2
+
+
+class Stub(BaseHTTPRequestHandler):
+    """Serves test_page.html after DELAY; /flaky 503s twice, /missing 404s."""
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    flaky_hits = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(DELAY)
+            if self.path.startswith("/missing"):
+                return self._reply(404, b"")
+            if self.path.startswith("/flaky"):
+                with cls.lock:
+                    cls.flaky_hits += 1
+                    hits = cls.flaky_hits
+                if hits <= 2:
+                    return self._reply(503, b"", {"Retry-After": "0.05"})
+            self._reply(200, PAGE)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    Stub.in_flight = Stub.max_in_flight = Stub.flaky_hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket_spacing():
+    bucket = TokenBucket(rate=10, burst=2)
+    delays = [bucket.reserve(now=0.0) for _ in range(5)]
+    assert delays == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3])
+    assert bucket.reserve(now=10.0) == 0.0  # idle time refills the burst
+
+
+def test_fetch_content_retries_and_errors(stub):
+    async def run():
+        async with FetchEngine(rate=100, per_host=4, backoff=0.01) as engine:
+            page = await engine.fetch(f"{stub}/page")
+            flaky = await engine.fetch(f"{stub}/flaky")
+            with pytest.raises(FetchError):
+                await engine.fetch(f"{stub}/missing")
+            return page, flaky, engine.stats
+
+    page, flaky, stats = asyncio.run(run())
+    assert page.encode() == PAGE
+    assert flaky.encode() == PAGE
+    assert Stub.flaky_hits == 3
+    assert stats == {"requests": 5, "retries": 2, "failures": 1}
+
+
+def test_per_host_cap_and_rate(stub):
+    async def run():
+        async with FetchEngine(rate=20, burst=1, jitter=0, per_host=3) as engine:
+            start = time.monotonic()
+            results = await engine.fetch_all(f"{stub}/page?{i}" for i in range(12))
+            return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(run())
+    assert all(r.encode() == PAGE for r in results)
+    assert Stub.max_in_flight == 3
+    # 12 starts at 20/s can't finish before 11 * 0.05s; 3 in flight at
+    # DELAY each can't finish before 4 * DELAY
+    assert elapsed >= 4 * DELAY
+
+
+def test_pages_prefetch_overlaps_work(stub):
+    """Listing pages download while the caller works on the previous one."""
+    urls = [f"{stub}/page?p={i}" for i in range(5)]
+
+    async def run(prefetch):
+        async with FetchEngine(rate=100, per_host=4) as engine:
+            start = time.monotonic()
+            seen = []
+            async for url, text in engine.pages(urls, prefetch=prefetch):
+                seen.append(url)
+                await asyncio.sleep(DELAY)  # detail fetches for this page
+            return seen, time.monotonic() - start
+
+    seen, sequential = asyncio.run(run(prefetch=0))
+    assert seen == urls
+    seen, pipelined = asyncio.run(run(prefetch=1))
+    assert seen == urls
+    assert pipelined < sequential * 0.75
+
+
+def test_background_fetcher_from_threads(stub):
+    fetcher = BackgroundFetcher(rate=100, per_host=2)
+    try:
+        nxt = fetcher.submit(f"{stub}/page?next")
+        results = fetcher.get_many([f"{stub}/page?{i}" for i in range(4)] + [f"{stub}/missing"])
+        assert [r.encode() == PAGE for r in results[:4]] == [True] * 4
+        assert isinstance(results[4], FetchError)
+        assert nxt.result().encode() == PAGE
+        assert Stub.max_in_flight <= 2
+    finally:
+        fetcher.close()
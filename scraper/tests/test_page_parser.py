@@ -0,0 +1,108 @@
+"""
+Parity + benchmark for page_parser backends over the checked-in fixtures.
+pytest checks parity only; timings are machine-dependent, so they are
+printed by the benchmark rather than asserted:
+
+    cd scraper && python -m tests.test_page_parser     # print timings
+"""
+import logging
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+import page_parser
+import run_task_scraping_olx_vehicle_v2 as vehicle
+import scrape_apartments as apartments
+import scrape_electronics as electronics
+
+FIXTURES = sorted(Path(__file__).resolve().parent.parent.glob("test_page*.html"))
+
+# test_page.html is a saved listing page; this is the detail-page markup the
+# parsers look for, with the usual noise (nbsp, nested spans, comments, scripts).
+DETAIL_PAGE = """<html><body>
+<div data-testid="ad-parameters-container">
+  <p><span>Частное лицо</span></p>
+  <p>Модель: <span>Gentra</span></p>
+  <p>Коробка передач:&nbsp;Автоматическая<!-- ab --></p>
+  <p>Цвет: Белый</p><p>Вид топлива: Газ/бензин</p><p>Состояние: Б/у</p>
+  <p>Общая площадь: 65,5 м²</p><p>Количество комнат: 3</p><p>Этаж: 4</p><p>Этажность дома: 9</p>
+  <p>Доп. опции: <span>ABS</span>, <span>Кондиционер</span></p>
+</div>
+<div data-testid="ad_description"><div>Срочно <b>продаю</b>,<br>торг<script>var x = 1;</script></div></div>
+<p data-testid="location-name">Ташкент, Юнусабадский район</p>
+<h4 data-testid="user-profile-user-name"> Азиз </h4>
+<p data-testid="member-since">На OLX с 2019</p>
+<a data-testid="user-profile-link" href="/list/user/abc/">profile</a>
+<img data-testid="swiper-image" src="https://img/1.jpg"><img data-testid="swiper-image" data-src="https://img/2.jpg">
+</body></html>"""
+
+
+@contextmanager
+def backend(name):
+    previous, page_parser.DEFAULT_BACKEND = page_parser.DEFAULT_BACKEND, name
+    try:
+        yield
+    finally:
+        page_parser.DEFAULT_BACKEND = previous
+
+
+def extract_all(html, parser):
+    """Everything the three scrapers pull out of a listing page and a detail
+    page, parsed with `parser`."""
+    with backend(parser):
+        doc = page_parser.parse_html(html)
+        cards = doc.find_all('div', {'data-cy': 'l-card'})
+        card = apartments.extract_card(cards[0])
+        detail = page_parser.parse_html(DETAIL_PAGE)
+        detail_page = Future()
+        detail_page.set_result(DETAIL_PAGE)
+        electronics_detail = electronics.parse_detail(detail, card, "iphone")
+        del electronics_detail["created_at"], electronics_detail["scraped_at"]
+        return {
+            "vehicle_cards": [vehicle.extract_car_ad_info(c) for c in cards],
+            "apartment_cards": [apartments.extract_card(c) for c in cards],
+            "electronics_cards": [electronics.extract_card(c) for c in cards],
+            "vehicle_detail": vehicle.fetch_and_parse_detail(
+                {"name": "Chevrolet Gentra", "reference_url": card.get("url")},
+                "Chevrolet", "Gentra", detail_page),
+            "apartment_detail": apartments.parse_detail(detail, card),
+            "electronics_detail": electronics_detail,
+        }
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name)
+def test_backends_extract_identical_fields(path):
+    html = path.read_text(encoding="utf-8")
+    old = extract_all(html, "soup")
+    new = extract_all(html, "lxml")
+    assert len(old["apartment_cards"]) > 0
+    assert old["vehicle_detail"]["gear_type"] == "AT"
+    assert old["apartment_detail"]["area_m2"] == 65.5
+    assert new == old
+
+
+def bench(html, backend, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        extract_all(html, backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    for path in FIXTURES:
+        html = path.read_text(encoding="utf-8")
+        soup, fast = bench(html, "soup"), bench(html, "lxml")
+        print(f"{path.name}: soup {soup * 1000:.1f} ms, lxml {fast * 1000:.1f} ms ({soup / fast:.1f}x)")
@@ -0,0 +1,65 @@
+from concurrent.futures import Future
+
+import pytest
+
+import run_task_scraping_olx_vehicle_v2 as v2
+from scraper_utils import KnownIds
+
+
+def card(ad_id):
+    return f"""
+    <div data-cy="l-card">
+      <a class="css-1tqlkj0" href="/d/obyavlenie/lacetti-{ad_id}.html"></a>
+      <h4>Chevrolet Lacetti 1.8</h4>
+      <p data-testid="ad-price">150 000 000 сум</p>
+      <p data-testid="location-date">Ташкент - Сегодня в 10:00</p>
+      <div class="css-1kfqt7f"><span class="css-h59g4b">2018 - 50 000 км</span></div>
+    </div>"""
+
+
+class FakeFetcher:
+    """Serves canned HTML; unknown URLs (detail pages) get an empty page."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def submit(self, url):
+        self.requested.append(url)
+        future = Future()
+        future.set_result(self.pages.get(url, "<html></html>"))
+        return future
+
+    def get(self, url):
+        return self.submit(url).result()
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    saved = []
+    pages = {f"search/{n}": "".join(card(f"ID{n}{i}") for i in range(2)) for n in range(1, 5)}
+    fetcher = FakeFetcher(pages)
+    monkeypatch.setattr(v2, "FETCHER", fetcher)
+    monkeypatch.setattr(v2, "search_url", lambda phrase, page=1: f"search/{page}")
+    monkeypatch.setattr(v2, "save_to_db", lambda batch, ids: saved.extend(batch))
+    monkeypatch.setattr(v2, "MAX_SEARCH_PAGES", 10)
+    return fetcher, saved
+
+
+def test_paginates_until_empty_page(pipeline):
+    fetcher, saved = pipeline
+    stats = v2.run_pipeline([("Chevrolet", "Lacetti")], KnownIds(None, ""))
+    assert stats == {"search_pages": 4, "saved": 8}
+    assert sorted(r["car_ad_id"] for r in saved) == sorted(f"ID{n}{i}" for n in range(1, 5) for i in range(2))
+    assert all(r["brand"] == "Chevrolet" and r["price"] == 12000 for r in saved)
+
+
+def test_early_stop_when_pages_are_known(pipeline):
+    fetcher, saved = pipeline
+    known = KnownIds(None, "")
+    for n in (1, 2, 3):
+        for i in range(2):
+            known.add(f"ID{n}{i}")
+    stats = v2.run_pipeline([("Chevrolet", "Lacetti")], known)
+    assert stats == {"search_pages": v2.EARLY_STOP_THRESHOLD, "saved": 0}
+    assert not any("obyavlenie" in url for url in fetcher.requested)